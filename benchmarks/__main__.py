@@ -0,0 +1,64 @@
+"""Замеры исполнителя, лога и интерфейса: python -m benchmarks [--save | --compare]"""
+import argparse
+import os
+import sys
+
+# Без дисплея (Linux-сервер, CI) Qt рисует в память; так же и при наличии дисплея,
+# чтобы замеры были сравнимы
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import cases  # noqa: E402,F401  (регистрирует замеры)
+from benchmarks.harness import (  # noqa: E402
+    BENCHMARKS, compare, load_baseline, print_table, run_benchmarks, save_baseline)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                "baselines", "baseline.json")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности Auto-Check")
+    parser.add_argument("--only", default="",
+                        help=f"Замеры через запятую: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Сколько раз повторить замер (берётся медиана)")
+    parser.add_argument("--save", nargs="?", const=DEFAULT_BASELINE, default=None,
+                        metavar="ФАЙЛ", help="Сохранить результат как эталон")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, default=None,
+                        metavar="ФАЙЛ", help="Сравнить с эталоном")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Допустимое ухудшение относительно эталона (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        sys.stderr.write(f"Неизвестные замеры: {', '.join(unknown)}\n")
+        return 2
+    if args.compare and not os.path.exists(args.compare):
+        # Эталон в репозитории не хранится: его снимают на своей машине
+        sys.stderr.write(f"Эталон не найден: {args.compare}\n"
+                         "Сначала сохраните его: python -m benchmarks --save\n")
+        return 2
+    results = run_benchmarks(
+        names or None, max(1, args.repeat),
+        progress=lambda name: sys.stderr.write(f"{name}: готово\n"))
+    if args.compare:
+        rows, regressions = compare(results, load_baseline(args.compare), args.threshold)
+        print_table(rows)
+        if regressions:
+            print(f"Ухудшение больше {args.threshold:.0%}: {', '.join(regressions)}")
+    else:
+        print_table([(key, result, None, None, "") for key, result in results.items()])
+        regressions = []
+    if args.save:
+        save_baseline(args.save, results)
+        print(f"Эталон сохранён: {args.save}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
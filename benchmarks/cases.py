@@ -0,0 +1,165 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from benchmarks.harness import benchmark, metric, per_call
+from services.executor import CheckExecutor, CheckListener
+from stubs import checks
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_app = None
+
+
+def application():
+    """Один QApplication на процесс замеров (без дисплея — платформа offscreen)"""
+    global _app
+    from PyQt5.QtWidgets import QApplication
+    if _app is None:
+        _app = QApplication.instance() or QApplication([sys.argv[0]])
+    return _app
+
+
+def _run_job(executor, functions):
+    job = executor.submit("Замеры", functions, CheckListener())
+    results = job.wait(120)
+    if results is None or not all(result["success"] for result in results):
+        raise RuntimeError("Проверки-пустышки завершились с ошибкой")
+
+
+@benchmark("dispatch")
+def dispatch(count=300):
+    """Накладной расход исполнителя на одну проверку: поток, токен, контекст лога"""
+    executor = CheckExecutor(max_workers=6, cancel_grace=1.0)
+    try:
+        # Первый прогон прогревает пул потоков и цикл событий async-проверок
+        _run_job(executor, [("noop", checks.noop), ("async", checks.async_noop)])
+        values = {}
+        for key, func in (("sync_per_check", checks.noop),
+                          ("async_per_check", checks.async_noop)):
+            functions = [(f"{key}-{index}", func) for index in range(count)]
+            time_s = time.perf_counter()
+            _run_job(executor, functions)
+            values[key] = metric((time.perf_counter() - time_s) / count, "s")
+        return values
+    finally:
+        executor.shutdown(wait=True)
+
+
+def _drain(app, tab):
+    app.sendPostedEvents()
+    app.processEvents()
+    tab.log_output.flush()
+
+
+@benchmark("log_signal")
+def log_signal(count=5000):
+    """log_signal → add_log → пачка в модели лога, сообщений в секунду"""
+    app = application()
+    from interfaces.ui import SYSTEMS_CONFIG, SystemTab
+    system = next(iter(SYSTEMS_CONFIG))
+    tab = SystemTab(system, SYSTEMS_CONFIG[system])
+    try:
+        tab.log_output.clear()
+        time_s = time.perf_counter()
+        for index in range(count):
+            tab.log_signal.emit(f"Сообщение {index}", "black")
+        _drain(app, tab)
+        same_thread = count / (time.perf_counter() - time_s)
+
+        # Из потока проверки сигнал доставляется через очередь событий GUI
+        tab.log_output.clear()
+
+        def emit():
+            for index in range(count):
+                tab.log_signal.emit(f"Сообщение {index}", "green")
+
+        thread = threading.Thread(target=emit)
+        time_s = time.perf_counter()
+        thread.start()
+        while thread.is_alive():
+            app.processEvents()
+        thread.join()
+        _drain(app, tab)
+        cross_thread = count / (time.perf_counter() - time_s)
+        return {"same_thread": metric(same_thread, "msg/s", "higher"),
+                "cross_thread": metric(cross_thread, "msg/s", "higher")}
+    finally:
+        tab.deleteLater()
+        app.processEvents()
+
+
+@benchmark("system_tab")
+def system_tab(count=10):
+    """Создание вкладки SystemTab со списком проверок, каждой системы по очереди"""
+    app = application()
+    from interfaces.ui import SYSTEMS_CONFIG, SystemTab
+    systems = list(SYSTEMS_CONFIG.items())
+    tabs = []
+    time_s = time.perf_counter()
+    for index in range(count):
+        system, system_checks = systems[index % len(systems)]
+        tabs.append(SystemTab(system, system_checks))
+    elapsed = (time.perf_counter() - time_s) / count
+    for tab in tabs:
+        tab.deleteLater()
+    app.processEvents()
+    return {"construct": metric(elapsed, "s")}
+
+
+@benchmark("cold_start")
+def cold_start():
+    """run_interface() в отдельном процессе с платформой Qt offscreen"""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    time_s = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.cold_start"], cwd=ROOT, env=env,
+        capture_output=True, text=True, encoding="utf-8", timeout=120)
+    elapsed = time.perf_counter() - time_s
+    if completed.returncode != 0:
+        raise RuntimeError(f"Холодный запуск завершился с кодом {completed.returncode}:"
+                           f" {completed.stderr.strip()[-500:]}")
+    child = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {"process": metric(elapsed, "s"),
+            "import": metric(child["import"], "s"),
+            "run_interface": metric(child["startup"], "s")}
+
+
+@benchmark("chromedriver")
+def chromedriver(count=2000):
+    """get_chromedriver и выдача из пула с поддельным драйвером вместо Chrome"""
+    from services import webdriver
+    from stubs import fake_webdriver
+    # Общий пул с поддельным драйвером ставится только на время замера,
+    # конфиг при этом не меняется
+    pool = webdriver.DriverPool(size=2, session_factory=fake_webdriver.create_session)
+    with webdriver._pool_lock:
+        previous, webdriver._pool = webdriver._pool, pool
+    try:
+        time_s = time.perf_counter()
+        if webdriver.get_chromedriver() is None:
+            raise RuntimeError("Поддельный драйвер не запустился")
+        first = time.perf_counter() - time_s
+        cached = per_call(webdriver.get_chromedriver, count)
+        webdriver._return_outside_leases()
+    finally:
+        with webdriver._pool_lock:
+            webdriver._pool = previous
+        pool.close()
+    pool = webdriver.DriverPool(size=2, session_factory=fake_webdriver.create_session)
+    try:
+        pool.prewarm()
+
+        def lease():
+            with pool.lease():
+                pass
+
+        leased = per_call(lease, count)
+    finally:
+        pool.close()
+    return {"first_acquire": metric(first, "s"),
+            "cached_acquire": metric(cached, "s"),
+            "pool_lease": metric(leased, "s")}
@@ -0,0 +1,48 @@
+"""Холодный запуск окна: run_interface() до первого прохода цикла событий.
+
+Запускается отдельным процессом из замера cold_start и печатает JSON с
+временем импорта и временем запуска, которое run_interface() пишет в метрики.
+"""
+import json
+import os
+import sys
+import time
+
+time_s = time.perf_counter()
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QTimer  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+
+def _exec_once(app):
+    # Окно закрывается штатно (closeEvent), как только цикл событий запустился
+    def close():
+        for widget in app.topLevelWidgets():
+            widget.close()
+        app.quit()
+    QTimer.singleShot(0, close)
+    return _exec()
+
+
+_exec = QApplication.exec_
+QApplication.exec_ = _exec_once
+
+
+def main():
+    import_s = time.perf_counter()
+    from services.lazy import import_module
+    ui = import_module("interfaces.ui")
+    from services.metrics import STARTUP
+    imported = time.perf_counter() - import_s
+    try:
+        ui.run_interface()
+    except SystemExit:
+        pass
+    print(json.dumps({"import": imported, "startup": STARTUP.value(),
+                      "total": time.perf_counter() - time_s}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+
+# Замеры по имени: функция возвращает словарь показателей одного прогона
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Регистрирует функцию замера под именем name"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def metric(value, unit, better="lower"):
+    """Показатель замера; better — какое направление считается улучшением"""
+    return {"value": value, "unit": unit, "better": better}
+
+
+def per_call(func, count):
+    """Среднее время одного вызова func за count вызовов, секунд"""
+    time_s = time.perf_counter()
+    for _ in range(count):
+        func()
+    return (time.perf_counter() - time_s) / count
+
+
+def run_benchmarks(names=None, repeat=3, progress=None):
+    """Запускает замеры repeat раз; значение показателя — медиана прогонов"""
+    results = {}
+    for name in names or list(BENCHMARKS):
+        func = BENCHMARKS[name]
+        runs = []
+        for _ in range(repeat):
+            runs.append(func())
+        for key, first in runs[0].items():
+            values = [run[key]["value"] for run in runs]
+            results[f"{name}.{key}"] = dict(
+                first, value=statistics.median(values),
+                min=min(values), max=max(values), runs=len(values))
+        if progress is not None:
+            progress(name)
+    return results
+
+
+def environment():
+    return {"python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "qpa": os.environ.get("QT_QPA_PLATFORM", "")}
+
+
+def save_baseline(path, results):
+    """Сохраняет замеры как эталон (атомарно, через временный файл)"""
+    data = {"created": datetime.now().isoformat(timespec="seconds"),
+            "environment": environment(), "results": results}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def change_of(current, baseline):
+    """Относительное ухудшение: 0.25 — на 25% хуже эталона, отрицательное — лучше"""
+    value, reference = current["value"], baseline["value"]
+    if not reference or not value:
+        return 0.0
+    if current.get("better") == "higher":
+        return reference / value - 1
+    return value / reference - 1
+
+
+def compare(results, baseline, threshold=0.2):
+    """Строки сравнения с эталоном и список показателей, ухудшившихся больше threshold"""
+    rows = []
+    regressions = []
+    reference = baseline.get("results", {})
+    for key, current in results.items():
+        previous = reference.get(key)
+        if previous is None:
+            rows.append((key, current, None, None, "новый"))
+            continue
+        change = change_of(current, previous)
+        if change > threshold:
+            status = "РЕГРЕСС"
+            regressions.append(key)
+        else:
+            status = "ок" if change >= -threshold else "лучше"
+        rows.append((key, current, previous, change, status))
+    return rows, regressions
+
+
+def format_value(result):
+    value, unit = result["value"], result["unit"]
+    if unit == "s":
+        if value < 1e-3:
+            return f"{value * 1e6:.1f} мкс"
+        if value < 1:
+            return f"{value * 1e3:.2f} мс"
+        return f"{value:.2f} с"
+    return f"{value:,.0f} {unit}".replace(",", " ")
+
+
+def print_table(rows, stream=None):
+    stream = stream or sys.stdout
+    width = max((len(row[0]) for row in rows), default=10)
+    for key, current, previous, change, status in rows:
+        line = f"{key:<{width}}  {format_value(current):>14}"
+        if previous is not None:
+            line += f"  эталон {format_value(previous):>14}  {change:+7.1%}  {status}"
+        elif status:
+            line += f"  {status}"
+        stream.write(line + "\n")
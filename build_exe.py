@@ -30,8 +30,30 @@ args = [
     "--distpath=./AutoCheck_steble",
     "--noupx",
     "--hidden-import=interfaces.ui",
+    "--hidden-import=services.aioloop",
+    "--hidden-import=services.cache",
+    "--hidden-import=services.cancel",
+    "--hidden-import=services.config",
+    "--hidden-import=services.credentials",
+    "--hidden-import=services.db",
+    "--hidden-import=services.elastic",
+    "--hidden-import=services.executor",
     "--hidden-import=services.func_and_pass",
+    "--hidden-import=services.history",
+    "--hidden-import=services.http_checks",
+    "--hidden-import=services.isolation",
+    "--hidden-import=services.kafka_snapshot",
+    "--hidden-import=services.lazy",
+    "--hidden-import=services.load",
+    "--hidden-import=services.logchannel",
     "--hidden-import=services.logger",
+    "--hidden-import=services.logtail",
+    "--hidden-import=services.metrics",
+    "--hidden-import=services.paths",
+    "--hidden-import=services.registry",
+    "--hidden-import=services.runner",
+    "--hidden-import=services.scheduler",
+    "--hidden-import=services.schedules",
     "--hidden-import=services.webdriver",
     "--hidden-import=systems.a.a",
     "--hidden-import=systems.g.g",
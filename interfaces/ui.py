@@ -1,39 +1,38 @@
-import json
 import logging
 import os
-import random
 import sys
 import threading
 import time
-from datetime import datetime, time as dt_time
-import keyring
-import psutil
-import systems.a.a as a
-import systems.g.g as g
-import systems.k.k as k
-import systems.m.m as m
-import systems.mi.mi as mi
-import systems.p.p as p
-from PyQt5.QtCore import Qt, QTimer, QThread, pyqtSignal
+from array import array
+from datetime import datetime
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer, pyqtSignal
 from PyQt5.QtGui import QColor, QFont, QBrush, QFontMetrics, QPalette, QIcon
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLabel, QMessageBox, QSizePolicy, QFrame, QListWidget,
-    QListWidgetItem, QMenu, QAction, QDialog, QLineEdit, QDialogButtonBox
+    QPushButton, QLabel, QMessageBox, QSizePolicy, QFrame, QListView,
+    QAbstractItemView, QMenu, QAction, QDialog, QLineEdit, QDialogButtonBox,
+    QComboBox, QTableWidget, QTableWidgetItem, QHeaderView
 )
-from services.func_and_pass import login, resource_path
-from services.webdriver import close_driver
+from services.aioloop import shutdown_loop
+from services.cache import format_age
+from services.config import load_config
+from services.credentials import get_secrets
+from services.executor import MESSAGE_COLORS, CheckListener, get_executor, shutdown_executor
+from services.history import WEEKDAYS, get_history
+from services.isolation import shutdown_process_pool
+from services.lazy import import_module, import_times
+from services.logchannel import LogChannel
+from services.metrics import STARTUP, close_exporters, start_exporters
+from services.registry import get_registry
+from services.scheduler import shutdown_scheduler
 logger_ui = logging.getLogger(__name__)
 # Читаем конфиг
-with open(resource_path('config/ui_config.json'), 'r', encoding='utf-8-sig') as f:
-    config = json.load(f)
+config = load_config()
 # Извлекаем нужные словари
 COLORS = config.get("colors", {})
 SYSTEMS_CONFIG = config.get("systems_config", {})
 STATUS_ICONS = config.get("status_icons", {})
 styles = config.get("styles", {})
-# Глобальная блокировка для работы с системами
-systems_lock = threading.Lock()
 # Функция для применения стилей с подстановкой цветов
 
 
@@ -86,6 +85,7 @@ def set_environment_variable(name, value):
 
 def kill_auto_check_chrome_processes():
     """Завершает процессы Chrome, связанные с авто-проверками"""
+    psutil = import_module("psutil")
     logger_ui.info('Поиск незавершенных процессов Chrome и Chromedriver')
     for proc in psutil.process_iter(['pid', 'name', 'exe']):
         try:
@@ -107,406 +107,80 @@ def kill_auto_check_chrome_processes():
 # Классы UI
 
 
-class PLogAdapter:
-    """Адаптер для логирования P"""
-
-    def __init__(self, tab):
-        self.tab = tab
-
-    def log(self, message, message_type="info"):
-        color_map = {
-            "success": "green",
-            "error": "red",
-            "warning": "orange",
-            "info": "black"
-        }
-        color = color_map.get(message_type, "black")
-        self.tab.log_signal.emit(f"{message}", color)
-
-
-class WorkerThread(QThread):
-    log_signal = pyqtSignal(str, str, str)  # system, message, color
-    finished = pyqtSignal()
-    time_update = pyqtSignal(str)  # Для обновления времени до 09:15
-    check_started = pyqtSignal(str, str)  # system, check_name
-    check_finished = pyqtSignal(str, str, bool)  # system, check_name, success
-
-    def __init__(self, system, checks, include_powerbi=False):
-        super().__init__()
-        self.system = system
-        self.checks = checks
-        self.include_powerbi = include_powerbi
-        self.is_running = True
-
-    def run(self):
-        try:
-            for check in self.checks:
-                if not self.is_running:
-                    break
-                if "PowerBi" in check and not self.include_powerbi:
-                    continue
-                # Сигнал о начале проверки
-                self.check_started.emit(self.system, check)
-                self.log_signal.emit(
-                    self.system, f"Начало проверки: {check}", "black")
-                # Эмуляция выполнения проверки
-                time.sleep(1)  # Имитация работы
-                # Специальная обработка для PowerBi
-                if "PowerBi" in check:
-                    self.log_signal.emit(
-                        self.system, "Ожидание 09:15 для запуска PowerBi...", "black")
-                    self.wait_for_time(dt_time(9, 15))
-                    self.log_signal.emit(
-                        self.system, "Время 09:15 достигнуто! Запуск PowerBi...", "black")
-                    time.sleep(2)
-                # Генерация результата (случайно успешный или с ошибкой)
-                success = random.choice(
-                    [True, True, True, False])  # 75% успеха
-                status = "Успешно" if success else "ОШИБКА"
-                color = "red" if not success else "green"
-                # Сигнал о завершении проверки
-                self.check_finished.emit(self.system, check, success)
-                self.log_signal.emit(
-                    self.system, f"Завершено: {check} — {status}", color)
-        except Exception as e:
-            self.log_signal.emit(self.system, f"[ОШИБКА] {str(e)}", "red")
-        finally:
-            self.finished.emit()
-
-    def wait_for_time(self, target_time):
-        # Однократно пишем в лог о начале ожидания
-        self.log_signal.emit(
-            self.system, "Ожидание 09:15 для запуска PowerBi...", "black")
-        while self.is_running:
-            current_time = datetime.now().time()
-            if current_time >= target_time:
-                return
-            # Рассчитываем оставшееся время
-            now = datetime.now()
-            target_datetime = datetime(
-                now.year, now.month, now.day, target_time.hour, target_time.minute)
-            if now > target_datetime:
-                target_datetime = target_datetime.replace(day=now.day + 1)
-            delta = target_datetime - now
-            hours, remainder = divmod(delta.seconds, 3600)
-            minutes, seconds = divmod(remainder, 60)
-            time_str = f"{hours:02d}:{minutes:02d}"
-            # Обновляем только счетчик, не пишем в лог
-            self.time_update.emit(time_str)
-            # Увеличиваем интервал проверки до 10 секунд
-            time.sleep(10)
-
-    def stop(self):
-        self.is_running = False
-        self.quit()
-        self.wait()
-
-
-class AWorker(QThread):
-    """Специальный воркер для проверок А"""
-    finished = pyqtSignal()
-    log_signal = pyqtSignal(str, str)  # message, color
-    check_finished = pyqtSignal(str, bool)  # check_name, success
-    check_started = pyqtSignal(str)  # check_name
-
-    def __init__(self, tab, functions):
-        super().__init__()
+# Канал событий проверок: потоки пула пишут в него, GUI забирает пачками по таймеру
+LOG_CHANNEL = LogChannel()
+
+
+def dispatch_log_events(channel=LOG_CHANNEL, limit=None):
+    """Разбирает накопленные события и передаёт их вкладкам пачками"""
+    pending = {}
+    for tab, kind, payload in channel.drain(limit):
+        if kind == "log":
+            pending.setdefault(tab, []).append(payload)
+            continue
+        # Перед сменой статуса и завершением выводим уже накопленные сообщения
+        if tab in pending:
+            tab.log_output.add_many(pending.pop(tab))
+        if kind == "status":
+            tab.update_check_status_handler(*payload)
+        elif kind == "scheduled":
+            tab.on_check_scheduled(*payload)
+        elif kind == "scheduled_run":
+            tab.run_scheduled(*payload)
+        elif kind == "cached":
+            tab.on_check_cached(*payload)
+        elif kind == "finished":
+            tab.on_task_finished(*payload)
+    for tab, records in pending.items():
+        tab.log_output.add_many(records)
+
+
+class CheckTask(CheckListener):
+    """Задача вкладки в общем пуле проверок: события идут во вкладку через LOG_CHANNEL"""
+
+    def __init__(self, tab, functions, full_run=False, channel=LOG_CHANNEL,
+                 force_refresh=False):
         self.tab = tab
+        self.system = tab.system_name
         self.functions = functions  # Список кортежей (check_name, func)
-        self.is_running = True
-        self.log_adapter = PLogAdapter(tab)
-
-    def run(self):
-        try:
-            with systems_lock:
-                # Инициализируем логирование для A
-                a.init_logging(self.log_adapter.log)
-                for check_name, func in self.functions:
-                    if not self.is_running:
-                        break
-                    self.check_started.emit(check_name)
-                    # Логируем начало проверки
-                    self.log_signal.emit(
-                        f"Начало проверки: {check_name}", "black")
-                    # Выполняем проверку и гарантируем булево возвращаемое значение
-                    try:
-                        result = func()
-                        success = bool(result) if result is not None else False
-                    except Exception as e:
-                        self.log_signal.emit(
-                            f"Ошибка при выполнении {check_name}: {str(e)}", "red")
-                        success = False
-                    # Логируем результат
-                    status = "Успешно" if success else "ОШИБКА"
-                    color = "green" if success else "red"
-                    self.log_signal.emit(
-                        f"Завершено: {check_name} — {status}", color)
-                    # Отправляем сигнал о завершении
-                    self.check_finished.emit(check_name, success)
-        except Exception as e:
-            self.log_signal.emit(f"[ОШИБКА] {str(e)}", "red")
-        finally:
-            self.finished.emit()
-
-    def stop(self):
-        self.is_running = False
-        self.quit()
-        self.wait()
-
+        self.full_run = full_run
+        self.force_refresh = force_refresh
+        self.channel = channel
+        self.job = None
 
-class PWorker(QThread):
-    """Специальный воркер для проверок П"""
-    finished = pyqtSignal()
-    log_signal = pyqtSignal(str, str)  # message, color
-    check_finished = pyqtSignal(str, bool)  # check_name, success
-    check_started = pyqtSignal(str)  # check_name
+    @property
+    def check_names(self):
+        return [check_name for check_name, _ in self.functions]
 
-    def __init__(self, tab, functions):
-        super().__init__()
-        self.tab = tab
-        self.functions = functions  # Список кортежей (check_name, func)
-        self.is_running = True
-        self.log_adapter = PLogAdapter(tab)
-
-    def run(self):
-        try:
-            with systems_lock:
-                # Инициализируем логирование для P
-                p.init_logging(self.log_adapter.log)
-                for check_name, func in self.functions:
-                    if not self.is_running:
-                        break
-                    self.check_started.emit(check_name)
-                    # Логируем начало проверки
-                    self.log_signal.emit(
-                        f"Начало проверки: {check_name}", "black")
-                    # Для проверки PowerBi дополнительно логируем время ожидания
-                    if check_name == "Проверка PowerBi":
-                        now = datetime.now()
-                        target_time = dt_time(9, 15)
-                        target_datetime = datetime(
-                            now.year, now.month, now.day, target_time.hour, target_time.minute)
-                        if now > target_datetime:
-                            target_datetime = target_datetime.replace(
-                                day=now.day + 1)
-                        delta = target_datetime - now
-                        total_minutes = delta.seconds // 60
-                        self.log_signal.emit(
-                            f"Ожидание запуска PowerBi: до 09:15 осталось {total_minutes} минут", "black")
-                    # Выполняем проверку
-                    success = func()
-                    # Логируем результат
-                    status = "Успешно" if success else "ОШИБКА"
-                    color = "green" if success else "red"
-                    self.log_signal.emit(
-                        f"Завершено: {check_name} — {status}", color)
-                    # Отправляем сигнал о завершении
-                    self.check_finished.emit(check_name, success)
-        except Exception as e:
-            self.log_signal.emit(f"[ОШИБКА] {str(e)}", "red")
-        finally:
-            self.finished.emit()
+    def start(self):
+        self.job = get_executor().submit(
+            self.system, self.functions, self, force_refresh=self.force_refresh)
 
     def stop(self):
-        self.is_running = False
-        self.quit()
-        self.wait()
+        """Просит задачу остановиться, не дожидаясь завершения текущей проверки"""
+        if self.job is not None:
+            self.job.stop()
 
+    # Методы получателя событий вызываются из потоков пула
+    def on_log(self, message, message_type="info"):
+        self.channel.put(
+            self.tab, "log", message, MESSAGE_COLORS.get(message_type, "black"))
 
-class MiWorker(QThread):
-    """Специальный воркер для проверок МИ"""
-    finished = pyqtSignal()
-    log_signal = pyqtSignal(str, str)  # message, color
-    check_finished = pyqtSignal(str, bool)  # check_name, success
-    check_started = pyqtSignal(str)  # check_name
+    def on_check_started(self, check_name):
+        self.channel.put(self.tab, "status", check_name, "running")
 
-    def __init__(self, tab, functions):
-        super().__init__()
-        self.tab = tab
-        self.functions = functions  # Список кортежей (check_name, func)
-        self.is_running = True
-        self.log_adapter = PLogAdapter(tab)
+    def on_check_finished(self, check_name, success):
+        self.channel.put(
+            self.tab, "status", check_name, "success" if success else "error")
 
-    def run(self):
-        try:
-            with systems_lock:  # Используем лок для М, если нужен
-                # Инициализируем логирование для М
-                mi.init_logging(self.log_adapter.log)
-                for check_name, func in self.functions:
-                    if not self.is_running:
-                        break
-                    self.check_started.emit(check_name)
-                    # Логируем начало проверки
-                    self.log_signal.emit(
-                        f"Начало проверки: {check_name}", "black")
-                    # Выполняем проверку и гарантируем булево возвращаемое значение
-                    try:
-                        result = func()
-                        success = bool(result) if result is not None else False
-                    except Exception as e:
-                        self.log_signal.emit(
-                            f"Ошибка при выполнении {check_name}: {str(e)}", "red")
-                        success = False
-                    # Логируем результат
-                    status = "Успешно" if success else "ОШИБКА"
-                    color = "green" if success else "red"
-                    self.log_signal.emit(
-                        f"Завершено: {check_name} — {status}", color)
-                    # Отправляем сигнал о завершении
-                    self.check_finished.emit(check_name, success)
-        except Exception as e:
-            self.log_signal.emit(f"[ОШИБКА] {str(e)}", "red")
-        finally:
-            self.finished.emit()
+    def on_check_scheduled(self, check_name, deadline):
+        self.channel.put(self.tab, "scheduled", check_name, deadline)
 
-    def stop(self):
-        self.is_running = False
-        self.quit()
-        self.wait()
-
-
-class MWorker(QThread):
-    """Специальный воркер для проверок М"""
-    finished = pyqtSignal()
-    log_signal = pyqtSignal(str, str)  # message, color
-    check_finished = pyqtSignal(str, bool)  # check_name, success
-    check_started = pyqtSignal(str)  # check_name
-
-    def __init__(self, tab, functions):
-        super().__init__()
-        self.tab = tab
-        self.functions = functions
-        self.is_running = True
-        self.log_adapter = PLogAdapter(tab)
-
-    def run(self):
-        try:
-            with systems_lock:
-                # Инициализируем логирование для М
-                m.init_logging(self.log_adapter.log)
-                for check_name, func in self.functions:
-                    if not self.is_running:
-                        break
-                    self.check_started.emit(check_name)
-                    self.log_signal.emit(
-                        f"Начало проверки: {check_name}", "black")
-                    try:
-                        result = func()
-                        success = bool(result) if result is not None else False
-                    except Exception as e:
-                        self.log_signal.emit(
-                            f"Ошибка при выполнении {check_name}: {str(e)}", "red")
-                        success = False
-                    status = "Успешно" if success else "ОШИБКА"
-                    color = "green" if success else "red"
-                    self.log_signal.emit(
-                        f"Завершено: {check_name} — {status}", color)
-                    self.check_finished.emit(check_name, success)
-        except Exception as e:
-            self.log_signal.emit(f"[ОШИБКА] {str(e)}", "red")
-        finally:
-            self.finished.emit()
+    def on_check_cached(self, check_name, age):
+        self.channel.put(self.tab, "cached", check_name, age)
 
-    def stop(self):
-        self.is_running = False
-        self.quit()
-        self.wait()
-
-
-class GWorker(QThread):
-    """Специальный воркер для проверок G"""
-    finished = pyqtSignal()
-    log_signal = pyqtSignal(str, str)
-    check_finished = pyqtSignal(str, bool)
-    check_started = pyqtSignal(str)
-
-    def __init__(self, tab, functions):
-        super().__init__()
-        self.tab = tab
-        self.functions = functions
-        self.is_running = True
-        self.log_adapter = PLogAdapter(tab)
-
-    def run(self):
-        try:
-            with systems_lock:
-                # Инициализируем логирование для G
-                g.init_logging(self.log_adapter.log)
-                for check_name, func in self.functions:
-                    if not self.is_running:
-                        break
-                    self.check_started.emit(check_name)
-                    self.log_signal.emit(
-                        f"Начало проверки: {check_name}", "black")
-                    try:
-                        result = func()
-                        success = bool(result) if result is not None else False
-                    except Exception as e:
-                        self.log_signal.emit(
-                            f"Ошибка при выполнении {check_name}: {str(e)}", "red")
-                        success = False
-                    status = "Успешно" if success else "ОШИБКА"
-                    color = "green" if success else "red"
-                    self.log_signal.emit(
-                        f"Завершено: {check_name} — {status}", color)
-                    self.check_finished.emit(check_name, success)
-        except Exception as e:
-            self.log_signal.emit(f"[ОШИБКА] {str(e)}", "red")
-        finally:
-            self.finished.emit()
-
-    def stop(self):
-        self.is_running = False
-        self.quit()
-        self.wait()
-
-
-class KWorker(QThread):
-    """Специальный воркер для проверок K"""
-    finished = pyqtSignal()
-    log_signal = pyqtSignal(str, str)
-    check_finished = pyqtSignal(str, bool)
-    check_started = pyqtSignal(str)
-
-    def __init__(self, tab, functions):
-        super().__init__()
-        self.tab = tab
-        self.functions = functions
-        self.is_running = True
-        self.log_adapter = PLogAdapter(tab)
-
-    def run(self):
-        try:
-            with systems_lock:
-                # Инициализируем логирование для K
-                k.init_logging(self.log_adapter.log)
-                for check_name, func in self.functions:
-                    if not self.is_running:
-                        break
-                    self.check_started.emit(check_name)
-                    self.log_signal.emit(
-                        f"Начало проверки: {check_name}", "black")
-                    try:
-                        result = func()
-                        success = bool(result) if result is not None else False
-                    except Exception as e:
-                        self.log_signal.emit(
-                            f"Ошибка при выполнении {check_name}: {str(e)}", "red")
-                        success = False
-                    status = "Успешно" if success else "ОШИБКА"
-                    color = "green" if success else "red"
-                    self.log_signal.emit(
-                        f"Завершено: {check_name} — {status}", color)
-                    self.check_finished.emit(check_name, success)
-        except Exception as e:
-            self.log_signal.emit(f"[ОШИБКА] {str(e)}", "red")
-        finally:
-            self.finished.emit()
-
-        def stop(self):
-            self.is_running = False
-            self.quit()
-            self.wait()
+    def on_job_finished(self, results):
+        self.channel.put(self.tab, "finished", self)
 
 
 class CheckItemWidget(QFrame):
@@ -532,12 +206,17 @@ class CheckItemWidget(QFrame):
         self.name_label.setFont(font)  # Применяем шрифт
         self.name_label.setSizePolicy(
             QSizePolicy.Expanding, QSizePolicy.Preferred)
+        # Возраст результата, взятого из кэша
+        self.age_label = QLabel("")
+        self.age_label.setFont(QFont("Segoe UI", 9))
+        self.age_label.setStyleSheet(f"color: {COLORS['disabled']};")
         # Кнопка проверки
         self.check_button = QPushButton("Проверить")
         self.check_button.setFixedWidth(80)
         self.check_button.setFont(QFont("Segoe UI", 11))
         layout.addWidget(self.status_icon)
         layout.addWidget(self.name_label)
+        layout.addWidget(self.age_label)
         layout.addWidget(self.check_button)
         self.setLayout(layout)
         self.setFixedHeight(45)
@@ -546,11 +225,12 @@ class CheckItemWidget(QFrame):
         apply_style(self, "CheckItemWidget", COLORS)
 
     def set_status(self, status):
-        """Устанавливает статус проверки: default, running, success, error"""
+        """Устанавливает статус проверки: default, scheduled, running, success, error"""
+        self.age_label.setText("")
         self.status_icon.setText(STATUS_ICONS.get(
             status, STATUS_ICONS["default"]))
         # Изменяем цвет смайлика в зависимости от статуса
-        if status == "running":
+        if status in ("running", "scheduled"):
             self.status_icon.setStyleSheet("color: #ff9800;")  # Оранжевый
         elif status == "success":
             self.status_icon.setStyleSheet("color: #4caf50;")  # Зеленый
@@ -559,30 +239,205 @@ class CheckItemWidget(QFrame):
         else:
             self.status_icon.setStyleSheet("color: #b0bec5;")  # Серый
 
+    def set_cached(self, age):
+        """Показывает, что результат взят из кэша, и его возраст"""
+        self.age_label.setText(f"из кэша, {format_age(age)} назад")
+        self.age_label.setToolTip(
+            f"Проверка прошла успешно {datetime.fromtimestamp(time.time() - age):%H:%M:%S}. "
+            "Нажмите «Проверить», чтобы выполнить её заново")
+
+
+# Уровни записей лога: индекс хранится в буфере одним байтом
+LOG_LEVELS = ("black", "green", "red", "orange")
+LOG_LEVEL_INDEX = {color: index for index, color in enumerate(LOG_LEVELS)}
+LOG_LEVEL_COLORS = ("text", "success", "error", "warning")
+
+
+class LogRingBuffer:
+    """Кольцевой буфер записей лога фиксированной ёмкости"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        # Записи храним в параллельных массивах: время, уровень, текст
+        self._times = array('d', bytes(8 * capacity))
+        self._levels = bytearray(capacity)
+        self._texts = [None] * capacity
+        self._start = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def _index(self, row):
+        return (self._start + row) % self.capacity
+
+    def text(self, row):
+        return self._texts[self._index(row)]
+
+    def level(self, row):
+        return self._levels[self._index(row)]
+
+    def timestamp(self, row):
+        return self._times[self._index(row)]
+
+    def texts(self):
+        return [self.text(row) for row in range(self._count)]
+
+    def drop_oldest(self, count):
+        """Удаляет count самых старых записей"""
+        count = min(count, self._count)
+        for row in range(count):
+            self._texts[self._index(row)] = None
+        self._start = self._index(count)
+        self._count -= count
+
+    def extend(self, records):
+        """Добавляет записи (время, уровень, текст); место должно быть освобождено заранее"""
+        for timestamp, level, text in records:
+            index = self._index(self._count)
+            self._times[index] = timestamp
+            self._levels[index] = level
+            self._texts[index] = text
+            self._count += 1
+
+    def clear(self):
+        self._texts = [None] * self.capacity
+        self._start = 0
+        self._count = 0
+
+
+class LogModel(QAbstractListModel):
+    """Модель лога поверх кольцевого буфера: старые записи вытесняются"""
+
+    def __init__(self, capacity, parent=None):
+        super().__init__(parent)
+        self.buffer = LogRingBuffer(capacity)
+        self.highlight_row = None
+        self._foregrounds = [QBrush(QColor(COLORS[key])) for key in LOG_LEVEL_COLORS]
+        self._highlight_brush = QBrush(QColor(COLORS['log_selected']))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.buffer)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            return self.buffer.text(row)
+        if role == Qt.ForegroundRole:
+            return self._foregrounds[self.buffer.level(row)]
+        if role == Qt.BackgroundRole and row == self.highlight_row:
+            return self._highlight_brush
+        return None
+
+    def append_records(self, records):
+        """Добавляет пачку записей одним вставлением строк"""
+        capacity = self.buffer.capacity
+        if len(records) > capacity:
+            records = records[-capacity:]
+        overflow = len(self.buffer) + len(records) - capacity
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            self.buffer.drop_oldest(overflow)
+            # Подсвеченная запись сдвигается вместе с буфером, вытесненная — гаснет
+            if self.highlight_row is not None:
+                self.highlight_row -= overflow
+                if self.highlight_row < 0:
+                    self.highlight_row = None
+            self.endRemoveRows()
+        first = len(self.buffer)
+        self.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+        self.buffer.extend(records)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.buffer.clear()
+        self.highlight_row = None
+        self.endResetModel()
+
+    def set_highlight(self, row):
+        previous, self.highlight_row = self.highlight_row, row
+        for changed in (previous, row):
+            if changed is not None and changed < len(self.buffer):
+                index = self.index(changed)
+                self.dataChanged.emit(index, index, [Qt.BackgroundRole])
+
+
+class LogListWidget(QListView):
+    """Лог выполнения: записи копятся и добавляются в модель пачкой за кадр"""
 
-class LogListWidget(QListWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
+        settings = config.get("log_view", {})
+        self.log_model = LogModel(settings.get("capacity", 5000), self)
+        self.setModel(self.log_model)
         apply_style(self, "LogListWidget", COLORS)
         self.setWordWrap(True)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        # Раскладка строк порциями, чтобы большой лог не блокировал интерфейс
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(200)
         # Настройка шрифта
         font = QFont("Consolas", 11)
         self.setFont(font)
+        self._pending = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(settings.get("flush_interval_ms", 30))
+        self._flush_timer.timeout.connect(self.flush)
+
+    def add(self, message, color="black"):
+        """Ставит запись в очередь; модель обновится при ближайшей перерисовке"""
+        self._pending.append(
+            (time.time(), LOG_LEVEL_INDEX.get(color, 0), message))
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def add_many(self, records):
+        """Сразу добавляет пачку записей (сообщение, цвет), уже собранную каналом"""
+        now = time.time()
+        self._pending.extend(
+            (now, LOG_LEVEL_INDEX.get(color, 0), message) for message, color in records)
+        self._flush_timer.stop()
+        self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        records, self._pending = self._pending, []
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        self.log_model.append_records(records)
+        # Одна прокрутка на всю пачку, и только если пользователь не листает лог
+        if at_bottom:
+            self.scrollToBottom()
+
+    def texts(self):
+        return self.log_model.buffer.texts() + [text for _, _, text in self._pending]
+
+    def count(self):
+        return len(self.log_model.buffer) + len(self._pending)
+
+    def clear(self):
+        self._pending = []
+        self._flush_timer.stop()
+        self.log_model.clear()
 
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
-            item = self.itemAt(event.pos())
-            if item:
+            index = self.indexAt(event.pos())
+            if index.isValid():
                 clipboard = QApplication.clipboard()
-                clipboard.setText(item.text())
+                clipboard.setText(self.log_model.buffer.text(index.row()))
                 # Анимация подсветки
-                self.highlight_item(item)
+                self.highlight_row(index.row())
         super().mousePressEvent(event)
 
-    def highlight_item(self, item):
-        original_brush = item.background()
-        item.setBackground(QBrush(QColor(COLORS['log_selected'])))
-        QTimer.singleShot(300, lambda: item.setBackground(original_brush))
+    def highlight_row(self, row):
+        self.log_model.set_highlight(row)
+        QTimer.singleShot(300, lambda: self.log_model.set_highlight(None))
 
 
 class SystemTab(QWidget):
@@ -593,62 +448,31 @@ class SystemTab(QWidget):
         super().__init__()
         self.system_name = system_name
         self.checks = checks
-        self.worker = None
-        self.p_worker = None
-        self.a_worker = None
-        self.emulation_worker = None
+        self.registry = get_registry()
+        self.active_tasks = set()  # Задачи вкладки, выполняющиеся в общем пуле
+        self.running_checks = set()  # Проверки, поставленные в очередь или выполняющиеся
         self.check_widgets = {}
         self.powerbi_timer = None  # Таймер для обновления счетчика
-        self.is_checking = False  # Флаг для отслеживания состояния проверки
+        self.powerbi_deadline = None  # Время запуска отложенной проверки
+        self.is_checking = False  # Флаг полной проверки системы
         self.init_ui()
-        # Для системы А создаем маппинг функций
-        if system_name == "А":
-            self.a_functions = {
-                "Проверка мониторинга": a.monitoring,
-                "Проверка пользователей online": a.usersOnline,
-                "Проверка адаптера А": a.adapterCheck,
-                "Проверка логов адаптера А": a.check_errors_in_log_adapter
-            }
-        # Для системы М
-        if system_name == "М":
-            self.m_functions = {
-                "Проверка API шлюза": m.test,
-                "Проверка шифрования": m.test,
-                "Проверка очередей": m.test
-            }
-        # Для системы МИ создаем маппинг функций
-        if system_name == "МИ":
-            self.mi_functions = {
-                "Приложение АС": mi.test,
-                "Мониторинг служб": m.test,
-                "Проверка доступности сайта": mi.test,
-                "Проверка доступности служб": mi.test
-            }
-        # Для системы П создаем маппинг функций
-        if system_name == "П":
-            self.p_functions = {
-                "Проверка доступности ссылок": p.test,
-                "Проверка адаптера": p.test,
-                "Проверка логов Elastic": p.test,
-                "Проверка PowerBi": p.test
-            }
-        # Для системы G
-        if system_name == "G":
-            self.g_functions = {
-                "Проверка сервисов системы": g.test,
-                "Проверка нагрузки на сервера": g.test
-            }
-        # Для системы K
-        if system_name == "K":
-            self.k_functions = {
-                "Проверка топиков": k.test,
-                "Проверка потребителей": k.test,
-                "Проверка задержек": k.test
-            }
         # Подключаем сигнал обновления статуса
         self.update_check_status.connect(self.update_check_status_handler)
         self.log_signal.connect(self.add_log)
 
+    def preload_modules(self):
+        """Импортирует модули проверок вкладки в фоне, не блокируя интерфейс"""
+        module_names = {
+            self.registry.spec(self.system_name, check).module_name
+            for check in self.checks if self.registry.has(self.system_name, check)
+        }
+        module_names = [name for name in module_names if name not in sys.modules]
+        if not module_names:
+            return
+        threading.Thread(
+            target=lambda: [import_module(name) for name in module_names],
+            daemon=True).start()
+
     def init_ui(self):
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(15, 15, 15, 15)
@@ -672,6 +496,9 @@ class SystemTab(QWidget):
         self.btn_check_all = QPushButton("Проверить всё")
         self.btn_check_all.setFont(QFont("Segoe UI", 10))
         self.btn_check_all.setMinimumHeight(40)
+        self.btn_check_all.setToolTip(
+            "Недавно пройденные проверки берутся из кэша.\n"
+            "Shift+клик — выполнить все проверки заново")
         if self.system_name == "П":
             self.btn_check_powerbi = QPushButton("Проверить всё + PowerBi")
             self.btn_check_powerbi.setFont(QFont("Segoe UI", 10))
@@ -739,56 +566,53 @@ class SystemTab(QWidget):
         except Exception as e:
             print(f"Ошибка в update_check_status_handler: {e}")
 
+    def on_check_scheduled(self, check_name, deadline):
+        """Проверка отложена планировщиком: показываем обратный отсчёт"""
+        self.update_check_status_handler(check_name, "scheduled")
+        self.start_powerbi_timer(deadline)
+
+    def on_check_cached(self, check_name, age):
+        """Обработчик результата, взятого из кэша"""
+        if check_name in self.check_widgets:
+            self.check_widgets[check_name].set_cached(age)
+
     def add_log(self, message, color="black"):
         """Добавляет запись в лог"""
         try:
-            item = QListWidgetItem(message)
-            if color == "red":
-                item.setForeground(QColor(COLORS['error']))
-            elif color == "green":
-                item.setForeground(QColor(COLORS['success']))
-            elif color == "orange":
-                item.setForeground(QColor(COLORS['warning']))
-            else:
-                item.setForeground(QColor(COLORS['text']))
-            self.log_output.addItem(item)
-            self.log_output.scrollToBottom()
+            self.log_output.add(message, color)
         except Exception as e:
             print(f"Ошибка в add_log: {e}")
 
     def update_powerbi_counter(self):
-        """Обновляет счетчик времени до 09:15"""
+        """Обновляет счетчик времени до запуска отложенной проверки"""
         try:
-            now = datetime.now()
-            target_time = dt_time(9, 15)
-            # Если уже прошло 09:15, показываем 00:00
-            if now.time() >= target_time:
-                self.powerbi_counter.setText("До проверки осталось: 00:00")
+            if self.powerbi_deadline is None:
+                return
+            # Оставшееся время считаем от срока, который назначил планировщик
+            remaining = int((self.powerbi_deadline - datetime.now()).total_seconds())
+            if remaining <= 0:
+                self.powerbi_counter.setText("До проверки осталось: 00:00:00")
                 if self.powerbi_timer:
                     self.powerbi_timer.stop()
                 return
-            # Рассчитываем оставшееся время
-            target_datetime = datetime(
-                now.year, now.month, now.day, target_time.hour, target_time.minute)
-            delta = target_datetime - now
-            # Форматируем время в ЧЧ:ММ
-            hours, remainder = divmod(delta.seconds, 3600)
-            minutes, _ = divmod(remainder, 60)
-            time_str = f"До проверки осталось: {hours:02d}:{minutes:02d}"
+            hours, remainder = divmod(remaining, 3600)
+            minutes, seconds = divmod(remainder, 60)
+            time_str = f"До проверки осталось: {hours:02d}:{minutes:02d}:{seconds:02d}"
             self.powerbi_counter.setText(time_str)
         except Exception as e:
             print(f"Ошибка в update_powerbi_counter: {e}")
 
-    def start_powerbi_timer(self):
+    def start_powerbi_timer(self, deadline):
         """Запускает таймер для обновления счетчика"""
         try:
             # Останавливаем предыдущий таймер, если он был
             if self.powerbi_timer:
                 self.powerbi_timer.stop()
-            # Создаем новый таймер
+            self.powerbi_deadline = deadline
+            # Таймер в потоке интерфейса только перерисовывает надпись
             self.powerbi_timer = QTimer()
             self.powerbi_timer.timeout.connect(self.update_powerbi_counter)
-            self.powerbi_timer.start(60000)  # Обновляем каждую минуту
+            self.powerbi_timer.start(1000)
             # Сразу обновляем счетчик
             self.update_powerbi_counter()
         except Exception as e:
@@ -800,6 +624,7 @@ class SystemTab(QWidget):
             if self.powerbi_timer:
                 self.powerbi_timer.stop()
                 self.powerbi_timer = None
+            self.powerbi_deadline = None
             self.powerbi_counter.setText("")
         except Exception as e:
             print(f"Ошибка в stop_powerbi_timer: {e}")
@@ -807,299 +632,120 @@ class SystemTab(QWidget):
     def run_single_check(self, check_name):
         """Запускает одиночную проверку"""
         try:
-            if self.is_checking:
+            if self.is_checking or check_name in self.running_checks:
                 self.add_log(
                     "Уже выполняется проверка. Дождитесь завершения.", "orange")
                 return
-            self.is_checking = True
-            self.toggle_buttons(False)
-            self.stop_powerbi_timer()
-            # Обработчики для разных систем
-            system_workers = {
-                "А": ("a_functions", "a_worker", AWorker),
-                "М": ("m_functions", "m_worker", MWorker),
-                "МИ": ("mi_functions", "mi_worker", MiWorker),
-                "П": ("p_functions", "p_worker", PWorker),
-                "G": ("g_functions", "g_worker", GWorker),
-                "K": ("k_functions", "k_worker", KWorker)
-            }
-            if self.system_name in system_workers:
-                functions_attr, worker_attr, worker_class = system_workers[self.system_name]
-                functions_dict = getattr(self, functions_attr, {})
-                if check_name in functions_dict:
-                    func = functions_dict[check_name]
-                    worker = worker_class(self, [(check_name, func)])
-                    # Подключаем сигналы
-                    worker.log_signal.connect(
-                        lambda msg, color: self.add_log(msg, color))
-                    worker.check_started.connect(
-                        lambda cn: self.update_check_status.emit(cn, "running")
-                    )
-                    worker.check_finished.connect(
-                        lambda cn, success: self.update_check_status.emit(
-                            cn, "success" if success else "error"
-                        )
-                    )
-                    worker.finished.connect(self.on_single_check_finished)
-                    # Сохраняем worker и запускаем
-                    setattr(self, worker_attr, worker)
-                    worker.start()
-                    return
-            # Для систем без специальных обработчиков используем эмуляцию
-            self.update_check_status.emit(check_name, "running")
-            self.add_log(
-                f"[{datetime.now().strftime('%H:%M:%S')}] Начало проверки: {check_name}", "black")
-            self.emulation_worker = EmulationWorker(check_name)
-            self.emulation_worker.finished.connect(
-                lambda success, cn: self.on_emulation_finished(success, cn)
-            )
-            self.emulation_worker.start()
+            # Одиночную проверку оператор запускает явно, поэтому кэш не используем
+            self.start_task(
+                [(check_name, self.registry.lazy(self.system_name, check_name))],
+                force_refresh=True)
         except Exception as e:
             print(f"Ошибка в run_single_check: {e}")
-            self.is_checking = False
-            self.toggle_buttons(True)
-
-    def on_emulation_finished(self, success, check_name):
-        """Обработчик завершения эмуляции проверки"""
-        try:
-            status = "Успешно" if success else "ОШИБКА"
-            color = "red" if not success else "green"
-            # Обновляем статус
-            self.update_check_status.emit(
-                check_name, "success" if success else "error")
-            self.add_log(
-                f"[{datetime.now().strftime('%H:%M:%S')}] Завершено: {check_name} — {status}", color)
-            self.is_checking = False
-            self.toggle_buttons(True)
-            self.emulation_worker = None
-        except Exception as e:
-            print(f"Ошибка в on_emulation_finished: {e}")
-            self.is_checking = False
             self.toggle_buttons(True)
 
-    def run_all_checks(self, include_powerbi):
-        """Запускает все проверки"""
+    def run_all_checks(self, include_powerbi, checks=None, force_refresh=None,
+                       reason=""):
+        """Запускает все проверки (или перечисленные в checks)"""
         try:
-            if self.is_checking:
+            if self.is_checking or self.active_tasks:
                 self.add_log(
                     "Уже выполняется проверка. Дождитесь завершения.", "orange")
-                return
+                return None
             self.is_checking = True
-            self.toggle_buttons(False)
+            if force_refresh is None:
+                force_refresh = bool(
+                    QApplication.keyboardModifiers() & Qt.ShiftModifier)
             self.stop_powerbi_timer()
             # Сбрасываем все статусы
             for check in self.checks:
                 self.update_check_status.emit(check, "default")
             self.log_output.clear()
-            # Обработчики для разных систем
-            system_configs = {
-                "А": ("a_functions", "a_worker", AWorker),
-                "П": ("p_functions", "p_worker", PWorker),
-                "МИ": ("mi_functions", "mi_worker", MWorker),
-                "М": ("m_functions", "m_worker", MiWorker),
-                "G": ("g_functions", "g_worker", GWorker),
-                "K": ("k_functions", "k_worker", KWorker)
-            }
-            if self.system_name in system_configs:
-                functions_attr, worker_attr, worker_class = system_configs[self.system_name]
-                functions_dict = getattr(self, functions_attr, {})
-                # ОСОБАЯ ОБРАБОТКА ДЛЯ П
-                if self.system_name == "П":
-                    self.add_log(
-                        f"[{datetime.now().strftime('%H:%M:%S')}] Запуск {'полной ' if include_powerbi else ''}проверки системы П...",
-                        "black")
-                    # Запускаем таймер, если включена проверка PowerBi
-                    if include_powerbi:
-                        self.start_powerbi_timer()
-                    # Создаем список функций для проверки
-                    functions = [
-                        ("Проверка доступности ссылок", p.test),
-                        ("Проверка адаптера", p.test),
-                        ("Проверка логов ИСМ (Elastic)", p.test)
-                    ]
-                    # Добавляем PowerBi только если include_powerbi=True
-                    if include_powerbi:
-                        functions.append(
-                            ("Проверка PowerBi", self.wait_and_run_powerbi))
-                    # Создаем воркер
-                    self.p_worker = PWorker(self, functions)
-                    self.p_worker.log_signal.connect(
-                        lambda msg, color: self.add_log(msg, color))
-                    self.p_worker.check_started.connect(
-                        lambda check_name: self.update_check_status.emit(
-                            check_name, "running")
-                    )
-                    self.p_worker.check_finished.connect(
-                        lambda cn, success: self.update_check_status.emit(
-                            cn, "success" if success else "error")
-                    )
-                    self.p_worker.finished.connect(self.on_checks_finished)
-                    self.p_worker.start()
-                else:
-                    # Для других систем используем стандартный подход
-                    self.add_log(
-                        f"[{datetime.now().strftime('%H:%M:%S')}] Запуск проверки системы {self.system_name}...",
-                        "black")
-                    functions_list = list(functions_dict.items())
-                    worker = worker_class(self, functions_list)
-                    # Подключаем сигналы
-                    worker.log_signal.connect(
-                        lambda msg, color: self.add_log(msg, color))
-                    worker.check_started.connect(
-                        lambda cn: self.update_check_status.emit(cn, "running")
-                    )
-                    worker.check_finished.connect(
-                        lambda cn, success: self.update_check_status.emit(
-                            cn, "success" if success else "error"
-                        )
-                    )
-                    worker.finished.connect(self.on_checks_finished)
-                    # Сохраняем worker и запускаем
-                    setattr(self, worker_attr, worker)
-                    worker.start()
-            else:
-                # Для систем без специальных обработчиков используем эмуляцию
-                self.add_log(f"[{datetime.now().strftime('%H:%M:%S')}] Запуск проверки системы {self.system_name}...",
-                             "black")
-                checks_to_run = self.checks.copy()
-                if not include_powerbi:
-                    checks_to_run = [
-                        c for c in checks_to_run if "PowerBi" not in c]
-                self.worker = WorkerThread(
-                    self.system_name, checks_to_run, include_powerbi)
-                self.worker.log_signal.connect(self.add_thread_log)
-                self.worker.finished.connect(self.on_checks_finished)
-                self.worker.time_update.connect(
-                    lambda msg: self.add_log(f"[{datetime.now().strftime('%H:%M:%S')}] {msg}", "black"))
-                self.worker.check_started.connect(self.on_check_started)
-                self.worker.check_finished.connect(self.on_check_finished)
-                self.worker.start()
+            self.add_log(
+                f"[{datetime.now().strftime('%H:%M:%S')}] Запуск {'полной ' if include_powerbi else ''}проверки системы {self.system_name}{reason}...",
+                "black")
+            functions = []
+            for check in self.checks:
+                if checks and check not in checks:
+                    continue
+                # PowerBi только если include_powerbi=True; время запуска
+                # ("at" в check_registry) выдерживает планировщик исполнителя
+                if "PowerBi" in check and not include_powerbi:
+                    continue
+                functions.append((check, self.registry.lazy(self.system_name, check)))
+            return self.start_task(functions, full_run=True, force_refresh=force_refresh)
         except Exception as e:
             print(f"Ошибка в run_all_checks: {e}")
             self.is_checking = False
             self.toggle_buttons(True)
-
-    def wait_and_run_powerbi(self):
-        """Ожидает 09:15 и выполняет проверку PowerBi"""
-        try:
-            # Ожидаем 09:15 без спама в лог
-            target_time = dt_time(9, 15)
-            while True:
-                # Проверяем, не была ли остановлена проверка
-                if not self.is_checking:
-                    return False
-                current_time = datetime.now().time()
-                if current_time >= target_time:
-                    break
-                # Спим 10 секунд вместо 1, чтобы уменьшить нагрузку
-                time.sleep(10)
-            # Выполняем проверку PowerBi
-            return p.test()
-        except Exception as e:
-            print(f"Ошибка в wait_and_run_powerbi: {e}")
-            return False
-
-    def on_check_started(self, system, check_name):
-        try:
-            if system == self.system_name:
-                self.update_check_status.emit(check_name, "running")
-        except Exception as e:
-            print(f"Ошибка в on_check_started: {e}")
-
-    def on_check_finished(self, system, check_name, success):
-        try:
-            if system == self.system_name:
-                self.update_check_status.emit(
-                    check_name, "success" if success else "error")
-        except Exception as e:
-            print(f"Ошибка в on_check_finished: {e}")
-
-    def add_thread_log(self, system, message, color):
-        try:
-            if system == self.system_name:
-                # Пропускаем сообщения о времени до PowerBi, так как у нас теперь есть отдельный счетчик
-                if "До запуска PowerBi" not in message:
-                    self.add_log(message, color)
-        except Exception as e:
-            print(f"Ошибка в add_thread_log: {e}")
-
-    def on_checks_finished(self):
-        """Обработчик завершения всех проверок"""
+            return None
+
+    def run_scheduled(self, schedule):
+        """Запуск по расписанию; занятую вкладку пропускаем, не прерывая оператора"""
+        return self.run_all_checks(
+            schedule.include_powerbi, checks=schedule.checks,
+            force_refresh=schedule.force_refresh,
+            reason=f" по расписанию «{schedule.name}»")
+
+    def start_task(self, functions, full_run=False, force_refresh=False):
+        """Ставит проверки вкладки в общий пул"""
+        task = CheckTask(self, functions, full_run, force_refresh=force_refresh)
+        self.active_tasks.add(task)
+        self.running_checks.update(task.check_names)
+        self.toggle_buttons(True)
+        task.start()
+        return task
+
+    def on_task_finished(self, task):
+        """Обработчик завершения задачи: убираем её из активных"""
         try:
-            # Останавливаем таймер при завершении проверок
-            self.stop_powerbi_timer()
-            # Проверяем наличие воркеров перед обращением к ним
-            if self.worker is not None:
+            self.active_tasks.discard(task)
+            self.running_checks.difference_update(task.check_names)
+            if task.full_run:
+                # Останавливаем таймер при завершении проверок
+                self.stop_powerbi_timer()
                 self.add_log(
-                    f"[{datetime.now().strftime('%H:%M:%S')}] {'Полная ' if self.worker.include_powerbi else ''}проверка системы {self.system_name} завершена",
+                    f"[{datetime.now().strftime('%H:%M:%S')}] Проверка системы {self.system_name} завершена",
                     "black")
-                self.worker = None
-            if self.p_worker is not None:
-                self.add_log(
-                    f"[{datetime.now().strftime('%H:%M:%S')}] Проверка системы П завершена", "black")
-                self.p_worker = None
-            if self.a_worker is not None:  # Проверяем, что a_worker существует
-                self.add_log(
-                    f"[{datetime.now().strftime('%H:%M:%S')}] Проверка системы А завершена", "black")
-                self.a_worker = None
-            self.is_checking = False
-            self.toggle_buttons(True)
-        except Exception as e:
-            print(f"Ошибка в on_checks_finished: {e}")
-            self.is_checking = False
-            self.toggle_buttons(True)
-
-    def on_single_check_finished(self):
-        """Обработчик завершения одиночной проверки"""
-        try:
-            # Останавливаем таймер при завершении проверки
-            self.stop_powerbi_timer()
-            self.p_worker = None
-            self.a_worker = None
-            self.is_checking = False
+                self.is_checking = False
             self.toggle_buttons(True)
         except Exception as e:
-            print(f"Ошибка в on_single_check_finished: {e}")
+            print(f"Ошибка в on_task_finished: {e}")
             self.is_checking = False
             self.toggle_buttons(True)
 
     def stop_all_workers(self):
-        """Останавливает все рабочие потоки"""
+        """Просит все задачи вкладки остановиться, не блокируя интерфейс"""
         try:
             self.stop_powerbi_timer()
             self.is_checking = False
-            workers_to_stop = [
-                'worker', 'p_worker', 'a_worker', 'mi_worker',
-                'm_worker', 'g_worker', 'k_worker', 'emulation_worker'
-            ]
-            for worker_name in workers_to_stop:
-                worker = getattr(self, worker_name, None)
-                if worker and worker.isRunning():
-                    worker.stop()
+            for task in list(self.active_tasks):
+                task.stop()
         except Exception as e:
             print(f"Ошибка в stop_all_workers: {e}")
 
     def toggle_buttons(self, enabled):
-        """Включает/отключает кнопки управления и вкладки систем"""
+        """Включает/отключает кнопки с учётом выполняющихся проверок"""
         try:
-            self.btn_check_all.setEnabled(enabled)
-            self.btn_copy.setEnabled(enabled)
-            self.btn_clear.setEnabled(enabled)
+            idle = enabled and not self.is_checking
+            self.btn_check_all.setEnabled(idle and not self.active_tasks)
+            self.btn_copy.setEnabled(idle)
+            self.btn_clear.setEnabled(idle)
             if self.system_name == "П":
-                self.btn_check_powerbi.setEnabled(enabled)
+                self.btn_check_powerbi.setEnabled(idle and not self.active_tasks)
             for check in self.checks:
-                self.check_widgets[check].check_button.setEnabled(enabled)
-            # Блокируем/разблокируем вкладки систем в главном окне
+                self.check_widgets[check].check_button.setEnabled(
+                    idle and check not in self.running_checks)
+            # Обновляем статус в главном окне, вкладки остаются доступны
             if hasattr(self, 'main_window') and self.main_window:
-                self.main_window.set_tabs_enabled(enabled)
+                self.main_window.update_progress()
         except Exception as e:
             print(f"Ошибка в toggle_buttons: {e}")
 
     def copy_logs(self):
         """Копирует логи в буфер обмена"""
         try:
-            all_text = "\n".join([self.log_output.item(i).text()
-                                  for i in range(self.log_output.count())])
+            all_text = "\n".join(self.log_output.texts())
             clipboard = QApplication.clipboard()
             clipboard.setText(all_text)
             # Анимация кнопки копирования
@@ -1128,32 +774,6 @@ class SystemTab(QWidget):
             print(f"Ошибка в clear_logs: {e}")
 
 
-class EmulationWorker(QThread):
-    """Воркер для эмуляции проверки"""
-    finished = pyqtSignal(bool, str)  # success, check_name
-
-    def __init__(self, check_name):
-        super().__init__()
-        self.check_name = check_name
-        self.is_running = True
-
-    def run(self):
-        try:
-            # Эмуляция выполнения проверки
-            time.sleep(1)  # Имитация работы
-            # Генерация результата (случайно успешный или с ошибкой)
-            success = random.choice([True, False])
-            # Отправляем результат
-            self.finished.emit(success, self.check_name)
-        except Exception as e:
-            self.finished.emit(False, self.check_name)
-
-    def stop(self):
-        self.is_running = False
-        self.quit()
-        self.wait()
-
-
 class TokenDialog(QDialog):
     def __init__(self, token, parent=None):
         super().__init__(parent)
@@ -1252,41 +872,93 @@ class PasswordDialog(QDialog):
         return self.password_input.text()
 
 
-class UsernamePasswordDialog(QDialog):
-    def __init__(self, title, parent=None):
+class HistoryDialog(QDialog):
+    """Просмотр истории проверок из services/history.py"""
+    OUTCOME_COLORS = {"success": "success", "error": "error", "timeout": "error",
+                      "stopped": "warning"}
+    ALL = "Все"
+
+    def __init__(self, history, parent=None):
         super().__init__(parent)
-        self.setWindowTitle(title)
-        self.setModal(True)
+        self.history = history
+        self.setWindowTitle("История проверок")
+        self.resize(800, 600)
         self.init_ui()
+        self.reload()
 
     def init_ui(self):
         layout = QVBoxLayout(self)
-        self.description_label = QLabel("Введите логин и пароль")
-        layout.addWidget(self.description_label)
-        # Поле для логина
-        layout.addWidget(QLabel("Логин:"))
-        self.username_input = QLineEdit()
-        layout.addWidget(self.username_input)
-        # Поле для пароля
-        layout.addWidget(QLabel("Пароль:"))
-        self.password_input = QLineEdit()
-        self.password_input.setEchoMode(QLineEdit.Password)
-        layout.addWidget(self.password_input)
-        # Кнопки OK и Cancel
-        buttons = QDialogButtonBox(
-            QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
-        buttons.accepted.connect(self.accept)
+        # Фильтры по системе и проверке
+        filters = QHBoxLayout()
+        filters.addWidget(QLabel("Система:"))
+        self.system_box = QComboBox()
+        self.system_box.addItems([self.ALL] + list(SYSTEMS_CONFIG.keys()))
+        self.system_box.currentIndexChanged.connect(self.on_system_changed)
+        filters.addWidget(self.system_box)
+        filters.addWidget(QLabel("Проверка:"))
+        self.check_box = QComboBox()
+        self.check_box.addItem(self.ALL)
+        self.check_box.currentIndexChanged.connect(self.reload)
+        filters.addWidget(self.check_box, 1)
+        layout.addLayout(filters)
+        # Сводка по дням недели
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        # Последние запуски
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(
+            ["Начало", "Система", "Проверка", "Длительность, с", "Итог"])
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(
+            2, QHeaderView.Stretch)
+        layout.addWidget(self.table, 1)
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
         buttons.rejected.connect(self.reject)
         layout.addWidget(buttons)
 
-    def set_description(self, text):
-        self.description_label.setText(text)
-
-    def get_username(self):
-        return self.username_input.text()
-
-    def get_password(self):
-        return self.password_input.text()
+    def selected(self, box):
+        text = box.currentText()
+        return None if text in ("", self.ALL) else text
+
+    def on_system_changed(self):
+        system = self.selected(self.system_box)
+        self.check_box.blockSignals(True)
+        self.check_box.clear()
+        self.check_box.addItem(self.ALL)
+        if system is not None:
+            self.check_box.addItems(SYSTEMS_CONFIG.get(system, []))
+        self.check_box.blockSignals(False)
+        self.reload()
+
+    def reload(self):
+        system = self.selected(self.system_box)
+        check_name = self.selected(self.check_box)
+        rows = self.history.query(system=system, check_name=check_name)
+        self.table.setRowCount(len(rows))
+        for row, record in enumerate(rows):
+            values = [record["started_at"].replace("T", " "), record["system"],
+                      record["check_name"], f"{record['duration']:.1f}",
+                      record["outcome"]]
+            color = QColor(COLORS.get(
+                self.OUTCOME_COLORS.get(record["outcome"]), COLORS["text"]))
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if record["message"]:
+                    item.setToolTip(record["message"])
+                if column == 4:
+                    item.setForeground(QBrush(color))
+                self.table.setItem(row, column, item)
+        parts = []
+        for stats in self.history.stats_by_weekday(system, check_name):
+            parts.append(
+                f"{WEEKDAYS[stats['weekday']]}: {stats['avg_duration']:.1f} с "
+                f"(макс. {stats['max_duration']:.1f} с, "
+                f"{stats['succeeded']}/{stats['runs']} успешно)")
+        self.summary_label.setText(
+            "Средняя длительность по дням недели — " + "; ".join(parts)
+            if parts else "История пуста")
 
 
 class MainWindow(QMainWindow):
@@ -1420,67 +1092,44 @@ class MainWindow(QMainWindow):
             action.triggered.connect(
                 lambda checked, s=system: self.change_password(s))
             self.settings_menu.addAction(action)
+        self.settings_menu.addSeparator()
+        history_action = QAction("История проверок", self)
+        history_action.triggered.connect(self.show_history)
+        self.settings_menu.addAction(history_action)
         self.apply_styles()
         self.original_tab_style = self.tabs.styleSheet()
         self.current_tab_index = 0
         self.tabs.currentChanged.connect(self.on_tab_changed)
+        # Забираем события проверок из канала пачками
+        log_view = config.get("log_view", {})
+        self.drain_limit = log_view.get("drain_limit", 5000)
+        self.log_timer = QTimer(self)
+        self.log_timer.timeout.connect(
+            lambda: dispatch_log_events(LOG_CHANNEL, self.drain_limit))
+        self.log_timer.start(log_view.get("drain_interval_ms", 50))
+        self.recurring = None  # Запуски по расписанию (services/schedules.py)
 
     def on_tab_changed(self, index):
-        """Запоминаем текущую активную вкладку"""
+        """Запоминаем текущую активную вкладку и подгружаем модули её системы"""
         self.current_tab_index = index
-
-    def set_tabs_enabled(self, enabled):
-        """Блокирует или разблокирует вкладки систем с сохранением позиции"""
-        # Запоминаем текущую вкладку
-        current_index = self.tabs.currentIndex()
-        current_system = self.tabs.tabText(
-            current_index) if current_index >= 0 else ""
-        # Временно отключаем сигналы
-        self.tabs.blockSignals(True)
-        try:
-            # Блокируем/разблокируем вкладки
-            for i in range(self.tabs.count()):
-                self.tabs.setTabEnabled(i, enabled)
-            # Восстанавливаем текущую вкладку, если она доступна
-            if enabled and current_system:
-                # Восстанавливаем стиль
-                self.tabs.setStyleSheet(self.original_tab_style)
-                # Ищем вкладку с тем же именем системы
-                for i in range(self.tabs.count()):
-                    if self.tabs.tabText(i) == current_system:
-                        self.tabs.setCurrentIndex(i)
-                        break
-                else:
-                    # Если не нашли, переходим на первую доступную
-                    self.tabs.setCurrentIndex(0)
-            elif not enabled:
-                # При блокировке оставляем текущую вкладку активной
-                if 0 <= current_index < self.tabs.count():
-                    self.tabs.setCurrentIndex(current_index)
-            # Визуальные стили и обновление статуса
-            if enabled:
-                self.tabs.setStyleSheet(self.original_tab_style)
-                if hasattr(self, 'progress_label'):
-                    self.progress_label.setText("Готов")
-                    self.progress_label.setStyleSheet("color: green;")
-            else:
-                self.tabs.setStyleSheet(f"""
-                    QTabBar::tab:disabled {{
-                        background-color: {COLORS['disabled']};
-                        color: #757575;
-                    }}
-                    QTabBar::tab:selected {{
-                        background-color: white;
-                        color: {COLORS['primary']};
-                        }}
-                """)
-                if hasattr(self, 'progress_label'):
-                    self.progress_label.setText("Выполняется проверка...")
-                    self.progress_label.setStyleSheet(
-                        "color: orange; font-weight: bold;")
-        finally:
-            # Включаем сигналы обратно
-            self.tabs.blockSignals(False)
+        tab = self.tabs.widget(index)
+        if isinstance(tab, SystemTab):
+            tab.preload_modules()
+
+    def update_progress(self):
+        """Показывает в статус баре, сколько систем сейчас проверяется"""
+        if not hasattr(self, 'progress_label'):
+            return
+        busy = [system for system, tab in self.tab_widgets.items()
+                if tab.active_tasks]
+        if busy:
+            self.progress_label.setText(
+                f"Выполняется проверка: {', '.join(busy)}")
+            self.progress_label.setStyleSheet(
+                "color: orange; font-weight: bold;")
+        else:
+            self.progress_label.setText("Готов")
+            self.progress_label.setStyleSheet("color: green;")
 
     def show_settings_menu(self):
         apply_style(self.settings_menu, "SettingsMenu", COLORS)
@@ -1490,6 +1139,42 @@ class MainWindow(QMainWindow):
         # Показываем меню под кнопкой
         self.settings_menu.exec_(button_pos)
 
+    def launch_scheduled(self, run):
+        """Вызывается из потока таймеров: запуск передаётся в поток интерфейса"""
+        LOG_CHANNEL.put(self, "scheduled_run", run)
+
+    def run_scheduled(self, run):
+        """Запускает проверки расписания на вкладках его систем"""
+        try:
+            for system in run.schedule.systems:
+                tab = self.tab_widgets.get(system)
+                if tab is None:
+                    continue
+                task = tab.run_scheduled(run.schedule)
+                if task is not None:
+                    run.attach(task.job)
+        finally:
+            run.close()
+
+    def start_schedules(self):
+        """Запускает расписания из раздела schedules, если они включены для окна"""
+        settings = config.get("schedules", {})
+        if not settings.get("enabled") or not settings.get("run_in_gui", True):
+            return
+        schedules_module = import_module("services.schedules")
+        self.recurring = schedules_module.RecurringScheduler(
+            schedules_module.load_schedules(settings), self.launch_scheduled,
+            schedules_module.state_path(settings))
+        self.recurring.start()
+
+    def show_history(self):
+        history = get_history()
+        if history is None:
+            QMessageBox.information(
+                self, "История", "История проверок отключена в настройках")
+            return
+        HistoryDialog(history, self).exec_()
+
     def change_password(self, system_name):
         import base64
         if system_name == "П":
@@ -1512,19 +1197,20 @@ class MainWindow(QMainWindow):
             if dialog.exec_() == QDialog.Accepted:
                 password = dialog.get_password()
                 if password:
-                    keyring.set_password(
-                        "ChecklistValidator", system_name, password)
+                    get_secrets().set("ChecklistValidator", system_name, password)
                     QMessageBox.information(
                         self, "Успех", "Пароль успешно сохранен!")
 
     def change_p_passwords(self):
+        # Пароли пишутся через общий поставщик, чтобы проверки сразу видели новые
+        secrets = get_secrets()
         # 1. Пароль для AdapterA
         dialog_a = PasswordDialog("AdapterA", self)
         dialog_a.setWindowTitle("AdapterA")
         if dialog_a.exec_() == QDialog.Accepted:
             pass_a = dialog_a.get_password()
             if pass_a:
-                keyring.set_password("AdapterA", "admin", pass_a)
+                secrets.set("AdapterA", "admin", pass_a)
             else:
                 QMessageBox.warning(
                     self, "Ошибка", "Пароль для AdapterA не введен")
@@ -1535,22 +1221,21 @@ class MainWindow(QMainWindow):
         if dialog_p.exec_() == QDialog.Accepted:
             pass_p = dialog_p.get_password()
             if pass_p:
-                keyring.set_password("AdapterP", "admin", pass_p)
+                secrets.set("AdapterP", "admin", pass_p)
             else:
                 QMessageBox.warning(
                     self, "Ошибка", "Пароль для AdapterP не введен")
                 return
-        # 3. Логин и пароль для Elastic
+        # 3. Пароль для Elastic (логин — elastic.username в конфиге или пользователь Windows)
         dialog_elastic = PasswordDialog("Elastic", self)
         dialog_elastic.setWindowTitle("Elastic")
         if dialog_elastic.exec_() == QDialog.Accepted:
-            login_elastic = dialog_elastic.get_username()
             pass_elastic = dialog_elastic.get_password()
-            if login_elastic and pass_elastic:
-                keyring.set_password("Elastic", login, pass_elastic)
+            if pass_elastic:
+                secrets.set("Elastic", None, pass_elastic)
             else:
                 QMessageBox.warning(
-                    self, "Ошибка", "Пароль для Elastic не введены")
+                    self, "Ошибка", "Пароль для Elastic не введен")
                 return
         QMessageBox.information(
             self, "Успех", "Все пароли для успешно сохранены!")
@@ -1569,6 +1254,9 @@ class MainWindow(QMainWindow):
         chrome_thread = threading.Thread(
             target=self.cleanup_chrome_processes, daemon=True)
         chrome_thread.start()
+        self.log_timer.stop()
+        if self.recurring is not None:
+            self.recurring.stop()
         # Останавливаем все потоки приложения
         for tab in self.tab_widgets.values():
             tab.stop_all_workers()
@@ -1577,6 +1265,24 @@ class MainWindow(QMainWindow):
             # Сбрасываем статусы проверок
             for check in tab.checks:
                 tab.update_check_status.emit(check, "default")
+        # Отменяем ожидающие задачи пула, не дожидаясь текущих проверок
+        shutdown_executor(wait=False)
+        # Последняя запись файла метрик до остановки планировщика
+        close_exporters()
+        shutdown_scheduler()
+        shutdown_loop()
+        shutdown_process_pool()
+        # Соединения с БД открываются только проверками, которые их используют
+        if "services.db" in sys.modules:
+            sys.modules["services.db"].close_pools()
+        if "services.http_checks" in sys.modules:
+            sys.modules["services.http_checks"].close_checker()
+        if "services.elastic" in sys.modules:
+            sys.modules["services.elastic"].close_client()
+        if "services.kafka_snapshot" in sys.modules:
+            sys.modules["services.kafka_snapshot"].close_snapshot_cache()
+        if "services.load" in sys.modules:
+            sys.modules["services.load"].close_sampler()
         # Ждем завершения потока с Chrome процессами (максимум 2 секунды)
         chrome_thread.join(2.0)
         # Закрываем основное приложение
@@ -1584,8 +1290,11 @@ class MainWindow(QMainWindow):
 
     def cleanup_chrome_processes(self):
         """Асинхронное закрытие процессов Chrome"""
+        # Если браузер ни разу не запускался, selenium не импортируем
+        if "services.webdriver" not in sys.modules:
+            return
         try:
-            close_driver()
+            sys.modules["services.webdriver"].close_driver()
         except Exception as e:
             print(f"Ошибка при очистке Chrome процессов: {e}")
 
@@ -1635,6 +1344,16 @@ def run_interface():
         print(f"Не удалось загрузить иконку: {e}")
         logging.warning(f"Не удалось загрузить иконку: {e}")
     window.show()
+    window.start_schedules()
+    start_exporters()
+    # Прогрев Chrome в фоне, чтобы первая проверка не ждала его запуска
+    if config.get("webdriver", {}).get("prewarm"):
+        threading.Thread(
+            target=lambda: import_module("services.webdriver").start_prewarm(),
+            daemon=True).start()
     data = time.time() - time_s
+    STARTUP.set(data)
     logging.info(f"Время запуска программы: {data:.2f} сек.")
+    for module_name, elapsed in import_times().items():
+        logging.info(f"Время импорта {module_name}: {elapsed:.3f} сек.")
     sys.exit(app.exec_())
@@ -1,6 +1,100 @@
-from interfaces.ui import run_interface
-from services.logger import setup_logging
-# Настройка логов до всех импортов
-setup_logging()
+import argparse
+import contextlib
+import json
+import multiprocessing
+import sys
+
+
+def parse_args(argv=None):
+    """Разбор аргументов командной строки"""
+    parser = argparse.ArgumentParser(description="Автоматическое прохождение чек-листов")
+    parser.add_argument("--headless", action="store_true",
+                        help="Запуск проверок без графического интерфейса")
+    parser.add_argument("--scheduler", action="store_true",
+                        help="Запуск проверок по расписанию (раздел schedules) без интерфейса")
+    parser.add_argument("--systems", default="",
+                        help="Системы через запятую, например: А,П")
+    parser.add_argument("--checks", default="",
+                        help="Названия проверок через запятую (по умолчанию все)")
+    parser.add_argument("--powerbi", action="store_true",
+                        help="Включить проверку PowerBi")
+    parser.add_argument("--force", action="store_true",
+                        help="Выполнить проверки заново, не используя кэш результатов")
+    parser.add_argument("--output", default="",
+                        help="Файл для JSON-результата (по умолчанию stdout)")
+    return parser.parse_args(argv)
+
+
+def split_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def run_headless(args):
+    """Запуск проверок без Qt с выводом результата в JSON"""
+    from services.metrics import close_exporters, start_exporters
+    from services.runner import CheckRunner
+    runner = CheckRunner()
+    start_exporters()
+    # Проверки печатают в stdout, поэтому на время работы уводим их вывод в stderr
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            report = runner.run(
+                systems=split_list(args.systems),
+                checks=split_list(args.checks),
+                include_powerbi=args.powerbi,
+                force_refresh=args.force
+            )
+    finally:
+        # Разовый запуск: файл метрик дописывается при остановке выгрузки
+        close_exporters()
+    data = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(data)
+    elif sys.stdout is not None:
+        if hasattr(sys.stdout, "reconfigure"):
+            sys.stdout.reconfigure(encoding="utf-8")
+        sys.stdout.write(data + "\n")
+    return 0 if report["success"] else 1
+
+
+def run_scheduler():
+    """Фоновый режим: проверки запускаются по расписанию, результат — в логе и истории"""
+    import logging
+    import threading
+    from services.metrics import close_exporters, start_exporters
+    from services.runner import CheckRunner
+    from services.schedules import RecurringScheduler, load_schedules, state_path
+    schedules = load_schedules()
+    if not schedules:
+        logging.getLogger(__name__).error("В разделе schedules нет расписаний")
+        return 1
+    recurring = RecurringScheduler(
+        schedules, CheckRunner().launch_scheduled, state_path())
+    start_exporters()
+    with contextlib.redirect_stdout(sys.stderr):
+        recurring.start()
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            recurring.stop()
+        finally:
+            close_exporters()
+    return 0
+
+
 if __name__ == "__main__":
-    run_interface()
+    # Дочерние процессы изолированных проверок не должны заново настраивать логи и окно
+    multiprocessing.freeze_support()
+    from services.logger import setup_logging
+    # Настройка логов до всех импортов
+    setup_logging()
+    args = parse_args()
+    if args.scheduler:
+        sys.exit(run_scheduler())
+    if args.headless:
+        sys.exit(run_headless(args))
+    from services.lazy import import_module
+    # Замеряем импорт Qt и интерфейса отдельно, итог пишется в лог при запуске
+    import_module("PyQt5.QtWidgets")
+    import_module("interfaces.ui").run_interface()
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import threading
+
+
+logger_ui = logging.getLogger(__name__)
+
+# Общий цикл событий для асинхронных проверок и поток, в котором он крутится
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def _run_loop(loop, ready):
+    asyncio.set_event_loop(loop)
+    loop.call_soon(ready.set)
+    loop.run_forever()
+    # Доделываем отменённые задачи перед закрытием цикла
+    pending = asyncio.all_tasks(loop)
+    for task in pending:
+        task.cancel()
+    if pending:
+        loop.run_until_complete(
+            asyncio.gather(*pending, return_exceptions=True))
+    loop.close()
+
+
+def get_loop():
+    """Возвращает общий цикл событий, при первом вызове запускает его поток"""
+    global _loop, _loop_thread
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+                thread = threading.Thread(
+                    target=_run_loop, args=(loop, ready),
+                    name="check-event-loop", daemon=True)
+                thread.start()
+                ready.wait()
+                _loop_thread = thread
+                _loop = loop
+                logger_ui.info('Цикл событий для асинхронных проверок запущен')
+    return _loop
+
+
+def run_coroutine(coro, timeout=None, token=None):
+    """Выполняет корутину в общем цикле и блокирует вызывающий поток до результата"""
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    # Отмена проверки отменяет задачу в цикле, прерывая её await
+    remove = token.on_cancel(future.cancel) if token is not None else None
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+    finally:
+        if remove is not None:
+            remove()
+
+
+def shutdown_loop(timeout=2.0):
+    """Останавливает общий цикл событий"""
+    global _loop, _loop_thread
+    with _loop_lock:
+        loop, thread = _loop, _loop_thread
+        _loop = None
+        _loop_thread = None
+    if loop is not None:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
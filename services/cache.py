@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+from services.config import get_section
+
+
+def format_age(seconds):
+    """Возраст результата в виде «45 с», «3 мин», «1 ч 5 мин»"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds} с"
+    minutes = seconds // 60
+    if minutes < 60:
+        return f"{minutes} мин"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} ч {minutes} мин" if minutes else f"{hours} ч"
+
+
+class ResultCache:
+    """LRU-кэш успешных результатов проверок с ограничением по числу записей"""
+
+    def __init__(self, max_entries=256, clock=time.monotonic):
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()  # (system, check_name) → (время, результат)
+        self._lock = threading.Lock()
+
+    def get(self, key, ttl):
+        """Результат не старше ttl секунд и его возраст, иначе None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, result = entry
+            age = self._clock() - stored_at
+            if age > ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return result, age
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (self._clock(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, system=None, check_name=None):
+        """Сбрасывает записи системы, одной проверки или весь кэш"""
+        with self._lock:
+            for key in list(self._entries):
+                if system is not None and key[0] != system:
+                    continue
+                if check_name is not None and key[1] != check_name:
+                    continue
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache():
+    """Общий кэш результатов, размер задаётся разделом result_cache в конфиге"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResultCache(
+                    get_section("result_cache").get("max_entries", 256))
+    return _cache
@@ -0,0 +1,149 @@
+import contextlib
+import contextvars
+import inspect
+import logging
+import threading
+import time
+
+
+logger_ui = logging.getLogger(__name__)
+
+
+class CheckCancelled(Exception):
+    """Проверка прервана: остановка пользователем или истёк срок"""
+
+
+class CancelToken:
+    """Признак отмены проверки: прерывает ожидания и вызывает обработчики отмены"""
+
+    def __init__(self, timeout=None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._deferred = []
+        self._closed = False
+        self.reason = None
+        self.timed_out = False
+        # Тело проверки брошено после отмены и ещё работает: ресурсы освободит его поток
+        self.abandoned = False
+        self.deadline = time.monotonic() + timeout if timeout else None
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason="Остановлено", timed_out=False):
+        """Отменяет проверку; обработчики вызываются один раз"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self.timed_out = timed_out
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger_ui.warning(f"Ошибка в обработчике отмены: {e}")
+
+    def on_cancel(self, callback):
+        """Регистрирует обработчик отмены; возвращает функцию, которая его снимает"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def defer(self, callback):
+        """Действие при завершении проверки (вернуть сессию, освободить ресурс)"""
+        with self._lock:
+            if not self._closed:
+                self._deferred.append(callback)
+                return
+        callback()
+
+    def close(self):
+        """Проверка завершилась: отложенные действия выполняются один раз, в обратном порядке"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            callbacks, self._deferred = self._deferred, []
+        for callback in reversed(callbacks):
+            try:
+                callback()
+            except Exception as e:
+                logger_ui.warning(f"Ошибка при завершении проверки: {e}")
+
+    def remaining(self):
+        """Секунд до срока проверки или None, если срок не задан"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise CheckCancelled(self.reason)
+
+    def wait(self, timeout=None):
+        """Ждёт отмены не дольше timeout; True, если проверка отменена"""
+        return self._event.wait(timeout)
+
+    def sleep(self, seconds):
+        """Пауза, которую прерывает отмена (вместо time.sleep в проверках)"""
+        if self._event.wait(seconds):
+            raise CheckCancelled(self.reason)
+
+
+# Токен проверки, выполняющейся в текущем потоке
+_current_token = contextvars.ContextVar("cancel_token", default=None)
+
+
+def current_token():
+    """Токен текущей проверки; вне проверки — токен, который никогда не отменяется"""
+    token = _current_token.get()
+    return token if token is not None else CancelToken()
+
+
+def check_token():
+    """Токен выполняющейся проверки или None вне проверки"""
+    return _current_token.get()
+
+
+@contextlib.contextmanager
+def bind_token(token):
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def sleep(seconds):
+    """Прерываемая пауза для функций проверок, не принимающих token"""
+    token = _current_token.get()
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token.sleep(seconds)
+
+
+def accepts_token(func):
+    try:
+        return "token" in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+def call_with_token(func, token=None):
+    """Вызывает проверку, передавая token, если функция его принимает"""
+    if accepts_token(func):
+        return func(token=token or current_token())
+    return func()
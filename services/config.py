@@ -0,0 +1,23 @@
+import json
+import threading
+from services.paths import resource_path
+
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def load_config():
+    """Читает config/ui_config.json один раз и кэширует результат"""
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                with open(resource_path('config/ui_config.json'), 'r', encoding='utf-8-sig') as f:
+                    _config = json.load(f)
+    return _config
+
+
+def get_section(name, default=None):
+    """Возвращает раздел конфига по имени"""
+    return load_config().get(name, {} if default is None else default)
@@ -0,0 +1,101 @@
+import getpass
+import logging
+import threading
+import time
+from services.config import get_section
+from services.lazy import import_module
+
+
+logger_ui = logging.getLogger(__name__)
+
+# Имена паролей в func_and_pass → (служба keyring, пользователь; None — текущий логин)
+KNOWN_SECRETS = {
+    "password": ("Jira", None),
+    "passA": ("AdapterA", "admin"),
+    "passP": ("AdapterP", "admin"),
+    "passElastic": ("Elastic", None),
+}
+
+
+class SecretProvider:
+    """Пароли из keyring: читаются при первом обращении и кэшируются на ttl секунд"""
+
+    def __init__(self, ttl=900, backend=None):
+        self.ttl = ttl
+        self._backend = backend
+        self._cache = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _keyring(self):
+        if self._backend is None:
+            self._backend = import_module("keyring")
+        return self._backend
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, service, username=None):
+        """Пароль службы; повторные обращения в пределах ttl не ходят в keyring"""
+        key = (service, username or getpass.getuser())
+        cached = self._fresh(key)
+        if cached is not None:
+            return cached[0]
+        # Одно чтение на ключ: остальные потоки ждут его результат
+        with self._key_lock(key):
+            cached = self._fresh(key)
+            if cached is not None:
+                return cached[0]
+            time_s = time.monotonic()
+            value = self._keyring().get_password(*key)
+            logger_ui.debug(
+                f'Пароль {key[0]} прочитан за {time.monotonic() - time_s:.3f} сек.')
+            with self._lock:
+                self._cache[key] = (value, time.monotonic())
+            return value
+
+    def _fresh(self, key):
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and (
+                    self.ttl is None or time.monotonic() - cached[1] < self.ttl):
+                return cached
+            return None
+
+    def set(self, service, username, value):
+        """Сохраняет пароль в keyring и сразу обновляет кэш"""
+        key = (service, username or getpass.getuser())
+        with self._key_lock(key):
+            self._keyring().set_password(*key, value)
+            with self._lock:
+                self._cache[key] = (value, time.monotonic())
+
+    def invalidate(self, service=None, username=None):
+        """Сбрасывает кэш службы (или весь), следующее чтение пойдёт в keyring"""
+        with self._lock:
+            if service is None:
+                self._cache.clear()
+                return
+            for key in list(self._cache):
+                if key[0] == service and username in (None, key[1]):
+                    del self._cache[key]
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_secrets():
+    """Общий поставщик паролей; ttl — из раздела secrets конфига"""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = SecretProvider(get_section("secrets").get("ttl", 900))
+    return _provider
+
+
+def get_secret(name):
+    """Пароль по имени из KNOWN_SECRETS (password, passA, passP, passElastic)"""
+    return get_secrets().get(*KNOWN_SECRETS[name])
@@ -0,0 +1,319 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from services.cancel import current_token
+from services.config import get_section
+from services.lazy import import_module
+from services.metrics import observe_call, timed_call
+from services.scheduler import get_scheduler
+
+
+logger_ui = logging.getLogger(__name__)
+
+
+class PooledConnection:
+    """Соединение ODBC из пула с кэшем курсоров по тексту запроса"""
+
+    def __init__(self, conn, max_cursors=16):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        self.broken = False
+        self.suspect = False  # После ошибки соединение проверяется перед выдачей
+        self.max_cursors = max_cursors
+        # Курсор повторно использует подготовленный запрос, если текст SQL тот же
+        self._cursors = OrderedDict()
+
+    def cursor(self, sql):
+        cursor = self._cursors.get(sql)
+        if cursor is None:
+            cursor = self.conn.cursor()
+            self._cursors[sql] = cursor
+            if len(self._cursors) > self.max_cursors:
+                _, oldest = self._cursors.popitem(last=False)
+                _close_quietly(oldest)
+        else:
+            self._cursors.move_to_end(sql)
+        return cursor
+
+    def execute(self, sql, *params):
+        """Выполняет запрос; отмена проверки прерывает его через cursor.cancel()"""
+        cursor = self.cursor(sql)
+        token = current_token()
+        remaining = token.remaining()
+        # Срок проверки ограничивает и сам запрос на стороне драйвера
+        self.conn.timeout = 0 if remaining is None else max(1, int(remaining))
+        remove = token.on_cancel(cursor.cancel)
+        try:
+            token.raise_if_cancelled()
+            with timed_call("db", "execute"):
+                cursor.execute(sql, *params)
+        except Exception:
+            self.suspect = True
+            raise
+        finally:
+            remove()
+        return cursor
+
+    def query(self, sql, *params):
+        return self.execute(sql, *params).fetchall()
+
+    def scalar(self, sql, *params):
+        row = self.execute(sql, *params).fetchone()
+        return None if row is None else row[0]
+
+    def ping(self, sql):
+        try:
+            self.cursor(sql).execute(sql).fetchall()
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        for cursor in self._cursors.values():
+            _close_quietly(cursor)
+        self._cursors.clear()
+        _close_quietly(self.conn)
+
+
+def _close_quietly(obj):
+    try:
+        obj.close()
+    except Exception:
+        pass
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений ODBC для одной строки подключения"""
+
+    def __init__(self, connection_string, max_size=4, acquire_timeout=30,
+                 idle_timeout=300, max_lifetime=3600, validate_after=30,
+                 validate_query="SELECT 1", connect_timeout=15, connect=None):
+        self.connection_string = connection_string
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.validate_after = validate_after
+        self.validate_query = validate_query
+        self.connect_timeout = connect_timeout
+        self._connect = connect
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {
+            "connects": 0, "connect_time": 0.0, "borrows": 0,
+            "wait_total": 0.0, "wait_max": 0.0, "invalid": 0, "closed_idle": 0
+        }
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Выдаёт соединение на время блока with и возвращает его в пул"""
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled
+        finally:
+            self.release(pooled)
+
+    def query(self, sql, *params):
+        with self.connection() as pooled:
+            return pooled.query(sql, *params)
+
+    def scalar(self, sql, *params):
+        with self.connection() as pooled:
+            return pooled.scalar(sql, *params)
+
+    def acquire(self, timeout=None):
+        """Берёт свободное соединение (проверив его) или открывает новое"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        time_s = time.monotonic()
+        deadline = time_s + timeout
+        token = current_token()
+        remove = token.on_cancel(self._wake_waiters)
+        try:
+            while True:
+                pooled = None
+                expired = []
+                try:
+                    with self._condition:
+                        while True:
+                            token.raise_if_cancelled()
+                            if self._closed:
+                                raise RuntimeError("Пул соединений закрыт")
+                            expired += self._take_expired()
+                            if self._idle:
+                                pooled = self._idle.pop()
+                                break
+                            if self._total < self.max_size:
+                                self._total += 1
+                                break
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                raise TimeoutError(
+                                    f"Нет свободного соединения с БД за {timeout} сек.")
+                            self._condition.wait(remaining)
+                finally:
+                    # Медленное закрытие ODBC не должно держать остальных в очереди
+                    for stale in expired:
+                        stale.close()
+                if pooled is None:
+                    pooled = self._open()
+                    break
+                if self._validate(pooled):
+                    break
+                self._discard(pooled)
+        finally:
+            remove()
+        wait = time.monotonic() - time_s
+        observe_call("db", "acquire", wait)
+        with self._condition:
+            self._stats["borrows"] += 1
+            self._stats["wait_total"] += wait
+            self._stats["wait_max"] = max(self._stats["wait_max"], wait)
+        return pooled
+
+    def release(self, pooled):
+        """Возвращает соединение; сломанное или слишком старое закрывается"""
+        pooled.uses += 1
+        pooled.last_used = time.monotonic()
+        expired = pooled.last_used - pooled.created_at > self.max_lifetime
+        if pooled.broken or expired or self._closed:
+            self._discard(pooled)
+            return
+        with self._condition:
+            self._idle.append(pooled)
+            self._condition.notify()
+
+    def _open(self):
+        time_s = time.monotonic()
+        try:
+            with timed_call("db", "connect"):
+                if self._connect is not None:
+                    conn = self._connect(self.connection_string)
+                else:
+                    conn = import_module("pyodbc").connect(
+                        self.connection_string, timeout=self.connect_timeout)
+        except Exception:
+            with self._condition:
+                self._total -= 1
+                self._condition.notify()
+            raise
+        elapsed = time.monotonic() - time_s
+        with self._condition:
+            self._stats["connects"] += 1
+            self._stats["connect_time"] += elapsed
+        logger_ui.debug(f'Открыто соединение с БД за {elapsed:.2f} сек.')
+        return PooledConnection(conn)
+
+    def _validate(self, pooled):
+        """Проверка на выдаче: недавно использованное соединение не пингуем"""
+        if not pooled.suspect and \
+                time.monotonic() - pooled.last_used < self.validate_after:
+            return True
+        if pooled.ping(self.validate_query):
+            pooled.suspect = False
+            return True
+        with self._condition:
+            self._stats["invalid"] += 1
+        logger_ui.warning('Соединение с БД не отвечает, открываем новое')
+        return False
+
+    def _take_expired(self):
+        """Забирает из пула простаивающие соединения (под блокировкой); закрывает их вызывающий"""
+        now = time.monotonic()
+        keep = []
+        expired = []
+        for pooled in self._idle:
+            if now - pooled.last_used > self.idle_timeout:
+                expired.append(pooled)
+            else:
+                keep.append(pooled)
+        self._idle = keep
+        self._total -= len(expired)
+        self._stats["closed_idle"] += len(expired)
+        return expired
+
+    def _discard(self, pooled):
+        pooled.close()
+        with self._condition:
+            self._total -= 1
+            self._condition.notify()
+
+    def _wake_waiters(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    def close_idle(self):
+        with self._condition:
+            expired = self._take_expired()
+        for pooled in expired:
+            pooled.close()
+
+    def stats(self):
+        with self._condition:
+            return dict(self._stats, size=self.max_size, total=self._total,
+                        idle=len(self._idle), in_use=self._total - len(self._idle))
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            pooled.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+_reaper = None
+# Как часто закрывать простаивающие соединения без новых запросов, секунд
+REAP_INTERVAL = 60
+
+
+def _reap():
+    """Закрывает простаивающие соединения всех пулов и планирует следующий обход"""
+    global _reaper
+    with _pools_lock:
+        pools = list(_pools.values())
+        _reaper = get_scheduler().call_later(REAP_INTERVAL, _reap) if pools else None
+    for pool in pools:
+        pool.close_idle()
+
+
+def get_pool(dsn):
+    """Общий пул для DSN; параметры — из раздела databases конфига"""
+    global _reaper
+    pool = _pools.get(dsn)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(dsn)
+            if pool is None:
+                settings = dict(get_section("databases").get(dsn, {}))
+                connection_string = settings.pop("connection_string", f"DSN={dsn}")
+                pool = ConnectionPool(connection_string, **settings)
+                _pools[dsn] = pool
+                if _reaper is None:
+                    _reaper = get_scheduler().call_later(REAP_INTERVAL, _reap)
+    return pool
+
+
+def pool_stats():
+    with _pools_lock:
+        return {dsn: pool.stats() for dsn, pool in _pools.items()}
+
+
+def close_pools():
+    global _reaper
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+        if _reaper is not None:
+            _reaper.cancel()
+            _reaper = None
+    for pool in pools:
+        pool.close()
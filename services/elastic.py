@@ -0,0 +1,313 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+import urllib3
+from services.cancel import current_token
+from services.config import get_section
+from services.credentials import get_secret
+from services.func_and_pass import login
+from services.logger import log
+from services.metrics import timed_call
+from services.paths import data_dir
+
+
+logger_ui = logging.getLogger(__name__)
+
+# В ответе поиска оставляем только то, что нужно для разбора и перехода к следующей странице
+_FILTER_PATH = "pit_id,hits.hits._id,hits.hits._source,hits.hits.sort"
+
+
+class ElasticError(Exception):
+    """Ошибка запроса к Elastic: код ответа и причина из тела"""
+
+    def __init__(self, status, reason):
+        super().__init__(f"Elastic ответил {status}: {reason}")
+        self.status = status
+
+
+class ElasticClient:
+    """Минимальный клиент _search/_pit поверх urllib3 с keep-alive"""
+
+    def __init__(self, url, username=None, password=None, timeout=30,
+                 verify_tls=True, maxsize=4):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.username = username
+        # Пароль — строка или функция; функция вызывается на каждый запрос,
+        # поэтому пароль, сменённый в настройках, действует без перезапуска
+        self._password = password
+        self._manager = urllib3.PoolManager(
+            maxsize=maxsize, retries=False,
+            headers={"Content-Type": "application/json"},
+            cert_reqs="CERT_REQUIRED" if verify_tls else "CERT_NONE")
+
+    def _headers(self):
+        if not self.username:
+            return None
+        password = self._password() if callable(self._password) else self._password
+        return dict(self._manager.headers, **urllib3.make_headers(
+            basic_auth=f"{self.username}:{password or ''}"))
+
+    def request(self, method, path, body=None, params=None):
+        """Запрос к API; тело ответа разбирается прямо из потока"""
+        token = current_token()
+        token.raise_if_cancelled()
+        timeout = self.timeout
+        remaining = token.remaining()
+        if remaining is not None:
+            timeout = max(0.1, min(timeout, remaining))
+        url = self.url + path
+        if params:
+            url += "?" + urlencode(params)
+        with timed_call("elastic", _operation(method, path)):
+            response = self._manager.request(
+                method, url,
+                body=None if body is None else json.dumps(body).encode("utf-8"),
+                headers=self._headers(), preload_content=False, timeout=timeout)
+            try:
+                if response.status >= 400:
+                    raise ElasticError(response.status, _reason(response.read()))
+                return json.load(response)
+            finally:
+                response.release_conn()
+
+    def open_pit(self, index, keep_alive):
+        return self.request(
+            "POST", f"/{index}/_pit", params={"keep_alive": keep_alive})["id"]
+
+    def close_pit(self, pit_id):
+        try:
+            self.request("DELETE", "/_pit", body={"id": pit_id})
+        except (ElasticError, urllib3.exceptions.HTTPError) as e:
+            logger_ui.warning(f"Не удалось закрыть PIT Elastic: {e}")
+
+    def pages(self, index, query, sort, search_after=None, page_size=1000,
+              keep_alive="1m", source=None, use_pit=True):
+        """Страницы попаданий по порядку sort; следующая запрашивается через search_after"""
+        body = {"size": page_size, "query": query, "sort": sort,
+                "track_total_hits": False}
+        if source is not None:
+            body["_source"] = source
+        pit_id = self.open_pit(index, keep_alive) if use_pit else None
+        path = "/_search" if use_pit else f"/{index}/_search"
+        try:
+            while True:
+                if pit_id is not None:
+                    body["pit"] = {"id": pit_id, "keep_alive": keep_alive}
+                if search_after is not None:
+                    body["search_after"] = search_after
+                data = self.request(
+                    "POST", path, body=body, params={"filter_path": _FILTER_PATH})
+                # PIT может смениться между страницами — продолжаем с новым
+                pit_id = data.get("pit_id", pit_id)
+                hits = data.get("hits", {}).get("hits", [])
+                if not hits:
+                    return
+                yield hits
+                if len(hits) < page_size:
+                    return
+                search_after = hits[-1]["sort"]
+        finally:
+            if pit_id is not None:
+                self.close_pit(pit_id)
+
+    def close(self):
+        self._manager.clear()
+
+
+def _operation(method, path):
+    """Метка вызова без имени индекса, например POST _search или DELETE _pit"""
+    endpoint = next(
+        (part for part in reversed(path.split("/")) if part.startswith("_")), "/")
+    return f"{method} {endpoint}"
+
+
+def _reason(raw):
+    try:
+        error = json.loads(raw).get("error", {})
+        if isinstance(error, dict):
+            return error.get("reason") or error.get("type") or str(error)
+        return str(error)
+    except ValueError:
+        return raw[:200].decode("utf-8", errors="replace")
+
+
+class CursorStore:
+    """Сохранённые отметки «прочитано до» по индексу и запросу"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError) as e:
+            logger_ui.warning(f"Не удалось прочитать отметки Elastic: {e}")
+            return {}
+
+    def get(self, key):
+        with self._lock:
+            return self._load().get(key)
+
+    def put(self, key, cursor):
+        with self._lock:
+            data = self._load()
+            data[key] = dict(cursor, updated=datetime.now().isoformat(timespec="seconds"))
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+def cursor_key(index, query):
+    digest = hashlib.sha1(
+        json.dumps(query, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return f"{index}|{digest.hexdigest()[:12]}"
+
+
+class IncrementalScan:
+    """Чтение только новых документов: от сохранённой отметки времени и дальше"""
+
+    def __init__(self, client, store, index, query, time_field="@timestamp",
+                 initial_window="15m", page_size=1000, keep_alive="1m",
+                 source=None, use_pit=True):
+        self.client = client
+        self.store = store
+        self.index = index
+        self.query = query
+        self.time_field = time_field
+        self.initial_window = initial_window
+        self.page_size = page_size
+        self.keep_alive = keep_alive
+        self.source = source
+        self.use_pit = use_pit
+        self.key = cursor_key(index, query)
+
+    def _bounded_query(self, cursor):
+        if cursor is None:
+            since = {"gte": f"now-{self.initial_window}"}
+        else:
+            since = {"gte": cursor["timestamp"], "format": "epoch_millis"}
+        return {"bool": {"filter": [
+            self.query, {"range": {self.time_field: since}}]}}
+
+    def run(self, on_page):
+        """Передаёт новые документы в on_page постранично; возвращает их число"""
+        cursor = self.store.get(self.key)
+        # Документы с той же отметкой времени, что уже прочитаны в прошлый раз
+        seen = set(cursor["ids"]) if cursor else set()
+        high_water = cursor["timestamp"] if cursor else None
+        count = 0
+        pages = self.client.pages(
+            self.index, self._bounded_query(cursor),
+            sort=[{self.time_field: {"order": "asc", "format": "epoch_millis"}}],
+            page_size=self.page_size, keep_alive=self.keep_alive,
+            source=self.source, use_pit=self.use_pit)
+        try:
+            for hits in pages:
+                fresh = [hit for hit in hits if hit["_id"] not in seen]
+                for hit in hits:
+                    timestamp = int(float(hit["sort"][0]))
+                    if timestamp != high_water:
+                        high_water = timestamp
+                        seen = set()
+                    seen.add(hit["_id"])
+                if fresh:
+                    on_page(fresh)
+                    count += len(fresh)
+        finally:
+            # Закрывает PIT, даже если обработка страницы прервалась
+            pages.close()
+        if high_water is not None:
+            self.store.put(self.key, {"timestamp": high_water, "ids": sorted(seen)})
+        return count
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Общий клиент Elastic; адрес и учётная запись — из раздела elastic конфига"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                settings = get_section("elastic")
+                _client = ElasticClient(
+                    settings["url"],
+                    username=settings.get("username") or login,
+                    password=lambda: get_secret("passElastic"),
+                    timeout=settings.get("timeout", 30),
+                    verify_tls=settings.get("verify_tls", True))
+    return _client
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def cursors_path(settings=None):
+    if settings is None:
+        settings = get_section("elastic")
+    return settings.get("cursors_file") or os.path.join(
+        data_dir("History"), "elastic_cursors.json")
+
+
+def check_errors(scan):
+    """Функция проверки для check_registry: params {"scan": "имя из elastic.scans"}"""
+    settings = get_section("elastic")
+    entry = settings.get("scans", {}).get(scan)
+    if entry is None:
+        raise LookupError(f"Поиск в Elastic не найден: {scan}")
+    message_field = entry.get("message_field", "message")
+    time_field = entry.get("time_field", "@timestamp")
+    sample_size = entry.get("sample", 5)
+    samples = []
+
+    def on_page(hits):
+        for hit in hits[:sample_size - len(samples)]:
+            samples.append(str(_field(hit.get("_source", {}), message_field))[:300])
+
+    time_s = time.perf_counter()
+    found = IncrementalScan(
+        get_client(), CursorStore(cursors_path(settings)), entry["index"],
+        entry["query"], time_field=time_field,
+        initial_window=entry.get("initial_window", settings.get("initial_window", "15m")),
+        page_size=settings.get("page_size", 1000),
+        keep_alive=settings.get("keep_alive", "1m"),
+        source=[message_field, time_field],
+        use_pit=settings.get("use_pit", True)).run(on_page)
+    elapsed = time.perf_counter() - time_s
+    for sample in samples:
+        log(sample, "error")
+    max_errors = entry.get("max_errors", 0)
+    if found > max_errors:
+        log(f"Новых ошибок в {entry['index']}: {found} (допустимо {max_errors},"
+            f" {elapsed:.2f} сек.)", "error")
+        return False
+    log(f"Новых ошибок в {entry['index']}: {found} ({elapsed:.2f} сек.)", "success")
+    return True
+
+
+def _field(source, path):
+    """Значение поля по пути через точку: "log.message\""""
+    value = source
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return ""
+        value = value.get(part, "")
+    return value
@@ -0,0 +1,499 @@
+import contextvars
+import inspect
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from services.aioloop import run_coroutine
+from services.cache import format_age, get_result_cache
+from services.cancel import CancelToken, CheckCancelled, bind_token, call_with_token
+from services.config import get_section
+from services.history import get_history
+from services.isolation import get_process_pool
+from services.logger import bind_log_context, bind_logging, current_log_context
+from services.metrics import CHECK_DURATION, CHECK_RUNS, RESOURCE_WAIT
+from services.registry import get_registry
+from services.scheduler import deadline_today, get_scheduler
+
+
+logger_ui = logging.getLogger(__name__)
+
+# Цвета сообщений в интерфейсе по типу сообщения
+MESSAGE_COLORS = {
+    "success": "green",
+    "error": "red",
+    "warning": "orange",
+    "info": "black"
+}
+
+
+async def _await_with_logging(awaitable, log_callback, log_context, token):
+    """Ожидает корутину проверки, направляя её log() в нужную вкладку"""
+    # Цикл событий живёт в своём потоке, поэтому контекст лога переносим явно
+    with bind_logging(log_callback), bind_log_context(**log_context), \
+            bind_token(token):
+        return await awaitable
+
+
+def call_check(func, log_callback, token=None):
+    """Вызывает функцию проверки; async-проверки выполняются в общем цикле событий"""
+    with bind_logging(log_callback), bind_token(token):
+        value = call_with_token(func, token)
+    if inspect.isawaitable(value):
+        value = run_coroutine(_await_with_logging(
+            value, log_callback, current_log_context(), token), token=token)
+    return value
+
+
+def outcome_label(result):
+    """Исход проверки для метрик: success, failure, error, timeout или cancelled"""
+    if result["success"]:
+        return "success"
+    if result.get("timed_out"):
+        return "timeout"
+    if "timed_out" in result:
+        return "cancelled"
+    return "error" if result.get("error") else "failure"
+
+
+class CheckListener:
+    """Получатель событий выполнения проверок (методы вызываются из потоков пула)"""
+
+    def on_log(self, message, message_type="info"):
+        pass
+
+    def on_check_started(self, check_name):
+        pass
+
+    def on_check_finished(self, check_name, success):
+        pass
+
+    def on_check_scheduled(self, check_name, deadline):
+        """Проверка отложена до deadline (datetime), поток пула освобождён"""
+        pass
+
+    def on_check_cached(self, check_name, age):
+        """Проверка не выполнялась: взят успешный результат возрастом age секунд"""
+        pass
+
+    def on_job_finished(self, results):
+        pass
+
+
+class CheckJob:
+    """Последовательный прогон проверок одной системы в общем пуле"""
+
+    def __init__(self, system, checks, listener, force_refresh=False):
+        self.system = system
+        self.checks = checks  # Список кортежей (check_name, func)
+        self.listener = listener or CheckListener()
+        # Выполнять проверки заново, даже если в кэше есть свежий результат
+        self.force_refresh = force_refresh
+        # Идентификатор запуска связывает записи в файле лога с результатами
+        self.run_id = uuid.uuid4().hex[:12]
+        self.results = []
+        self.future = Future()
+        self.next_index = 0  # Следующая проверка из checks
+        self.timer = None  # Таймер отложенной проверки, пока задача ждёт
+        self.token = None  # Токен отмены выполняющейся проверки
+        self._resume = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    @property
+    def is_running(self):
+        return not self._stop_event.is_set()
+
+    @property
+    def is_parked(self):
+        return self._resume is not None
+
+    def stop(self):
+        """Просит задачу остановиться после текущей проверки, не блокируя вызывающего"""
+        self._stop_event.set()
+        # Прерываем ожидания текущей проверки, не дожидаясь её завершения
+        token = self.token
+        if token is not None:
+            token.cancel()
+        # Отложенная задача не занимает поток, поэтому завершаем её сразу
+        self.wake()
+
+    def park(self, resume):
+        """Запоминает, как продолжить задачу, когда наступит срок или придёт stop()"""
+        with self._lock:
+            self._resume = resume
+
+    def wake(self):
+        """Продолжает отложенную задачу; повторные вызовы ничего не делают"""
+        with self._lock:
+            resume, self._resume = self._resume, None
+        if resume is None:
+            return
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        resume()
+
+    def done(self):
+        return self.future.done()
+
+    def wait(self, timeout=None):
+        self.future.result(timeout)
+        return self.results
+
+
+class CheckExecutor:
+    """Общий ограниченный пул для проверок всех систем с лимитами на ресурсы"""
+
+    def __init__(self, max_workers=6, resource_limits=None, registry=None,
+                 history=None, cache=None, default_ttl=0, check_timeout=None,
+                 cancel_grace=5.0, process_pool=None, isolated_systems=()):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="check")
+        self._semaphores = {
+            name: threading.BoundedSemaphore(limit)
+            for name, limit in (resource_limits or {}).items()
+        }
+        self._registry = registry
+        self._history = history
+        self._cache = cache
+        self._default_ttl = default_ttl
+        self._check_timeout = check_timeout
+        self._cancel_grace = cancel_grace
+        self._process_pool = process_pool
+        self._isolated_systems = set(isolated_systems)
+        self._jobs = set()
+        self._jobs_lock = threading.Lock()
+
+    def resources_for(self, system, check_name):
+        """Ресурсы, которые проверка занимает на время выполнения"""
+        if self._registry is None or not self._registry.has(system, check_name):
+            return []
+        resources = self._registry.spec(system, check_name).resources
+        # Сортировка задаёт единый порядок захвата и исключает взаимоблокировки
+        return sorted(r for r in resources if r in self._semaphores)
+
+    def ttl_for(self, system, check_name):
+        """Сколько секунд успешный результат проверки считается свежим"""
+        if self._registry is None or not self._registry.has(system, check_name):
+            return self._default_ttl
+        return self._registry.spec(system, check_name).options.get(
+            "ttl", self._default_ttl)
+
+    def timeout_for(self, system, check_name):
+        """Срок выполнения проверки в секундах или None"""
+        if self._registry is None or not self._registry.has(system, check_name):
+            return self._check_timeout
+        return self._registry.spec(system, check_name).options.get(
+            "timeout", self._check_timeout) or None
+
+    def is_isolated(self, system, check_name):
+        """Выполняется ли проверка в отдельном процессе"""
+        if self._process_pool is None or self._registry is None:
+            return False
+        if not self._registry.has(system, check_name):
+            return False
+        isolated = self._registry.spec(system, check_name).options.get("isolated")
+        if isolated is None:
+            return system in self._isolated_systems
+        return bool(isolated)
+
+    def submit(self, system, checks, listener=None, force_refresh=False):
+        """Ставит прогон проверок системы в очередь и возвращает CheckJob"""
+        job = CheckJob(system, checks, listener, force_refresh)
+        with self._jobs_lock:
+            self._jobs.add(job)
+        self._dispatch(job)
+        return job
+
+    def active_jobs(self):
+        with self._jobs_lock:
+            return list(self._jobs)
+
+    def stop_all(self):
+        for job in self.active_jobs():
+            job.stop()
+
+    def shutdown(self, wait=False):
+        self.stop_all()
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+    def deadline_for(self, system, check_name):
+        """Момент (time.time()), раньше которого проверку запускать нельзя, или None"""
+        if self._registry is None or not self._registry.has(system, check_name):
+            return None
+        at = self._registry.spec(system, check_name).options.get("at")
+        if not at:
+            return None
+        return deadline_today(at).timestamp()
+
+    def _dispatch(self, job):
+        """Отдаёт задачу (или её продолжение после ожидания) потоку пула"""
+        try:
+            pool_future = self._pool.submit(self._run_job, job)
+        except RuntimeError:
+            # Пул уже остановлен: завершаем задачу с тем, что успели выполнить
+            job.stop()
+            self._finish(job)
+            return
+        pool_future.add_done_callback(
+            lambda f: self._finish(job) if f.cancelled() else None)
+
+    def _park(self, job, check_name, deadline):
+        """Откладывает остаток задачи до срока, не занимая поток пула"""
+        deadline_dt = datetime.fromtimestamp(deadline)
+        with bind_log_context(system=job.system, check=check_name, run_id=job.run_id):
+            job.listener.on_log(
+                f"{check_name}: запуск в {deadline_dt:%H:%M:%S}", "info")
+        job.listener.on_check_scheduled(check_name, deadline_dt)
+        job.park(lambda: self._dispatch(job))
+        job.timer = get_scheduler().call_at(deadline, job.wake)
+        if not job.is_running:
+            job.wake()
+
+    def _run_job(self, job):
+        try:
+            while job.next_index < len(job.checks) and job.is_running:
+                check_name, func = job.checks[job.next_index]
+                deadline = self.deadline_for(job.system, check_name)
+                if deadline is not None and deadline > time.time():
+                    self._park(job, check_name, deadline)
+                    return job.results
+                job.next_index += 1
+                job.results.append(self._run_check(job, check_name, func))
+        except Exception as e:
+            logger_ui.error(f"Ошибка в задаче {job.system}: {e}")
+            job.listener.on_log(f"[ОШИБКА] {str(e)}", "error")
+        self._finish(job)
+        return job.results
+
+    def _finish(self, job):
+        with self._jobs_lock:
+            if job not in self._jobs:
+                return
+            self._jobs.discard(job)
+        try:
+            self._record(job)
+            job.listener.on_job_finished(job.results)
+        finally:
+            job.future.set_result(job.results)
+
+    def _record(self, job):
+        """Сохраняет результаты прогона в историю; сбой записи не роняет задачу"""
+        if self._history is None:
+            return
+        try:
+            # Результаты из кэша не выполнялись и не должны влиять на статистику
+            self._history.record_job(
+                job.run_id, [r for r in job.results if not r.get("cached")])
+        except Exception as e:
+            logger_ui.error(f"Не удалось сохранить историю {job.system}: {e}")
+
+    def _acquire(self, job, resources):
+        """Захватывает ресурсы, периодически проверяя запрос на остановку"""
+        acquired = []
+        for name in resources:
+            semaphore = self._semaphores[name]
+            while not semaphore.acquire(timeout=0.5):
+                if not job.is_running:
+                    self._release(acquired)
+                    return None
+            acquired.append(name)
+        return acquired
+
+    def _release(self, resources):
+        for name in reversed(resources):
+            self._semaphores[name].release()
+
+    def _from_cache(self, job, check_name):
+        """Свежий успешный результат из кэша или None"""
+        if self._cache is None or job.force_refresh:
+            return None
+        ttl = self.ttl_for(job.system, check_name)
+        if not ttl:
+            return None
+        return self._cache.get((job.system, check_name), ttl)
+
+    def _store(self, job, check_name, result):
+        if self._cache is None:
+            return
+        if result["success"]:
+            self._cache.put((job.system, check_name), dict(result))
+        else:
+            # Свежая ошибка отменяет ранее сохранённый успешный результат
+            self._cache.invalidate(job.system, check_name)
+
+    def _run_cached(self, job, check_name, cached):
+        listener = job.listener
+        stored, age = cached
+        result = dict(stored, run_id=job.run_id, cached=True, age=round(age, 1))
+        listener.on_check_started(check_name)
+        listener.on_log(
+            f"{check_name}: успешно {format_age(age)} назад, результат из кэша",
+            "success")
+        listener.on_check_finished(check_name, True)
+        listener.on_check_cached(check_name, age)
+        CHECK_RUNS.inc(system=job.system, check=check_name, outcome="cached")
+        return result
+
+    def _run_check(self, job, check_name, func):
+        cached = self._from_cache(job, check_name)
+        if cached is not None:
+            with bind_log_context(
+                    system=job.system, check=check_name, run_id=job.run_id):
+                return self._run_cached(job, check_name, cached)
+        result = {"system": job.system, "check": check_name,
+                  "run_id": job.run_id, "success": False}
+        labels = {"system": job.system, "check": check_name}
+        with RESOURCE_WAIT.time(**labels):
+            acquired = self._acquire(job, self.resources_for(job.system, check_name))
+        if acquired is None:
+            result["error"] = "Остановлено"
+            result["duration"] = 0.0
+            CHECK_RUNS.inc(outcome="cancelled", **labels)
+            return result
+        result["started_at"] = datetime.now().isoformat(timespec="seconds")
+        time_s = time.time()
+        time_p = time.perf_counter()
+        token = CancelToken(self.timeout_for(job.system, check_name))
+        # Ресурсы свободны, только когда тело проверки действительно завершилось
+        token.defer(lambda: self._release(acquired))
+        try:
+            with bind_log_context(
+                    system=job.system, check=check_name, run_id=job.run_id):
+                self._call(job, check_name, func, result, token)
+        finally:
+            if not token.abandoned:
+                token.close()
+        CHECK_DURATION.observe(time.perf_counter() - time_p, **labels)
+        CHECK_RUNS.inc(outcome=outcome_label(result), **labels)
+        result["duration"] = round(time.time() - time_s, 3)
+        self._store(job, check_name, result)
+        return result
+
+    def _call(self, job, check_name, func, result, token):
+        listener = job.listener
+        listener.on_check_started(check_name)
+        listener.on_log(f"Начало проверки: {check_name}", "info")
+        timeout = self.timeout_for(job.system, check_name)
+        job.token = token
+        if not job.is_running:
+            token.cancel()
+        try:
+            if self.is_isolated(job.system, check_name):
+                spec = self._registry.spec(job.system, check_name)
+                value = self._process_pool.run(
+                    spec.target, token, timeout, listener.on_log, spec.params)
+            else:
+                value = self._call_with_deadline(job, func, token, timeout)
+            result["success"] = bool(value) if value is not None else False
+        except CheckCancelled as e:
+            result["error"] = str(e)
+            result["timed_out"] = token.timed_out
+            logger_ui.warning(f"{job.system}/{check_name}: {e}")
+            listener.on_log(f"{check_name}: {e}", "error")
+        except Exception as e:
+            logger_ui.error(
+                f"Ошибка при выполнении {job.system}/{check_name}: {e}")
+            listener.on_log(
+                f"Ошибка при выполнении {check_name}: {str(e)}", "error")
+            result["error"] = str(e)
+        success = result["success"]
+        listener.on_log(
+            f"Завершено: {check_name} — {'Успешно' if success else 'ОШИБКА'}",
+            "success" if success else "error")
+        listener.on_check_finished(check_name, success)
+        job.token = None
+
+    def _call_with_deadline(self, job, func, token, timeout):
+        """Выполняет проверку в отдельном потоке и ждёт её не дольше срока
+
+        По истечении срока или при остановке токен отменяется; если проверка не
+        завершилась и за cancel_grace секунд, поток бросается, а слот пула
+        освобождается для следующей проверки. Ресурсы проверки брошенный поток
+        освобождает сам, когда всё-таки завершится.
+        """
+        outcome = {}
+        done = threading.Event()
+        wake = threading.Event()
+        abandoned = threading.Event()
+
+        def log_callback(message, message_type="info"):
+            # Брошенная проверка больше не пишет во вкладку
+            if not abandoned.is_set():
+                job.listener.on_log(message, message_type)
+
+        def target():
+            try:
+                outcome["value"] = call_check(func, log_callback, token)
+            except BaseException as e:
+                outcome["error"] = e
+            finally:
+                # Закрыть токен может и исполнитель; выполнится только первое закрытие
+                token.close()
+                done.set()
+                wake.set()
+
+        remove = token.on_cancel(wake.set)
+        context = contextvars.copy_context()
+        thread = threading.Thread(
+            target=context.run, args=(target,),
+            name=f"{threading.current_thread().name}-body", daemon=True)
+        thread.start()
+        try:
+            wake.wait(timeout)
+            if not done.is_set() and not token.cancelled:
+                token.cancel(
+                    f"Превышено время выполнения ({timeout:g} с)", timed_out=True)
+            if not done.wait(self._cancel_grace):
+                abandoned.set()
+                token.abandoned = True
+                raise CheckCancelled(
+                    f"{token.reason}; проверка не ответила на отмену "
+                    f"за {self._cancel_grace:g} с и брошена")
+        finally:
+            remove()
+        # Успешный результат, готовый до поздней отмены, не теряем
+        if token.cancelled and not outcome.get("value"):
+            raise CheckCancelled(token.reason)
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["value"]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Общий исполнитель проверок, настраивается разделом executor в конфиге"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                settings = get_section("executor")
+                isolation = get_section("isolation")
+                _executor = CheckExecutor(
+                    max_workers=settings.get("max_workers", 6),
+                    resource_limits=settings.get("resources", {}),
+                    registry=get_registry(),
+                    history=get_history(),
+                    cache=get_result_cache(),
+                    default_ttl=get_section("result_cache").get("default_ttl", 0),
+                    check_timeout=settings.get("check_timeout"),
+                    cancel_grace=settings.get("cancel_grace", 5.0),
+                    process_pool=get_process_pool(isolation.get("pool_size", 2))
+                    if isolation.get("enabled") else None,
+                    isolated_systems=isolation.get("systems", [])
+                )
+    return _executor
+
+
+def shutdown_executor(wait=False):
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
@@ -0,0 +1,180 @@
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from services.config import get_section
+from services.paths import data_dir
+
+
+logger_ui = logging.getLogger(__name__)
+
+WEEKDAYS = ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS check_runs (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    system TEXT NOT NULL,
+    check_name TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    weekday INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    message TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_check_runs_lookup
+    ON check_runs (system, check_name, started_at);
+CREATE INDEX IF NOT EXISTS idx_check_runs_started
+    ON check_runs (started_at);
+"""
+
+
+def outcome_of(result):
+    """Итог проверки для истории: success, error, timeout или stopped"""
+    if result.get("success"):
+        return "success"
+    if result.get("timed_out"):
+        return "timeout"
+    if result.get("error") == "Остановлено":
+        return "stopped"
+    return "error"
+
+
+class HistoryStore:
+    """История выполнения проверок в локальной базе SQLite"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            # WAL позволяет читать историю, пока проверки дописывают новые строки
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+
+    def record_job(self, run_id, results):
+        """Записывает все результаты прогона одной транзакцией"""
+        rows = []
+        now = datetime.now().isoformat(timespec="seconds")
+        for result in results:
+            started_at = result.get("started_at") or now
+            rows.append((
+                run_id,
+                result["system"],
+                result["check"],
+                started_at,
+                datetime.fromisoformat(started_at).weekday(),
+                result.get("duration", 0.0),
+                outcome_of(result),
+                result.get("error", "")
+            ))
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO check_runs (run_id, system, check_name, started_at,"
+                " weekday, duration, outcome, message)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def _where(self, system=None, check_name=None, since=None, until=None,
+               weekday=None, outcome=None):
+        clauses, params = [], []
+        for column, value in (("system", system), ("check_name", check_name),
+                              ("weekday", weekday), ("outcome", outcome)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(_iso(since))
+        if until is not None:
+            clauses.append("started_at < ?")
+            params.append(_iso(until))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def query(self, system=None, check_name=None, since=None, until=None,
+              weekday=None, outcome=None, limit=500):
+        """Последние запуски по фильтру, от новых к старым"""
+        where, params = self._where(
+            system, check_name, since, until, weekday, outcome)
+        sql = ("SELECT run_id, system, check_name, started_at, duration,"
+               f" outcome, message FROM check_runs{where}"
+               " ORDER BY started_at DESC LIMIT ?")
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit]).fetchall()
+        return [dict(row) for row in rows]
+
+    def duration_stats(self, system=None, check_name=None, since=None,
+                       until=None, weekday=None):
+        """Число запусков, доля успешных и длительность (средняя, мин., макс.)"""
+        where, params = self._where(system, check_name, since, until, weekday)
+        sql = ("SELECT COUNT(*) AS runs,"
+               " SUM(outcome = 'success') AS succeeded,"
+               " AVG(duration) AS avg_duration,"
+               " MIN(duration) AS min_duration,"
+               f" MAX(duration) AS max_duration FROM check_runs{where}")
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        return dict(row)
+
+    def stats_by_weekday(self, system=None, check_name=None, since=None,
+                         until=None):
+        """Статистика длительности по дням недели (0 — понедельник)"""
+        where, params = self._where(system, check_name, since, until)
+        sql = ("SELECT weekday, COUNT(*) AS runs,"
+               " SUM(outcome = 'success') AS succeeded,"
+               " AVG(duration) AS avg_duration,"
+               " MAX(duration) AS max_duration"
+               f" FROM check_runs{where} GROUP BY weekday ORDER BY weekday")
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def system_durations(self, system, since=None, until=None, weekday=None):
+        """Длительность прогонов системы целиком: сумма проверок одного run_id"""
+        where, params = self._where(system, None, since, until, weekday)
+        sql = ("SELECT run_id, MIN(started_at) AS started_at,"
+               " SUM(duration) AS duration, COUNT(*) AS checks"
+               f" FROM check_runs{where}"
+               " GROUP BY run_id ORDER BY started_at DESC")
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _iso(value):
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="seconds")
+    return str(value)
+
+
+_history = None
+_history_lock = threading.Lock()
+
+
+def history_path():
+    settings = get_section("history")
+    return settings.get("path") or os.path.join(
+        data_dir("History"), "history.sqlite3")
+
+
+def get_history():
+    """Общее хранилище истории; None, если история отключена в конфиге"""
+    global _history
+    if not get_section("history").get("enabled", True):
+        return None
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                _history = HistoryStore(history_path())
+                logger_ui.info(f'История проверок: {_history.path}')
+    return _history
@@ -0,0 +1,290 @@
+import contextvars
+import logging
+import re
+import socket
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import urllib3
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import (
+    ConnectTimeoutError, HTTPError, NameResolutionError, NewConnectionError)
+from services.cancel import CheckCancelled, current_token
+from services.config import get_section
+from services.logger import log
+from services.metrics import observe_call
+
+
+logger_ui = logging.getLogger(__name__)
+
+# Замеры текущего запроса: соединения пула пишут сюда DNS и установку соединения
+_timing = threading.local()
+
+
+class _TimedConnectionMixin:
+    """Соединение urllib3, которое отдельно замеряет DNS и подключение (с TLS)"""
+
+    def _new_conn(self):
+        dns_host = self._dns_host
+        time_s = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(dns_host, self.port, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        _timing.dns = time.perf_counter() - time_s
+        last_error = None
+        # Подключаемся к уже найденным адресам, чтобы не разрешать имя второй раз
+        for *_, sockaddr in addresses:
+            self._dns_host = sockaddr[0]
+            try:
+                return super()._new_conn()
+            except (NewConnectionError, ConnectTimeoutError) as e:
+                last_error = e
+            finally:
+                self._dns_host = dns_host
+        raise last_error
+
+    def connect(self):
+        time_s = time.perf_counter()
+        super().connect()
+        _timing.connect = time.perf_counter() - time_s - _timing.dns
+        _timing.new_connection = True
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class HttpEndpoint:
+    """Адрес из раздела http_checks: что запросить и какой ответ считать успешным"""
+
+    def __init__(self, entry, defaults=None):
+        if isinstance(entry, str):
+            entry = {"url": entry}
+        entry = dict(defaults or {}, **entry)
+        self.url = entry["url"]
+        self.name = entry.get("name", self.url)
+        self.method = entry.get("method", "GET").upper()
+        expect = entry.get("expect_status", [200])
+        self.expect_status = {expect} if isinstance(expect, int) else set(expect)
+        pattern = entry.get("body_pattern")
+        self.body_pattern = re.compile(pattern) if pattern else None
+        self.max_latency = entry.get("max_latency")
+        self.timeout = entry.get("timeout")
+        self.headers = entry.get("headers", {})
+        self.body = entry.get("body")
+
+    def verify(self, status, body, total):
+        """Текст ошибки или None, если ответ соответствует ожиданиям"""
+        if status not in self.expect_status:
+            return f"код ответа {status}, ожидался {sorted(self.expect_status)}"
+        if self.body_pattern is not None and not self.body_pattern.search(body):
+            return f"в ответе нет «{self.body_pattern.pattern}»"
+        if self.max_latency and total > self.max_latency:
+            return f"ответ за {total:.2f} сек., допустимо {self.max_latency:g}"
+        return None
+
+
+class HttpChecker:
+    """Общий пул keep-alive соединений и параллельный опрос адресов"""
+
+    def __init__(self, concurrency=16, per_host=4, timeout=10, verify_tls=True,
+                 user_agent="AutoCheck", max_body=1048576):
+        self.timeout = timeout
+        self.max_body = max_body
+        # block=True: не больше per_host соединений на хост, остальные ждут в очереди
+        self._manager = urllib3.PoolManager(
+            num_pools=64, maxsize=per_host, block=True, retries=False,
+            headers={"User-Agent": user_agent},
+            cert_reqs="CERT_REQUIRED" if verify_tls else "CERT_NONE")
+        self._manager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool, "https": TimedHTTPSConnectionPool}
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="http-check")
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "connections": 0, "errors": 0}
+
+    def fetch(self, endpoint, token=None):
+        """Один запрос; результат с кодом ответа и замерами dns/connect/ttfb/total"""
+        token = token or current_token()
+        result = {"name": endpoint.name, "url": endpoint.url, "status": None,
+                  "ok": False, "error": None, "dns": 0.0, "connect": 0.0,
+                  "ttfb": 0.0, "total": 0.0, "bytes": 0, "new_connection": False}
+        token.raise_if_cancelled()
+        timeout = endpoint.timeout or self.timeout
+        remaining = token.remaining()
+        if remaining is not None:
+            timeout = max(0.1, min(timeout, remaining))
+        _timing.dns = _timing.connect = 0.0
+        _timing.new_connection = False
+        time_s = time.perf_counter()
+        try:
+            response = self._manager.request(
+                endpoint.method, endpoint.url, body=endpoint.body,
+                headers=dict(self._manager.headers, **endpoint.headers),
+                preload_content=False,
+                timeout=urllib3.Timeout(connect=timeout, read=timeout),
+                pool_timeout=timeout, redirect=False)
+            headers_at = time.perf_counter()
+            try:
+                raw = response.read(self.max_body) if endpoint.method != "HEAD" else b""
+                result["bytes"] = len(raw)
+            finally:
+                # Недочитанное тело сбрасываем, чтобы соединение вернулось в пул
+                response.drain_conn()
+                response.release_conn()
+            result["total"] = time.perf_counter() - time_s
+            result["status"] = response.status
+            result["ttfb"] = headers_at - time_s - _timing.dns - _timing.connect
+            body = raw.decode("utf-8", errors="replace") if endpoint.body_pattern else ""
+            result["error"] = endpoint.verify(response.status, body, result["total"])
+        except HTTPError as e:
+            result["total"] = time.perf_counter() - time_s
+            result["error"] = _describe(e)
+        result["dns"] = _timing.dns
+        result["connect"] = _timing.connect
+        result["new_connection"] = _timing.new_connection
+        result["ok"] = result["error"] is None
+        observe_call("http", endpoint.name, result["total"], not result["ok"])
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["connections"] += result["new_connection"]
+            self._stats["errors"] += not result["ok"]
+        return result
+
+    def run(self, endpoints, token=None):
+        """Опрашивает адреса параллельно; результаты в порядке endpoints"""
+        token = token or current_token()
+        if not endpoints:
+            return []
+        # Копия контекста несёт в потоки пула метки system/check для метрик
+        futures = [self._executor.submit(
+            contextvars.copy_context().run, self.fetch, endpoint, token)
+            for endpoint in endpoints]
+        finished = threading.Event()
+        pending = [len(futures)]
+        pending_lock = threading.Lock()
+
+        def on_done(_):
+            with pending_lock:
+                pending[0] -= 1
+                if pending[0] == 0:
+                    finished.set()
+
+        for future in futures:
+            future.add_done_callback(on_done)
+        # Остановка проверки прерывает ожидание, не дожидаясь таймаутов запросов
+        remove = token.on_cancel(finished.set)
+        try:
+            finished.wait()
+        finally:
+            remove()
+        if token.cancelled:
+            for future in futures:
+                future.cancel()
+            raise CheckCancelled(token.reason)
+        return [future.result() for future in futures]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._manager.clear()
+
+
+def _describe(error):
+    """Короткая причина сетевой ошибки для лога проверки"""
+    if isinstance(error, NameResolutionError):
+        return "имя хоста не найдено"
+    # NewConnectionError наследует ConnectTimeoutError, поэтому проверяется первой
+    if isinstance(error, NewConnectionError):
+        return "не удалось подключиться"
+    if isinstance(error, ConnectTimeoutError):
+        return "таймаут подключения"
+    reason = getattr(error, "reason", None)
+    return str(reason or error)
+
+
+_checker = None
+_checker_lock = threading.Lock()
+
+
+def get_checker():
+    """Общий HttpChecker; параметры пула — из раздела http_checks конфига"""
+    global _checker
+    if _checker is None:
+        with _checker_lock:
+            if _checker is None:
+                settings = get_section("http_checks")
+                _checker = HttpChecker(
+                    concurrency=settings.get("concurrency", 16),
+                    per_host=settings.get("per_host", 4),
+                    timeout=settings.get("timeout", 10),
+                    verify_tls=settings.get("verify_tls", True),
+                    user_agent=settings.get("user_agent", "AutoCheck"))
+    return _checker
+
+
+def close_checker():
+    global _checker
+    with _checker_lock:
+        if _checker is not None:
+            _checker.close()
+            _checker = None
+
+
+def load_suite(name, settings=None):
+    """Адреса набора из http_checks.suites с умолчаниями набора"""
+    if settings is None:
+        settings = get_section("http_checks")
+    suite = settings.get("suites", {}).get(name)
+    if suite is None:
+        raise LookupError(f"Набор HTTP-проверок не найден: {name}")
+    defaults = suite.get("defaults", {})
+    return [HttpEndpoint(entry, defaults) for entry in suite.get("endpoints", [])]
+
+
+def run_suite(suite, token=None):
+    """Функция проверки для check_registry: params {"suite": "имя набора"}"""
+    try:
+        endpoints = load_suite(suite)
+    except LookupError as e:
+        log(str(e), "error")
+        return False
+    if not endpoints:
+        # Пустой набор — ошибка конфига, а не успешная проверка
+        log(f"В наборе «{suite}» не задано ни одного адреса", "error")
+        return False
+    time_s = time.perf_counter()
+    results = get_checker().run(endpoints, token)
+    failed = [result for result in results if not result["ok"]]
+    for result in failed:
+        log(f"{result['name']}: {result['error']}", "error")
+    for result in results:
+        logger_ui.debug(
+            f"{result['url']}: {result['status']} dns {result['dns']:.3f}"
+            f" connect {result['connect']:.3f} ttfb {result['ttfb']:.3f}"
+            f" total {result['total']:.3f}")
+    slowest = max(results, key=lambda result: result["total"])
+    median = statistics.median(result["total"] for result in results)
+    log(f"Доступно {len(results) - len(failed)} из {len(results)} за "
+        f"{time.perf_counter() - time_s:.2f} сек. (медиана {median:.2f},"
+        f" дольше всех {slowest['name']} — {slowest['total']:.2f})",
+        "error" if failed else "success")
+    return not failed
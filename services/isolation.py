@@ -0,0 +1,266 @@
+import asyncio
+import functools
+import inspect
+import logging
+import multiprocessing
+import threading
+import time
+from services.cancel import CancelToken, CheckCancelled, call_with_token
+from services.logger import bind_logging
+
+
+logger_ui = logging.getLogger(__name__)
+
+
+class _PipeLogHandler(logging.Handler):
+    """Отправляет записи лога дочернего процесса в основной процесс"""
+
+    def __init__(self, send):
+        super().__init__(logging.INFO)
+        self._send = send
+
+    def emit(self, record):
+        try:
+            self._send(("record", record.levelno, record.name, record.getMessage()))
+        except Exception:
+            self.handleError(record)
+
+
+def _worker_main(conn):
+    """Цикл рабочего процесса: получает задания, возвращает логи и результат"""
+    from services.registry import resolve_target
+    send_lock = threading.Lock()
+
+    def send(message):
+        with send_lock:
+            conn.send(message)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.INFO)
+    root_logger.addHandler(_PipeLogHandler(send))
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            return
+        if task is None:
+            return
+        target, params = task
+        try:
+            with bind_logging(lambda message, message_type="info": send(
+                    ("log", message, message_type))):
+                # Отмена в процессе — это его завершение, поэтому токен не отменяется
+                func = resolve_target(target)
+                if params:
+                    func = functools.partial(func, **params)
+                value = call_with_token(func, CancelToken())
+                if inspect.isawaitable(value):
+                    value = asyncio.run(_as_coroutine(value))
+            send(("result", _picklable(value), None))
+        except BaseException as e:
+            send(("result", None, f"{type(e).__name__}: {e}"))
+
+
+async def _as_coroutine(awaitable):
+    return await awaitable
+
+
+def _picklable(value):
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return bool(value)
+
+
+class WorkerProcess:
+    """Рабочий процесс и его конец канала"""
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.tasks = 0
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(2)
+        except Exception as e:
+            logger_ui.error(f'Ошибка при завершении процесса проверки: {e}')
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+            self.process.join(2)
+        except (OSError, ValueError):
+            pass
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class ProcessPool:
+    """Пул процессов для изолированных проверок: зависший процесс убивается и заменяется"""
+
+    def __init__(self, size=2, start_method="spawn", poll_interval=0.1):
+        self.size = size
+        self.poll_interval = poll_interval
+        self._ctx = multiprocessing.get_context(start_method)
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {"started": 0, "killed": 0, "tasks": 0}
+
+    def _start_worker(self):
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main, args=(child_conn,),
+            name="check-worker", daemon=True)
+        process.start()
+        child_conn.close()
+        with self._condition:
+            self._stats["started"] += 1
+        logger_ui.info(f'Запущен процесс проверок (pid {process.pid})')
+        return WorkerProcess(process, parent_conn)
+
+    def acquire(self, token):
+        """Свободный процесс; новый запускается, пока не достигнут размер пула"""
+        remove = token.on_cancel(self._wake_waiters)
+        try:
+            with self._condition:
+                while True:
+                    token.raise_if_cancelled()
+                    if self._closed:
+                        raise RuntimeError("Пул процессов закрыт")
+                    while self._idle:
+                        worker = self._idle.pop()
+                        if worker.process.is_alive():
+                            return worker
+                        self._total -= 1
+                    if self._total < self.size:
+                        self._total += 1
+                        break
+                    self._condition.wait()
+        finally:
+            remove()
+        try:
+            return self._start_worker()
+        except Exception:
+            self._forget()
+            raise
+
+    def release(self, worker):
+        with self._condition:
+            if not self._closed:
+                self._idle.append(worker)
+                self._condition.notify()
+                return
+        worker.stop()
+
+    def _wake_waiters(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    def _forget(self):
+        with self._condition:
+            self._total -= 1
+            self._condition.notify()
+
+    def _kill(self, worker):
+        """Убивает процесс и сразу запускает замену в фоне"""
+        worker.kill()
+        with self._condition:
+            self._stats["killed"] += 1
+        self._forget()
+        threading.Thread(target=self._replace, daemon=True).start()
+
+    def _replace(self):
+        with self._condition:
+            if self._closed or self._total >= self.size:
+                return
+            self._total += 1
+        try:
+            worker = self._start_worker()
+        except Exception as e:
+            logger_ui.error(f'Не удалось запустить процесс проверок: {e}')
+            self._forget()
+            return
+        self.release(worker)
+
+    def run(self, target, token, timeout=None, log_callback=None, params=None):
+        """Выполняет проверку "модуль:функция" в рабочем процессе"""
+        worker = self.acquire(token)
+        time_s = time.monotonic()
+        try:
+            worker.conn.send((target, params or {}))
+            worker.tasks += 1
+            with self._condition:
+                self._stats["tasks"] += 1
+            while True:
+                if token.cancelled:
+                    break
+                if timeout and time.monotonic() - time_s > timeout:
+                    token.cancel(
+                        f"Превышено время выполнения ({timeout:g} с)", timed_out=True)
+                    break
+                if not worker.conn.poll(self.poll_interval):
+                    if not worker.process.is_alive():
+                        raise RuntimeError(
+                            f"Процесс проверки завершился (код {worker.process.exitcode})")
+                    continue
+                message = worker.conn.recv()
+                if message[0] == "log":
+                    if log_callback is not None:
+                        log_callback(message[1], message[2])
+                elif message[0] == "record":
+                    logging.getLogger(message[2]).log(message[1], message[3])
+                elif message[0] == "result":
+                    _, value, error = message
+                    self.release(worker)
+                    worker = None
+                    if error is not None:
+                        raise RuntimeError(error)
+                    return value
+        except (EOFError, OSError) as e:
+            raise RuntimeError(f"Потеряна связь с процессом проверки: {e}") from None
+        finally:
+            if worker is not None:
+                # Процесс мог зависнуть в нативном коде — завершаем его целиком
+                self._kill(worker)
+        raise CheckCancelled(token.reason)
+
+    def stats(self):
+        with self._condition:
+            return dict(self._stats, size=self.size, total=self._total,
+                        idle=len(self._idle))
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for worker in idle:
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool(size=2):
+    """Общий пул процессов; процессы запускаются при первой изолированной проверке"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPool(size)
+    return _pool
+
+
+def shutdown_process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,215 @@
+import logging
+import operator
+import threading
+import time
+from array import array
+from itertools import repeat
+from services.config import get_section
+from services.lazy import import_module
+from services.logger import current_log_context
+from services.metrics import timed_call
+from services.registry import resolve_target
+
+
+logger_ui = logging.getLogger(__name__)
+
+
+class KafkaPythonBackend:
+    """Чтение метаданных и смещений через kafka-python: запросы пакетами, а не по партиции"""
+
+    def __init__(self, bootstrap_servers, request_timeout=30, **client_options):
+        self.options = dict(client_options, bootstrap_servers=bootstrap_servers,
+                            request_timeout_ms=int(request_timeout * 1000))
+        self._admin = None
+        self._consumer = None
+
+    def _clients(self):
+        if self._admin is None:
+            kafka = import_module("kafka")
+            self._admin = import_module("kafka.admin").KafkaAdminClient(**self.options)
+            self._consumer = kafka.KafkaConsumer(
+                enable_auto_commit=False, **self.options)
+        return self._admin, self._consumer
+
+    def fetch(self, groups=None):
+        """Топики с партициями, последние смещения и смещения групп"""
+        admin, consumer = self._clients()
+        TopicPartition = import_module("kafka").TopicPartition
+        topics = {}
+        for topic in admin.describe_topics():
+            if topic["is_internal"]:
+                continue
+            topics[topic["topic"]] = [
+                (p["partition"], p["leader"], len(p["replicas"]), len(p["isr"]))
+                for p in topic["partitions"]]
+        partitions = [TopicPartition(topic, p[0])
+                      for topic, parts in topics.items() for p in parts]
+        # Один запрос ListOffsets на брокера для всех партиций сразу
+        end_offsets = {(tp.topic, tp.partition): offset
+                       for tp, offset in consumer.end_offsets(partitions).items()}
+        if groups is None:
+            groups = [group for group, _ in admin.list_consumer_groups()]
+        described = {info.group: info for info in admin.describe_consumer_groups(groups)}
+        group_data = {}
+        for group in groups:
+            info = described.get(group)
+            group_data[group] = {
+                "state": info.state if info else "Dead",
+                "members": len(info.members) if info else 0,
+                "offsets": {(tp.topic, tp.partition): meta.offset for tp, meta in
+                            admin.list_consumer_group_offsets(group).items()}}
+        return {"topics": topics, "end_offsets": end_offsets, "groups": group_data}
+
+    def close(self):
+        for client in (self._consumer, self._admin):
+            if client is not None:
+                try:
+                    client.close()
+                except Exception as e:
+                    logger_ui.warning(f"Ошибка при закрытии клиента Kafka: {e}")
+        self._admin = self._consumer = None
+
+
+class GroupLag:
+    """Задержка группы по всем партициям кластера (у чужих топиков — 0)"""
+
+    def __init__(self, name, state, members, committed, lag, consumed_topics):
+        self.name = name
+        self.state = state
+        self.members = members
+        self.committed = committed
+        self.lag = lag
+        self.consumed_topics = consumed_topics
+        self.total = sum(lag)
+        self.max = max(lag) if lag else 0
+        self.max_index = lag.index(self.max) if lag else -1
+
+
+class KafkaSnapshot:
+    """Снимок кластера в массивах: одна позиция массива — одна партиция"""
+
+    def __init__(self, raw, taken_at=None):
+        self.taken_at = taken_at or time.time()
+        self.topics = sorted(raw["topics"])
+        self.topic_of = array("i")
+        self.partition = array("i")
+        self.leader = array("i")
+        self.replicas = array("i")
+        self.isr = array("i")
+        self._index = {}
+        for topic_id, topic in enumerate(self.topics):
+            for partition, leader, replicas, isr in sorted(raw["topics"][topic]):
+                self._index[(topic, partition)] = len(self.partition)
+                self.topic_of.append(topic_id)
+                self.partition.append(partition)
+                self.leader.append(leader)
+                self.replicas.append(replicas)
+                self.isr.append(isr)
+        size = len(self.partition)
+        self.end = array("q", bytes(8 * size))
+        for key, offset in raw["end_offsets"].items():
+            index = self._index.get(key)
+            if index is not None:
+                self.end[index] = offset
+        self.groups = {name: self._group_lag(name, data)
+                       for name, data in raw["groups"].items()}
+
+    def _group_lag(self, name, data):
+        # Незакоммиченные партиции считаем дочитанными: committed = end, задержка 0
+        committed = array("q", self.end)
+        consumed = set()
+        for key, offset in data["offsets"].items():
+            index = self._index.get(key)
+            if index is not None and offset >= 0:
+                committed[index] = offset
+                consumed.add(key[0])
+        # Задержка по всем партициям одним проходом; отрицательная (после пересоздания топика) — 0
+        lag = array("q", map(max, map(operator.sub, self.end, committed), repeat(0)))
+        return GroupLag(name, data.get("state", ""), data.get("members", 0),
+                        committed, lag, consumed)
+
+    def __len__(self):
+        return len(self.partition)
+
+    def describe(self, index):
+        return f"{self.topics[self.topic_of[index]]}[{self.partition[index]}]"
+
+    def offline(self):
+        """Партиции без лидера"""
+        return [index for index, leader in enumerate(self.leader) if leader < 0]
+
+    def under_replicated(self):
+        return [index for index, (replicas, isr) in
+                enumerate(zip(self.replicas, self.isr)) if isr < replicas]
+
+
+class SnapshotCache:
+    """Один снимок на прогон: все проверки системы K читают его, а не кластер"""
+
+    def __init__(self, backend, max_age=30, groups=None):
+        self.backend = backend
+        self.max_age = max_age
+        self.groups = groups
+        self.fetches = 0
+        self._snapshot = None
+        self._run_id = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        run_id = current_log_context().get("run_id")
+        # Проверки одного прогона ждут первый запрос, а не делают свой
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                fresh = False
+            elif run_id is not None:
+                # Новый прогон (в том числе повторный вручную) всегда читает кластер заново
+                fresh = run_id == self._run_id
+            else:
+                fresh = time.time() - snapshot.taken_at < self.max_age
+            if not fresh:
+                time_s = time.perf_counter()
+                with timed_call("kafka", "snapshot"):
+                    snapshot = KafkaSnapshot(self.backend.fetch(self.groups))
+                self.fetches += 1
+                logger_ui.info(
+                    f"Снимок Kafka: {len(snapshot.topics)} топиков, {len(snapshot)} партиций,"
+                    f" {len(snapshot.groups)} групп за {time.perf_counter() - time_s:.2f} сек.")
+                self._snapshot = snapshot
+                self._run_id = run_id
+            return snapshot
+
+    def close(self):
+        close = getattr(self.backend, "close", None)
+        if close is not None:
+            close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_snapshot():
+    """Снимок кластера из раздела kafka конфига (общий для всех проверок K)"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                settings = get_section("kafka")
+                backend_cls = resolve_target(
+                    settings.get("backend", "services.kafka_snapshot:KafkaPythonBackend"))
+                backend = backend_cls(
+                    settings.get("bootstrap_servers", "localhost:9092"),
+                    **settings.get("client_options", {}))
+                groups = list(settings.get("groups", {})) or None
+                _cache = SnapshotCache(
+                    backend, settings.get("snapshot_max_age", 30), groups)
+    return _cache.get()
+
+
+def close_snapshot_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
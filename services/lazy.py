@@ -0,0 +1,34 @@
+import importlib
+import logging
+import sys
+import threading
+import time
+
+
+logger_ui = logging.getLogger(__name__)
+
+# Время первого импорта модулей, загруженных через import_module
+_import_times = {}
+_import_times_lock = threading.Lock()
+
+
+def import_module(name):
+    """Импортирует модуль при первом обращении и запоминает стоимость импорта"""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    time_s = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = time.perf_counter() - time_s
+    with _import_times_lock:
+        if name in _import_times:
+            return module
+        _import_times[name] = elapsed
+    logger_ui.info(f"Импорт {name}: {elapsed:.3f} сек.")
+    return module
+
+
+def import_times():
+    """Копия замеров времени импорта в порядке загрузки"""
+    with _import_times_lock:
+        return dict(_import_times)
@@ -0,0 +1,317 @@
+import contextvars
+import logging
+import math
+import os
+import re
+import threading
+import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from services.cancel import current_token
+from services.config import get_section
+from services.lazy import import_module
+from services.logger import log
+from services.metrics import timed_call
+from services.registry import resolve_target
+from services.scheduler import get_scheduler
+
+
+logger_ui = logging.getLogger(__name__)
+
+METRICS = ("cpu", "memory", "disk", "net_in", "net_out")
+METRIC_NAMES = {"cpu": "CPU, %", "memory": "память, %", "disk": "диск, %",
+                "net_in": "сеть вх., Б/с", "net_out": "сеть исх., Б/с"}
+
+
+class RingBuffer:
+    """Последние capacity замеров в массивах фиксированного размера"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._values = array("d", bytes(8 * capacity))
+        self._times = array("d", bytes(8 * capacity))
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, value, moment=None):
+        with self._lock:
+            self._values[self._next] = value
+            self._times[self._next] = time.time() if moment is None else moment
+            self._next = (self._next + 1) % self.capacity
+            self._count = min(self._count + 1, self.capacity)
+
+    def __len__(self):
+        return self._count
+
+    def window(self, seconds, now=None):
+        """Значения не старше seconds, от старых к новым"""
+        since = (time.time() if now is None else now) - seconds
+        with self._lock:
+            start = (self._next - self._count) % self.capacity
+            order = [(start + i) % self.capacity for i in range(self._count)]
+            return [self._values[i] for i in order if self._times[i] >= since]
+
+
+def percentile(values, share):
+    """Перцентиль методом ближайшего ранга по отсортированному списку"""
+    if not values:
+        return None
+    rank = max(1, math.ceil(share * len(values)))
+    return values[rank - 1]
+
+
+def summarize(values):
+    values = sorted(values)
+    return {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95),
+            "max": values[-1] if values else None, "samples": len(values)}
+
+
+class PsutilTransport:
+    """Замеры локальной машины через psutil (эталонная реализация транспорта)"""
+
+    def __init__(self, host="localhost", disk_path=None, **options):
+        self.host = host
+        self.disk_path = disk_path or os.path.abspath(os.sep)
+        self._psutil = import_module("psutil")
+        # Первый вызов cpu_percent(None) лишь запоминает точку отсчёта
+        self._psutil.cpu_percent(None)
+        self._net = NetRate()
+
+    def sample(self):
+        psutil = self._psutil
+        values = {"cpu": psutil.cpu_percent(None),
+                  "memory": psutil.virtual_memory().percent,
+                  "disk": psutil.disk_usage(self.disk_path).percent}
+        counters = psutil.net_io_counters()
+        values.update(self._net.update(counters.bytes_recv, counters.bytes_sent))
+        return values
+
+
+class NetRate:
+    """Скорость сети по разнице счётчиков байт с прошлым замером"""
+
+    def __init__(self):
+        self._previous = None
+
+    def update(self, received, sent):
+        now = time.monotonic()
+        previous, self._previous = self._previous, (now, received, sent)
+        if previous is None or now <= previous[0]:
+            return {}
+        elapsed = now - previous[0]
+        return {"net_in": max(0.0, (received - previous[1]) / elapsed),
+                "net_out": max(0.0, (sent - previous[2]) / elapsed)}
+
+
+_METRIC_LINE = re.compile(r'^(\w+)(?:\{([^}]*)\})?\s+(\S+)', re.MULTILINE)
+_LABEL = re.compile(r'(\w+)="([^"]*)"')
+
+
+class NodeExporterTransport:
+    """Замеры удалённого Linux-сервера по странице /metrics node_exporter"""
+
+    def __init__(self, host, url=None, mountpoint="/", timeout=5, **options):
+        self.host = host
+        self.url = url or f"http://{host}:9100/metrics"
+        self.mountpoint = mountpoint
+        self.timeout = timeout
+        self._manager = import_module("urllib3").PoolManager(maxsize=1, retries=False)
+        self._cpu = None
+        self._net = NetRate()
+
+    def sample(self):
+        response = self._manager.request("GET", self.url, timeout=self.timeout)
+        if response.status != 200:
+            raise RuntimeError(f"{self.url}: код ответа {response.status}")
+        idle = total = received = sent = 0.0
+        memory = {}
+        disk = {}
+        for name, labels, value in _METRIC_LINE.findall(response.data.decode("utf-8")):
+            if name == "node_cpu_seconds_total":
+                total += float(value)
+                if 'mode="idle"' in labels or 'mode="iowait"' in labels:
+                    idle += float(value)
+            elif name in ("node_memory_MemTotal_bytes", "node_memory_MemAvailable_bytes"):
+                memory[name] = float(value)
+            elif name in ("node_filesystem_size_bytes", "node_filesystem_avail_bytes"):
+                if dict(_LABEL.findall(labels)).get("mountpoint") == self.mountpoint:
+                    disk[name] = float(value)
+            elif name in ("node_network_receive_bytes_total", "node_network_transmit_bytes_total"):
+                if 'device="lo"' not in labels:
+                    if name == "node_network_receive_bytes_total":
+                        received += float(value)
+                    else:
+                        sent += float(value)
+        values = {}
+        if self._cpu is not None and total > self._cpu[1]:
+            busy = 1 - (idle - self._cpu[0]) / (total - self._cpu[1])
+            values["cpu"] = max(0.0, min(100.0, busy * 100))
+        self._cpu = (idle, total)
+        if len(memory) == 2 and memory["node_memory_MemTotal_bytes"]:
+            values["memory"] = 100 * (1 - memory["node_memory_MemAvailable_bytes"]
+                                      / memory["node_memory_MemTotal_bytes"])
+        if len(disk) == 2 and disk["node_filesystem_size_bytes"]:
+            values["disk"] = 100 * (1 - disk["node_filesystem_avail_bytes"]
+                                    / disk["node_filesystem_size_bytes"])
+        values.update(self._net.update(received, sent))
+        return values
+
+
+TRANSPORTS = {"psutil": PsutilTransport, "node_exporter": NodeExporterTransport}
+
+
+class LoadSampler:
+    """Параллельный опрос серверов; замеры копятся в кольцевых буферах"""
+
+    def __init__(self, hosts, capacity=720, concurrency=16):
+        self.hosts = {}
+        self.capacity = capacity
+        for entry in hosts:
+            entry = dict(entry)
+            name = entry.pop("name")
+            transport = entry.pop("transport", "psutil")
+            transport_cls = TRANSPORTS.get(transport) or resolve_target(transport)
+            self.hosts[name] = transport_cls(name, **entry)
+        self.buffers = {name: {metric: RingBuffer(capacity) for metric in METRICS}
+                        for name in self.hosts}
+        self.errors = {}
+        # Фоновый замер и проверка могут опрашивать сервер одновременно,
+        # а соединение транспорта (SSH, HTTP) не рассчитано на параллельные запросы
+        self._locks = {name: threading.Lock() for name in self.hosts}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, min(concurrency, len(self.hosts))),
+            thread_name_prefix="load-sampler")
+
+    def _sample_host(self, name):
+        with self._locks[name]:
+            try:
+                with timed_call("load", name):
+                    values = self.hosts[name].sample()
+            except Exception as e:
+                self.errors[name] = str(e)
+                return
+            self.errors.pop(name, None)
+            moment = time.time()
+            buffers = self.buffers[name]
+            for metric, value in values.items():
+                if metric in buffers:
+                    buffers[metric].append(value, moment)
+
+    def sample_all(self):
+        """Один замер всех серверов; длится столько, сколько самый медленный"""
+        for future in [self._executor.submit(
+                contextvars.copy_context().run, self._sample_host, name)
+                for name in self.hosts]:
+            future.result()
+
+    def summary(self, window):
+        """p50/p95/max по каждому серверу и показателю за последние window секунд"""
+        now = time.time()
+        return {name: {metric: summarize(buffer.window(window, now))
+                       for metric, buffer in metrics.items()}
+                for name, metrics in self.buffers.items()}
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def violations(summary, thresholds, host_thresholds=None):
+    """Превышения порогов вида {"cpu": {"p95": 90, "max": 99}}"""
+    found = []
+    for host, metrics in summary.items():
+        limits = dict(thresholds, **(host_thresholds or {}).get(host, {}))
+        for metric, bounds in limits.items():
+            stats = metrics.get(metric)
+            if not stats or not stats["samples"]:
+                continue
+            for statistic, limit in bounds.items():
+                value = stats.get(statistic)
+                if value is not None and value > limit:
+                    found.append((host, metric, statistic, value, limit))
+    return found
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+_background = None
+
+
+def _sample_in_background(interval):
+    global _background
+    sampler = _sampler
+    if sampler is None:
+        return
+    try:
+        sampler.sample_all()
+    except Exception as e:
+        logger_ui.warning(f"Фоновый замер нагрузки не удался: {e}")
+    with _sampler_lock:
+        if _sampler is sampler:
+            _background = get_scheduler().call_later(
+                interval, lambda: _sample_in_background(interval))
+
+
+def get_sampler():
+    """Общий опросчик серверов из раздела load конфига"""
+    global _sampler, _background
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                settings = get_section("load")
+                _sampler = LoadSampler(settings.get("hosts", []),
+                                       capacity=settings.get("capacity", 720),
+                                       concurrency=settings.get("concurrency", 16))
+                interval = settings.get("background_interval", 0)
+                if interval:
+                    # Фоновые замеры между проверками наполняют окно для p95
+                    _background = get_scheduler().call_later(
+                        interval, lambda: _sample_in_background(interval))
+    return _sampler
+
+
+def close_sampler():
+    global _sampler, _background
+    with _sampler_lock:
+        sampler, _sampler = _sampler, None
+        if _background is not None:
+            _background.cancel()
+            _background = None
+    if sampler is not None:
+        sampler.close()
+
+
+def check_server_load():
+    """Несколько замеров всех серверов, затем пороги по p50/p95/max за окно"""
+    settings = get_section("load")
+    sampler = get_sampler()
+    if not sampler.hosts:
+        log("В разделе load не задано ни одного сервера", "error")
+        return False
+    token = current_token()
+    samples = settings.get("samples", 3)
+    interval = settings.get("interval", 1.0)
+    time_s = time.perf_counter()
+    for index in range(samples):
+        if index:
+            token.sleep(interval)
+        sampler.sample_all()
+    token.raise_if_cancelled()
+    summary = sampler.summary(settings.get("window", 300))
+    for host, error in sampler.errors.items():
+        log(f"{host}: нет данных ({error})", "error")
+    found = violations(summary, settings.get("thresholds", {}),
+                       settings.get("host_thresholds", {}))
+    for host, metric, statistic, value, limit in found:
+        log(f"{host}: {METRIC_NAMES.get(metric, metric)} {statistic} = {value:.1f}"
+            f" (порог {limit:g})", "error")
+    for host, metrics in summary.items():
+        cpu, memory = metrics["cpu"], metrics["memory"]
+        if cpu["samples"] and memory["samples"]:
+            logger_ui.info(
+                f"{host}: CPU p50 {cpu['p50']:.0f}% p95 {cpu['p95']:.0f}%,"
+                f" память p95 {memory['p95']:.0f}% ({cpu['samples']} замеров)")
+    success = not found and not sampler.errors
+    log(f"Серверов: {len(sampler.hosts)}, превышений порогов: {len(found)}"
+        f" ({time.perf_counter() - time_s:.2f} сек.)", "success" if success else "error")
+    return success
@@ -0,0 +1,26 @@
+import queue
+
+
+class LogChannel:
+    """Очередь событий проверок из рабочих потоков в интерфейс без сигнала на каждое сообщение"""
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+
+    def put(self, target, kind, *payload):
+        """Кладёт событие; вызывается из любого потока и не блокируется"""
+        self._queue.put((target, kind, payload))
+
+    def drain(self, limit=None):
+        """Забирает накопленные события (не больше limit) в порядке поступления"""
+        events = []
+        get = self._queue.get_nowait
+        try:
+            while limit is None or len(events) < limit:
+                events.append(get())
+        except queue.Empty:
+            pass
+        return events
+
+    def empty(self):
+        return self._queue.empty()
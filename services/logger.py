@@ -1,10 +1,26 @@
+import atexit
+import contextlib
+import contextvars
+import copy
+import gzip
+import json
 import logging
 import os
-import sys
-from logging.handlers import RotatingFileHandler
+import queue
+import shutil
+import time
+from datetime import datetime, timedelta
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from services.config import get_section
+from services.paths import data_dir
 
 
 logger = None
+# Обработчик логов текущего потока/задачи (у каждой проверки свой)
+_log_callback = contextvars.ContextVar("log_callback", default=None)
+# Система, проверка и запуск, к которым относятся записи текущего потока
+CONTEXT_FIELDS = ("system", "check", "run_id")
+_log_context = contextvars.ContextVar("log_context", default={})
 
 
 def init_logging(log_callback):
@@ -13,38 +29,173 @@ def init_logging(log_callback):
     logger = log_callback
 
 
+@contextlib.contextmanager
+def bind_logging(log_callback):
+    """Направляет вызовы log() в текущем потоке в указанный обработчик"""
+    token = _log_callback.set(log_callback)
+    try:
+        yield
+    finally:
+        _log_callback.reset(token)
+
+
+@contextlib.contextmanager
+def bind_log_context(**fields):
+    """Добавляет поля system/check/run_id к записям лога в текущем потоке"""
+    token = _log_context.set({**_log_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def current_log_context():
+    return dict(_log_context.get())
+
+
 def log(message: str, message_type: str = "info"):
     """Унифицированная функция логирования в интерфейс"""
-    if logger:
-        logger(message, message_type)
+    callback = _log_callback.get() or logger
+    if callback:
+        callback(message, message_type)
 
 
-def setup_logging():
-    """Настройка логирования"""
-    if getattr(sys, 'frozen', False):
-        # Если программа собрана (exe)
-        base_dir = os.path.dirname(sys.executable)
-    else:
-        # Берём путь к корню проекта (один уровень выше папки services)
-        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    logs_dir = os.path.join(base_dir, 'Logs')
-    os.makedirs(logs_dir, exist_ok=True)
+class ContextFilter(logging.Filter):
+    """Добавляет к записи систему, проверку и идентификатор запуска"""
+
+    def filter(self, record):
+        for key, value in _log_context.get().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Одна запись лога — одна строка JSON"""
+
+    def format(self, record):
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False)
+
+
+class LogQueueHandler(QueueHandler):
+    """QueueHandler, который передаёт трассировку отдельно от текста сообщения"""
+    exc_formatter = logging.Formatter()
+
+    def prepare(self, record):
+        # Стандартный prepare вклеивает трассировку в msg и стирает exc_text —
+        # тогда JsonLinesFormatter не может вынести её в поле exc
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.exc_formatter.formatException(record.exc_info)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class CompressingRotatingFileHandler(RotatingFileHandler):
+    """Ротация по размеру и по времени со сжатием старых файлов в gzip"""
+
+    def __init__(self, filename, max_bytes, backup_count, when="midnight",
+                 compress=True, encoding='utf-8'):
+        super().__init__(filename, maxBytes=max_bytes,
+                         backupCount=backup_count, encoding=encoding, delay=True)
+        self.when = when
+        self.rollover_at = self._next_rollover(time.time())
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = self._gzip_rotator
+
+    def _next_rollover(self, now):
+        if not self.when:
+            return None
+        if self.when == "midnight":
+            tomorrow = datetime.fromtimestamp(now).date() + timedelta(days=1)
+            return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+        # Интервал вида "6h", "30m"
+        units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+        return now + int(self.when[:-1]) * units[self.when[-1]]
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self._next_rollover(time.time())
+
+    @staticmethod
+    def _gzip_rotator(source, dest):
+        with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+
+_listener = None
+_atexit_registered = False
+
+
+def setup_logging(settings=None):
+    """Настройка логирования: запись на диск идёт в отдельном потоке через очередь"""
+    global _listener, _atexit_registered
+    if settings is None:
+        settings = get_section("logging")
+    logs_dir = data_dir('Logs')
     log_file = os.path.join(logs_dir, 'app.log')
     root_logger = logging.getLogger()
     root_logger.setLevel(logging.DEBUG)
-    file_handler = RotatingFileHandler(
+    file_handler = CompressingRotatingFileHandler(
         log_file,
-        maxBytes=1024 * 1024,
-        backupCount=5,
-        encoding='utf-8'
+        max_bytes=settings.get("max_bytes", 5 * 1024 * 1024),
+        backup_count=settings.get("backup_count", 10),
+        when=settings.get("when", "midnight"),
+        compress=settings.get("compress", True)
     )
     formatter = logging.Formatter(
         "%(levelname)s - %(asctime)s - %(name)s - %(message)s"
     )
-    file_handler.setFormatter(formatter)
+    if settings.get("json", False):
+        file_handler.setFormatter(JsonLinesFormatter())
+    else:
+        file_handler.setFormatter(formatter)
     file_handler.setLevel(logging.DEBUG)
-    root_logger.addHandler(file_handler)
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
     console_handler.setLevel(logging.INFO)
-    root_logger.addHandler(console_handler)
+    # Потоки только кладут записи в очередь, на диск пишет QueueListener
+    log_queue = queue.SimpleQueue()
+    queue_handler = LogQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    root_logger.addHandler(queue_handler)
+    _listener = QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        atexit.register(shutdown_logging)
+        _atexit_registered = True
+
+
+def shutdown_logging():
+    """Дописывает очередь логов на диск и останавливает поток записи"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
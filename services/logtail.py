@@ -0,0 +1,277 @@
+import glob
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from services.cancel import current_token
+from services.config import get_section
+from services.logger import log
+from services.paths import data_dir
+
+
+logger_ui = logging.getLogger(__name__)
+
+# Сколько первых байт файла запоминать, чтобы узнать его после переименования
+HEAD_BYTES = 1024
+# Регулярное выражение применяется кусками, между ними проверяется отмена
+CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def _head_digest(path, length):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read(length)).hexdigest()
+
+
+class TailState:
+    """Смещения прочитанного по файлам: ключ — устройство и inode, а не имя"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError) as e:
+            logger_ui.warning(f"Не удалось прочитать смещения логов: {e}")
+            return {}
+
+    def get(self, key):
+        with self._lock:
+            return self._load().get(key)
+
+    def put(self, key, files):
+        with self._lock:
+            data = self._load()
+            data[key] = {"updated": datetime.now().isoformat(timespec="seconds"),
+                         "files": files}
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+class LogTail:
+    """Поиск ошибок только в дописанной части логов, переживает ротацию"""
+
+    def __init__(self, name, paths, patterns, state, encoding="utf-8",
+                 initial_bytes=1048576, sample=5, ignore_case=False):
+        self.name = name
+        self.paths = list(paths)
+        self.state = state
+        self.encoding = encoding
+        self.initial_bytes = initial_bytes
+        self.sample = sample
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        if not isinstance(patterns, dict):
+            patterns = {pattern: pattern for pattern in patterns}
+        self.labels = {}
+        groups = []
+        for index, (label, pattern) in enumerate(patterns.items()):
+            self.labels[f"p{index}"] = label
+            groups.append(f"(?P<p{index}>{pattern})")
+        # Одно регулярное выражение на все шаблоны: файл проходится один раз
+        flags = re.IGNORECASE if ignore_case else 0
+        self.regex = re.compile("|".join(groups).encode(encoding), flags)
+        # Без именованных групп re ищет заметно быстрее; группы нужны только на найденной строке
+        self.prefilter = re.compile("|".join(
+            f"(?:{pattern})" for pattern in patterns.values()).encode(encoding), flags)
+        # Если все шаблоны — просто слова, строки-кандидаты ищутся через find (в разы быстрее re)
+        literals = [_literal_of(pattern) for pattern in patterns.values()]
+        self.literals = None if ignore_case or None in literals else \
+            [literal.encode(encoding) for literal in literals]
+
+    def files(self):
+        found = set()
+        for pattern in self.paths:
+            found.update(glob.glob(pattern))
+        return sorted(found)
+
+    def scan(self):
+        """Читает новые строки всех файлов и сохраняет смещения"""
+        token = current_token()
+        previous = self.state.get(self.name)
+        known = previous["files"] if previous else {}
+        result = {"files": 0, "bytes": 0, "total": 0,
+                  "counts": {label: 0 for label in self.labels.values()},
+                  "samples": []}
+        files = {}
+        for path in self.files():
+            token.raise_if_cancelled()
+            try:
+                entry = self._scan_file(path, known, previous is None, result)
+            except OSError as e:
+                logger_ui.warning(f"Лог {path} пропущен: {e}")
+                continue
+            files[entry.pop("key")] = entry
+        self.state.put(self.name, files)
+        return result
+
+    def _scan_file(self, path, known, first_run, result):
+        stat = os.stat(path)
+        # На некоторых сетевых дисках inode нет — тогда узнаём файл только по имени
+        key = f"{stat.st_dev}:{stat.st_ino}" if stat.st_ino else path
+        size = stat.st_size
+        entry = known.get(key)
+        head_length = min(size, HEAD_BYTES)
+        if entry is not None:
+            # Тот же inode мог достаться другому файлу — сверяем начало
+            length = min(entry["head_length"], head_length)
+            same = entry["head_length"] <= head_length and \
+                _head_digest(path, length) == entry["head"]
+            offset = entry["offset"] if same and entry["offset"] <= size else 0
+        elif first_run:
+            # Первый запуск: не читаем многогигабайтную историю целиком
+            offset = max(0, size - self.initial_bytes)
+        else:
+            offset = 0
+        if offset < size:
+            offset = self._scan_range(path, offset, size, result)
+        result["files"] += 1
+        return {"key": key, "path": path, "offset": offset,
+                "head": _head_digest(path, head_length), "head_length": head_length}
+
+    def _scan_range(self, path, offset, size, result):
+        """Ищет шаблоны в [offset, size); возвращает смещение после последней целой строки"""
+        token = current_token()
+        with open(path, "rb") as f, \
+                mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as data:
+            if offset > 0 and data[offset - 1:offset] != b"\n":
+                # Начали с середины строки (первый запуск) — переходим к следующей
+                offset = data.find(b"\n", offset, size) + 1 or size
+            end = data.rfind(b"\n", offset, size) + 1
+            if end <= offset:
+                return offset
+            position = offset
+            while position < end:
+                token.raise_if_cancelled()
+                chunk_end = min(end, position + CHUNK_BYTES)
+                if chunk_end < end:
+                    chunk_end = data.find(b"\n", chunk_end - 1, end) + 1
+                if self.literals:
+                    self._search_literals(data, position, chunk_end, result)
+                else:
+                    self._search(data, position, chunk_end, result)
+                position = chunk_end
+            result["bytes"] += end - offset
+            return end
+
+    def _search(self, data, position, end, result):
+        prefilter = self.prefilter
+        while True:
+            match = prefilter.search(data, position, end)
+            if match is None:
+                return
+            line_start = data.rfind(b"\n", 0, match.start()) + 1
+            line_end = data.find(b"\n", match.end(), end)
+            if line_end < 0:
+                line_end = end
+            self._count(data, self.regex.search(data, line_start, line_end),
+                        line_start, line_end, result)
+            # Строка с несколькими совпадениями считается один раз
+            position = line_end + 1
+
+    def _search_literals(self, data, position, end, result):
+        """Строки, где встречается хотя бы одно слово, проверяются регулярным выражением"""
+        candidates = set()
+        for literal in self.literals:
+            found = data.find(literal, position, end)
+            while found >= 0:
+                line_start = data.rfind(b"\n", 0, found) + 1
+                line_end = data.find(b"\n", found, end)
+                if line_end < 0:
+                    line_end = end
+                candidates.add((line_start, line_end))
+                found = data.find(literal, line_end, end)
+        for line_start, line_end in sorted(candidates):
+            match = self.regex.search(data, line_start, line_end)
+            if match is not None:
+                self._count(data, match, line_start, line_end, result)
+
+    def _count(self, data, match, line_start, line_end, result):
+        result["counts"][self.labels[match.lastgroup]] += 1
+        result["total"] += 1
+        if len(result["samples"]) < self.sample:
+            result["samples"].append(
+                data[line_start:line_end].decode(self.encoding, errors="replace")
+                .strip()[:300])
+
+
+def _literal_of(pattern):
+    """Слово без спецсимволов (допускаются \\b по краям) или None"""
+    core = pattern
+    while core.startswith("\\b"):
+        core = core[2:]
+    while core.endswith("\\b"):
+        core = core[:-2]
+    if not core or any(char in core for char in ".^$*+?{}[]\\|()"):
+        return None
+    return core
+
+
+def state_path(settings=None):
+    if settings is None:
+        settings = get_section("log_tail")
+    return settings.get("state_file") or os.path.join(
+        data_dir("History"), "logtail.json")
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_state():
+    global _state
+    if _state is None:
+        with _state_lock:
+            if _state is None:
+                _state = TailState(state_path())
+    return _state
+
+
+def load_tail(name, settings=None):
+    """LogTail по записи раздела log_tail.tails"""
+    if settings is None:
+        settings = get_section("log_tail")
+    entry = settings.get("tails", {}).get(name)
+    if entry is None:
+        raise LookupError(f"Набор логов не найден: {name}")
+    return LogTail(
+        name, entry["paths"], entry["patterns"], get_state(),
+        encoding=entry.get("encoding", "utf-8"),
+        initial_bytes=entry.get("initial_bytes", 1048576),
+        sample=entry.get("sample", 5),
+        ignore_case=entry.get("ignore_case", False)), entry.get("max_errors", 0)
+
+
+def check_log_errors(tail):
+    """Проверка: число новых строк с ошибками не больше max_errors набора"""
+    log_tail, max_errors = load_tail(tail)
+    time_s = time.perf_counter()
+    result = log_tail.scan()
+    elapsed = time.perf_counter() - time_s
+    if not result["files"]:
+        log(f"Нет файлов логов по шаблонам {', '.join(log_tail.paths)}", "error")
+        return False
+    for sample in result["samples"]:
+        log(sample, "error")
+    found = ", ".join(f"{label}: {count}"
+                      for label, count in result["counts"].items() if count)
+    summary = (f"Новых строк с ошибками: {result['total']}"
+               f"{f' ({found})' if found else ''}; прочитано "
+               f"{result['bytes'] / 1048576:.1f} МБ из {result['files']} файлов"
+               f" за {elapsed:.2f} сек.")
+    if result["total"] > max_errors:
+        log(summary, "error")
+        return False
+    log(summary, "success")
+    return True
@@ -0,0 +1,350 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from services.config import get_section
+from services.logger import current_log_context
+from services.paths import data_dir
+from services.scheduler import get_scheduler
+
+
+logger_ui = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Границы корзин, секунд: от быстрых запросов до многоминутных проверок Power BI
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+                   30, 60, 120, 300, 600)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Показатель с метками; значения хранятся по кортежу значений меток"""
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key, extra=None):
+        pairs = list(zip(self.labelnames, key))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._samples(items))
+        return "\n".join(lines) + "\n"
+
+    def _samples(self, items):
+        return [f"{self.name}{self._labels(key)} {_format_value(value)}"
+                for key, value in items]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+
+class Histogram(Metric):
+    """Гистограмма: счётчики по корзинам, сумма и число замеров"""
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(float(bound) for bound in buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Корзина с границей le >= value; последняя — +Inf
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        time_s = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - time_s, **labels)
+
+    def snapshot(self, **labels):
+        """Число замеров и сумма по набору меток"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return {"count": 0, "sum": 0.0}
+            return {"count": sum(state[0]), "sum": state[1]}
+
+    def _samples(self, items):
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket"
+                             f"{self._labels(key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Набор показателей, отдаваемый одной страницей в формате Prometheus"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Показатель {name} уже объявлен как {metric.kind}")
+            return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter, name, help_text, labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help_text, labelnames, buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.render() for metric in metrics)
+
+
+REGISTRY = MetricsRegistry()
+
+CHECK_DURATION = REGISTRY.histogram(
+    "autocheck_check_duration_seconds", "Длительность выполнения проверки",
+    ("system", "check"))
+CHECK_RUNS = REGISTRY.counter(
+    "autocheck_check_runs_total",
+    "Проверки по исходу: success, failure, error, timeout, cancelled, cached",
+    ("system", "check", "outcome"))
+RESOURCE_WAIT = REGISTRY.histogram(
+    "autocheck_resource_wait_seconds", "Ожидание общих ресурсов перед проверкой",
+    ("system", "check"))
+DRIVER_ACQUIRE = REGISTRY.histogram(
+    "autocheck_driver_acquire_seconds", "Получение сессии WebDriver из пула",
+    ("system", "check"))
+DRIVER_START = REGISTRY.histogram(
+    "autocheck_driver_start_seconds", "Запуск chromedriver и Chrome",
+    ("system", "check"))
+CALL_DURATION = REGISTRY.histogram(
+    "autocheck_external_call_seconds",
+    "Внешние вызовы: HTTP, Elastic, БД, Kafka, опрос серверов",
+    ("system", "check", "service", "operation"))
+CALL_ERRORS = REGISTRY.counter(
+    "autocheck_external_call_errors_total", "Внешние вызовы, завершившиеся ошибкой",
+    ("system", "check", "service", "operation"))
+STARTUP = REGISTRY.gauge(
+    "autocheck_startup_seconds", "Время запуска программы")
+
+
+def check_labels():
+    """Метки system и check текущей проверки (пустые вне проверки)"""
+    context = current_log_context()
+    return {"system": context.get("system", ""), "check": context.get("check", "")}
+
+
+def observe_call(service, operation, seconds, error=False):
+    """Учитывает уже замеренный внешний вызов"""
+    labels = dict(check_labels(), service=service, operation=operation)
+    CALL_DURATION.observe(seconds, **labels)
+    if error:
+        CALL_ERRORS.inc(**labels)
+
+
+@contextmanager
+def timed_call(service, operation):
+    """Замер внешнего вызова в блоке with; исключение считается ошибкой вызова"""
+    time_s = time.perf_counter()
+    error = False
+    try:
+        yield
+    except Exception:
+        error = True
+        raise
+    finally:
+        observe_call(service, operation, time.perf_counter() - time_s, error)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Опросы Prometheus раз в несколько секунд не нужны в логе
+        pass
+
+
+class MetricsServer:
+    """Страница /metrics на локальном порту для Prometheus"""
+
+    def __init__(self, registry, host="127.0.0.1", port=9464):
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._server.registry = registry
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+
+    @property
+    def address(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class TextfileExporter:
+    """Файл .prom для textfile collector node_exporter, перезаписывается раз в interval"""
+
+    def __init__(self, registry, path, interval=15):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._handle = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def write(self):
+        # node_exporter не должен увидеть файл наполовину записанным
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(self.registry.render())
+        os.replace(tmp_path, self.path)
+
+    def start(self):
+        self._tick()
+
+    def _tick(self):
+        try:
+            self.write()
+        except OSError as e:
+            logger_ui.warning(f"Не удалось записать метрики в {self.path}: {e}")
+        with self._lock:
+            if not self._closed:
+                self._handle = get_scheduler().call_later(self.interval, self._tick)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            if self._handle is not None:
+                self._handle.cancel()
+                self._handle = None
+        try:
+            self.write()
+        except OSError as e:
+            logger_ui.warning(f"Не удалось записать метрики в {self.path}: {e}")
+
+
+_exporters = []
+_exporters_lock = threading.Lock()
+
+
+def start_exporters(settings=None):
+    """Запускает выгрузку метрик, включённую в разделе metrics конфига"""
+    if settings is None:
+        settings = get_section("metrics")
+    with _exporters_lock:
+        if _exporters:
+            return list(_exporters)
+        http = settings.get("http", {})
+        if http.get("enabled"):
+            try:
+                server = MetricsServer(REGISTRY, http.get("host", "127.0.0.1"),
+                                       http.get("port", 9464))
+                _exporters.append(server)
+                logger_ui.info(f"Метрики доступны по адресу {server.address}")
+            except OSError as e:
+                logger_ui.warning(f"Не удалось открыть порт для метрик: {e}")
+        textfile = settings.get("textfile", {})
+        if textfile.get("enabled"):
+            path = textfile.get("path") or os.path.join(
+                data_dir("Metrics"), "autocheck.prom")
+            exporter = TextfileExporter(REGISTRY, path, textfile.get("interval", 15))
+            exporter.start()
+            _exporters.append(exporter)
+        return list(_exporters)
+
+
+def close_exporters():
+    with _exporters_lock:
+        exporters = list(_exporters)
+        _exporters.clear()
+    for exporter in exporters:
+        try:
+            exporter.close()
+        except Exception as e:
+            logger_ui.warning(f"Ошибка при остановке выгрузки метрик: {e}")
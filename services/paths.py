@@ -0,0 +1,34 @@
+import os
+import sys
+
+
+def resource_path(relative_path: str) -> str:
+    """Получить путь к ресурсу: рядом с exe → _MEIPASS → dev"""
+    # убираем ведущие / или \
+    relative_path = relative_path.lstrip("/\\")
+    if getattr(sys, "frozen", False):  # если это .exe
+        base_path = os.path.dirname(sys.executable)
+        candidate = os.path.join(base_path, relative_path)
+        if os.path.exists(candidate):
+            return candidate
+    if hasattr(sys, "_MEIPASS"):
+        candidate = os.path.join(sys._MEIPASS, relative_path)
+        if os.path.exists(candidate):
+            return candidate
+    return os.path.join(os.path.abspath("."), relative_path)
+
+
+def app_dir() -> str:
+    """Папка приложения: рядом с exe или корень проекта"""
+    if getattr(sys, 'frozen', False):
+        # Если программа собрана (exe)
+        return os.path.dirname(sys.executable)
+    # Берём путь к корню проекта (один уровень выше папки services)
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def data_dir(name: str) -> str:
+    """Создаёт (при необходимости) и возвращает папку рядом с приложением"""
+    path = os.path.join(app_dir(), name)
+    os.makedirs(path, exist_ok=True)
+    return path
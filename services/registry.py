@@ -0,0 +1,123 @@
+import functools
+import logging
+import threading
+from services.cancel import call_with_token
+from services.config import get_section
+from services.lazy import import_module
+
+
+logger_ui = logging.getLogger(__name__)
+
+
+def resolve_target(target):
+    """Импортирует модуль и возвращает функцию по строке "модуль:функция\""""
+    module_name, func_name = target.split(":", 1)
+    module = import_module(module_name)
+    return getattr(module, func_name)
+
+
+class CheckSpec:
+    """Описание проверки из раздела check_registry"""
+
+    def __init__(self, system, name, entry):
+        if isinstance(entry, str):
+            entry = {"target": entry}
+        self.system = system
+        self.name = name
+        self.target = entry["target"]
+        self.resources = list(entry.get("resources", []))
+        # Именованные аргументы функции проверки (например, набор адресов)
+        self.params = dict(entry.get("params", {}))
+        self.options = entry
+
+    @property
+    def module_name(self):
+        return self.target.split(":", 1)[0]
+
+
+class CheckRegistry:
+    """Реестр проверок: имя проверки → функция, разрешается один раз и кэшируется"""
+
+    def __init__(self, registry_config, systems_config=None):
+        self._specs = {
+            system: {name: CheckSpec(system, name, entry)
+                     for name, entry in checks.items()}
+            for system, checks in registry_config.items()
+        }
+        self._systems_config = systems_config or {
+            system: list(checks) for system, checks in registry_config.items()
+        }
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def systems(self):
+        return list(self._systems_config.keys())
+
+    def checks(self, system):
+        """Проверки системы в порядке из systems_config"""
+        return list(self._systems_config.get(system, []))
+
+    def has(self, system, check_name):
+        return check_name in self._specs.get(system, {})
+
+    def spec(self, system, check_name):
+        try:
+            return self._specs[system][check_name]
+        except KeyError:
+            raise LookupError(
+                f"Для проверки не задана функция: {system}/{check_name}") from None
+
+    def resolve(self, system, check_name):
+        """Возвращает функцию проверки, импортируя её модуль при первом обращении"""
+        key = (system, check_name)
+        func = self._resolved.get(key)
+        if func is None:
+            target = self.spec(system, check_name).target
+            with self._lock:
+                func = self._resolved.get(key)
+                if func is None:
+                    func = resolve_target(target)
+                    self._resolved[key] = func
+        return func
+
+    def lazy(self, system, check_name):
+        """Обёртка для пула: разрешение и импорт происходят в момент запуска"""
+        def run_check():
+            func = self.resolve(system, check_name)
+            params = self.spec(system, check_name).params
+            if params:
+                func = functools.partial(func, **params)
+            return call_with_token(func)
+        run_check.__name__ = f"{system}/{check_name}"
+        return run_check
+
+    def validate(self):
+        """Список расхождений между systems_config и реестром"""
+        problems = []
+        for system, checks in self._systems_config.items():
+            for check_name in checks:
+                if not self.has(system, check_name):
+                    problems.append(f"{system}/{check_name}: нет записи в check_registry")
+        for system, specs in self._specs.items():
+            for check_name in specs:
+                if check_name not in self._systems_config.get(system, []):
+                    problems.append(f"{system}/{check_name}: нет в systems_config")
+        return problems
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Общий реестр проверок из config/ui_config.json"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                registry = CheckRegistry(
+                    get_section("check_registry"), get_section("systems_config"))
+                for problem in registry.validate():
+                    logger_ui.warning(f"Реестр проверок: {problem}")
+                _registry = registry
+    return _registry
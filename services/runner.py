@@ -0,0 +1,129 @@
+import logging
+import time
+from datetime import datetime
+from services.config import get_section
+from services.executor import CheckListener, get_executor
+from services.logger import current_log_context
+from services.registry import get_registry
+
+
+logger_ui = logging.getLogger(__name__)
+
+
+class ReportListener(CheckListener):
+    """Собирает сообщения проверок для JSON-отчёта"""
+
+    def __init__(self):
+        self.messages = {}
+
+    def on_check_started(self, check_name):
+        self.messages.setdefault(check_name, [])
+
+    def on_log(self, message, message_type="info"):
+        # Проверка — из контекста лога, а не последняя начатая: брошенная по
+        # таймауту проверка не пишет в отчёт той, что выполняется после неё
+        check_name = current_log_context().get("check")
+        if check_name is not None:
+            self.messages.setdefault(check_name, []).append(
+                {"message": message, "type": message_type})
+
+
+class LoggingListener(CheckListener):
+    """Пишет сообщения проверок в лог приложения (запуски без окна)"""
+
+    LEVELS = {"error": logging.ERROR, "warning": logging.WARNING}
+
+    def __init__(self, system):
+        self.system = system
+
+    def on_log(self, message, message_type="info"):
+        logger_ui.log(self.LEVELS.get(message_type, logging.INFO),
+                      f"[{self.system}] {message}")
+
+    def on_job_finished(self, results):
+        failed = [r["check"] for r in results if not r["success"]]
+        if failed:
+            logger_ui.error(
+                f"[{self.system}] Проверки с ошибками: {', '.join(failed)}")
+        else:
+            logger_ui.info(f"[{self.system}] Все проверки прошли успешно")
+
+
+class CheckRunner:
+    """Запуск проверок систем без Qt: результат возвращается словарём"""
+
+    def __init__(self, systems_config=None, executor=None, registry=None):
+        if systems_config is None:
+            systems_config = get_section("systems_config")
+        self.systems_config = systems_config
+        self.executor = executor or get_executor()
+        self.registry = registry or get_registry()
+
+    def run(self, systems=None, checks=None, include_powerbi=False,
+            force_refresh=False):
+        """Параллельно запускает проверки выбранных систем и возвращает отчёт"""
+        started_at = datetime.now()
+        time_s = time.time()
+        if not systems:
+            systems = list(self.systems_config.keys())
+        unknown = [s for s in systems if s not in self.systems_config]
+        if unknown:
+            raise ValueError(f"Неизвестные системы: {', '.join(unknown)}")
+        jobs = {
+            system: self.submit_system(
+                system, checks, include_powerbi, force_refresh)
+            for system in systems
+        }
+        report = {
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "systems": {}
+        }
+        for system, (job, listener) in jobs.items():
+            results = job.wait()
+            for result in results:
+                result["messages"] = listener.messages.get(result["check"], [])
+            report["systems"][system] = results
+        report["duration"] = round(time.time() - time_s, 3)
+        report["success"] = all(
+            result["success"]
+            for results in report["systems"].values()
+            for result in results
+        )
+        return report
+
+    def select_checks(self, system, checks=None, include_powerbi=False):
+        """Список (check_name, func) для запуска с учётом фильтров"""
+        selected = []
+        for check_name in self.systems_config.get(system, []):
+            if checks and check_name not in checks:
+                continue
+            if "PowerBi" in check_name and not include_powerbi:
+                continue
+            selected.append((check_name, self.registry.lazy(system, check_name)))
+        return selected
+
+    def submit_system(self, system, checks=None, include_powerbi=False,
+                      force_refresh=False):
+        """Ставит проверки системы в общий пул"""
+        listener = ReportListener()
+        job = self.executor.submit(
+            system, self.select_checks(system, checks, include_powerbi), listener,
+            force_refresh=force_refresh)
+        return job, listener
+
+    def launch_scheduled(self, run):
+        """Ставит в пул проверки запуска по расписанию (services/schedules.py)"""
+        schedule = run.schedule
+        try:
+            for system in schedule.systems:
+                if system not in self.systems_config:
+                    logger_ui.warning(f"Расписание «{schedule.name}»: нет системы {system}")
+                    continue
+                job = self.executor.submit(
+                    system,
+                    self.select_checks(system, schedule.checks, schedule.include_powerbi),
+                    LoggingListener(system),
+                    force_refresh=schedule.force_refresh)
+                run.attach(job)
+        finally:
+            run.close()
@@ -0,0 +1,152 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+logger_ui = logging.getLogger(__name__)
+# Наибольший интервал между сверками с настенными часами, секунд
+MAX_WAIT = 30
+
+
+def parse_at(value):
+    """Разбирает время вида "09:15" в (часы, минуты)"""
+    hours, minutes = value.split(":")
+    return int(hours), int(minutes)
+
+
+def deadline_today(at, now=None):
+    """Сегодняшний момент времени at ("ЧЧ:ММ")"""
+    now = now or datetime.now()
+    hours, minutes = parse_at(at)
+    return now.replace(hour=hours, minute=minutes, second=0, microsecond=0)
+
+
+def next_occurrence(at, now=None):
+    """Ближайший будущий момент at: сегодня или завтра"""
+    now = now or datetime.now()
+    deadline = deadline_today(at, now)
+    if deadline <= now:
+        # timedelta корректно переходит через конец месяца и года
+        deadline += timedelta(days=1)
+    return deadline
+
+
+class TimerHandle:
+    """Запланированный вызов: можно отменить и узнать, сколько осталось"""
+
+    def __init__(self, scheduler, deadline, callback):
+        self._scheduler = scheduler
+        self.deadline = deadline  # Время срабатывания, time.time()
+        self.callback = callback
+        self.cancelled = False
+        self.fired = False
+
+    def cancel(self):
+        return self._scheduler.cancel(self)
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.time())
+
+    @property
+    def deadline_dt(self):
+        return datetime.fromtimestamp(self.deadline)
+
+
+class TimerScheduler:
+    """Одна нить и куча сроков: вызывает callback в нужный момент без опроса"""
+
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def call_at(self, when, callback):
+        """Планирует callback на момент when (datetime или time.time())"""
+        deadline = when.timestamp() if isinstance(when, datetime) else when
+        handle = TimerHandle(self, deadline, callback)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Планировщик остановлен")
+            heapq.heappush(self._heap, (deadline, next(self._counter), handle))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="check-timers", daemon=True)
+                self._thread.start()
+            # Будим нить: новый срок может оказаться раньше текущего
+            self._cond.notify()
+        return handle
+
+    def call_later(self, delay, callback):
+        return self.call_at(time.time() + delay, callback)
+
+    def cancel(self, handle):
+        """Отменяет вызов; False, если он уже сработал"""
+        with self._cond:
+            if handle.fired:
+                return False
+            handle.cancelled = True
+            self._cond.notify()
+            return True
+
+    def pending(self):
+        with self._cond:
+            return sorted(
+                (h for _, _, h in self._heap if not h.cancelled),
+                key=lambda h: h.deadline)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._heap.clear()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - time.time()
+                    if delay <= 0:
+                        break
+                    # Ожидание идёт по монотонным часам, которые могут стоять во
+                    # время сна компьютера, поэтому время сверяется не реже MAX_WAIT
+                    self._cond.wait(min(delay, MAX_WAIT))
+                _, _, handle = heapq.heappop(self._heap)
+                handle.fired = True
+            try:
+                handle.callback()
+            except Exception as e:
+                logger_ui.error(f"Ошибка в запланированной задаче: {e}")
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Общий планировщик отложенных проверок"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = TimerScheduler()
+    return _scheduler
+
+
+def shutdown_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is not None:
+            _scheduler.close()
+            _scheduler = None
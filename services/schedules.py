@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from services.config import get_section
+from services.paths import data_dir
+from services.scheduler import get_scheduler
+
+
+logger_ui = logging.getLogger(__name__)
+
+INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_field(field, low, high):
+    """Поле cron: "*", "5", "1-5", "*/10", "5/10", "0,30" → множество значений"""
+    values = set()
+    for part in field.split(","):
+        step = None
+        if "/" in part:
+            part, step = part.split("/")
+            step = int(step)
+            if step < 1:
+                raise ValueError(f"Шаг должен быть положительным: {field}")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-"))
+        else:
+            # "5/10" в cron — от 5 до конца диапазона с шагом 10
+            start = int(part)
+            end = high if step else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"Значение вне диапазона {low}-{high}: {field}")
+        values.update(range(start, end + 1, step or 1))
+    return values
+
+
+class CronRule:
+    """Расписание в формате cron: "минуты часы дни_месяца месяцы дни_недели\""""
+
+    def __init__(self, expression):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Ожидается 5 полей cron: {expression}")
+        self.expression = expression
+        self.minutes = _parse_field(fields[0], 0, 59)
+        self.hours = _parse_field(fields[1], 0, 23)
+        self.days = _parse_field(fields[2], 1, 31)
+        self.months = _parse_field(fields[3], 1, 12)
+        # 0 и 7 — воскресенье, как в cron
+        self.weekdays = {d % 7 for d in _parse_field(fields[4], 0, 7)}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_matches(self, moment):
+        in_month = moment.day in self.days
+        in_week = (moment.weekday() + 1) % 7 in self.weekdays
+        # Если заданы оба поля, достаточно совпадения одного (правило cron)
+        if not self.any_day and not self.any_weekday:
+            return in_month or in_week
+        return in_month and in_week
+
+    def next_after(self, moment):
+        """Ближайший момент срабатывания строго после moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                month_start = candidate.replace(day=1, hour=0, minute=0)
+                candidate = (month_start + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Расписание никогда не срабатывает: {self.expression}")
+
+
+class IntervalRule:
+    """Расписание «каждые N»: "10m", "2h", "30s\""""
+
+    def __init__(self, every):
+        self.expression = every
+        self.interval = timedelta(
+            seconds=int(every[:-1]) * INTERVAL_UNITS[every[-1]])
+
+    def next_after(self, moment):
+        return moment + self.interval
+
+
+class Schedule:
+    """Запись раздела schedules.rules: что запускать и по какому правилу"""
+
+    def __init__(self, entry):
+        self.name = entry["name"]
+        self.systems = list(entry["systems"])
+        self.checks = list(entry.get("checks", []))
+        self.include_powerbi = entry.get("powerbi", False)
+        self.force_refresh = entry.get("force", False)
+        if "cron" in entry:
+            self.rule = CronRule(entry["cron"])
+        else:
+            self.rule = IntervalRule(entry["every"])
+
+    def next_after(self, moment):
+        return self.rule.next_after(moment)
+
+
+class ScheduledRun:
+    """Запуск по расписанию: задачи систем, которые он поставил в пул"""
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+        self.jobs = []
+        self._closed = threading.Event()
+
+    def attach(self, job):
+        self.jobs.append(job)
+
+    def close(self):
+        """Все задачи запуска поставлены (или запуск отклонён)"""
+        self._closed.set()
+
+    def done(self):
+        return self._closed.is_set() and all(job.done() for job in self.jobs)
+
+
+class RecurringScheduler:
+    """Повторяющиеся запуски по расписанию с защитой от наложения и догонкой"""
+
+    def __init__(self, schedules, launch, state_path, timers=None, clock=datetime.now):
+        self.schedules = schedules
+        self.launch = launch  # launch(ScheduledRun) ставит проверки в пул
+        self.state_path = state_path
+        self._timers = timers or get_scheduler()
+        self._clock = clock
+        self._last_runs = self._load_state()
+        self._runs = {}
+        self._handles = {}
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return {name: datetime.fromisoformat(value)
+                        for name, value in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except (ValueError, OSError) as e:
+            logger_ui.warning(f"Не удалось прочитать состояние расписаний: {e}")
+            return {}
+
+    def _save_state(self):
+        data = {name: moment.isoformat(timespec="seconds")
+                for name, moment in self._last_runs.items()}
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def start(self):
+        """Догоняет пропущенные запуски и планирует следующие"""
+        now = self._clock()
+        for schedule in self.schedules:
+            last = self._last_runs.get(schedule.name)
+            if last is not None and schedule.next_after(last) <= now:
+                # Компьютер спал или программа была закрыта: один запуск вместо всех пропущенных
+                logger_ui.info(
+                    f"Расписание «{schedule.name}»: догоняем запуск "
+                    f"{schedule.next_after(last):%d.%m %H:%M}")
+                self._fire(schedule)
+            else:
+                self._plan(schedule, now)
+
+    def stop(self):
+        with self._lock:
+            # Срабатывание, совпавшее с остановкой, больше не планирует таймер
+            self._stopped = True
+            handles = list(self._handles.values())
+            self._handles.clear()
+        for handle in handles:
+            handle.cancel()
+
+    def next_runs(self):
+        """Ближайшие запуски: имя расписания → datetime"""
+        with self._lock:
+            return {name: handle.deadline_dt
+                    for name, handle in self._handles.items()}
+
+    def _plan(self, schedule, after):
+        deadline = schedule.next_after(after)
+        with self._lock:
+            if self._stopped:
+                return
+            handle = self._timers.call_at(deadline, lambda: self._fire(schedule))
+            self._handles[schedule.name] = handle
+        logger_ui.info(
+            f"Расписание «{schedule.name}»: следующий запуск {deadline:%d.%m %H:%M}")
+
+    def _fire(self, schedule):
+        if self._stopped:
+            return
+        now = self._clock()
+        try:
+            previous = self._runs.get(schedule.name)
+            if previous is not None and not previous.done():
+                logger_ui.warning(
+                    f"Расписание «{schedule.name}»: предыдущий запуск ещё идёт, пропускаем")
+            else:
+                run = ScheduledRun(schedule)
+                self._runs[schedule.name] = run
+                logger_ui.info(f"Расписание «{schedule.name}»: запуск")
+                self.launch(run)
+                self._last_runs[schedule.name] = now
+                self._save_state()
+        except Exception as e:
+            logger_ui.error(f"Ошибка запуска по расписанию «{schedule.name}»: {e}")
+        finally:
+            self._plan(schedule, now)
+
+
+def load_schedules(settings=None):
+    """Расписания из раздела schedules; ошибочные записи пропускаются"""
+    if settings is None:
+        settings = get_section("schedules")
+    schedules = []
+    for entry in settings.get("rules", []):
+        try:
+            schedules.append(Schedule(entry))
+        except (KeyError, ValueError) as e:
+            logger_ui.warning(f"Расписание пропущено ({entry.get('name')}): {e}")
+    return schedules
+
+
+def state_path(settings=None):
+    if settings is None:
+        settings = get_section("schedules")
+    return settings.get("state_file") or os.path.join(
+        data_dir("History"), "schedules.json")
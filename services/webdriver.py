@@ -2,10 +2,16 @@ import os
 import socket
 import logging
 import subprocess
+import threading
 import time
+from contextlib import contextmanager
 import psutil
 from selenium import webdriver
-from services.func_and_pass import resource_path
+from services.cancel import CheckCancelled, check_token, current_token
+from services.config import get_section
+from services.metrics import DRIVER_ACQUIRE, DRIVER_START, check_labels
+from services.paths import resource_path
+from services.registry import resolve_target
 
 
 logger_ui = logging.getLogger(__name__)
@@ -19,106 +25,437 @@ chromedriver_path = resource_path("assets/chromedriver-win64/chromedriver.exe")
 # chrome_path = resource_path("chrome-win64/chrome.exe")
 # chromedriver_path = resource_path("chromedriver-win64/chromedriver.exe")
 
-# Глобальные переменные для хранения процессов
-_driver = None
-_chromedriver_process = None
+# Сессии пула, выданные get_chromedriver(): ключ — токен проверки (вне проверок — поток)
+_leases = {}
+_leases_lock = threading.Lock()
 _chrome_processes = []  # Список для хранения PID процессов Chrome
 
 
-def get_chromedriver():
-    """Функция для запуска chromedriver и Chrome"""
-    global _driver, _chromedriver_process
-    if _driver is None:
-        # Поиск свободного порта для ChromeDriver
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.bind(('', 0))
-            chromedriver_port = s.getsockname()[1]
-        # Запускаем ChromeDriver и сохраняем процесс
-        chromedriver_proc = subprocess.Popen(
-            [chromedriver_path, f"--port={chromedriver_port}"],
-            creationflags=subprocess.CREATE_NO_WINDOW,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL
-        )
-        _chromedriver_process = chromedriver_proc
-        logger_ui.info(
-            f"ChromeDriver запущен на порту {chromedriver_port}, PID: {chromedriver_proc.pid}")
-        # Проверяем подключение с таймаутом
-        max_attempts = 5
-        for attempt in range(max_attempts):
-            try:
-                with socket.create_connection(('localhost', chromedriver_port), timeout=1):
-                    logger_ui.info(
-                        f"ChromeDriver подключен на порту {chromedriver_port}")
-                    break
-            except (socket.timeout, ConnectionRefusedError):
-                if attempt == max_attempts - 1:
-                    logger_ui.error(
-                        f"ChromeDriver не запущен после {max_attempts} попыток")
-                    return None
-                time.sleep(0.5)
-        # Настройка опций Chrome
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless=new')
-        options.add_argument('--log-level=3')
-        options.add_argument('--disable-logging')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--ignore-certificate-errors')
-        options.add_argument('--allow-insecure-localhost')
-        options.add_argument('--disable-extensions')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-setuid-sandbox')
-        options.binary_location = chrome_path
-        # Создаем драйвер
+class DriverSession:
+    """Сессия Chrome: WebDriver и процесс ChromeDriver, которому он принадлежит"""
+
+    def __init__(self, driver, process):
+        self.driver = driver
+        self.process = process
+        self.uses = 0
+        self.broken = False
+        self.created_at = time.time()
+
+    def ping(self):
+        """Дешёвая проверка живости сессии"""
         try:
-            _driver = webdriver.Remote(
-                command_executor=f"http://127.0.0.1:{chromedriver_port}",
-                options=options
-            )
-            # Устанавливаем таймауты для веб-драйвера
-            _driver.set_page_load_timeout(30)
-            _driver.implicitly_wait(5)
-            logger_ui.info('WebDriver успешно подключен')
-            return _driver
-        except Exception as e:
-            logger_ui.error(f"Ошибка подключения к WebDriver: {e}")
-            close_driver()
-            return None
-    return _driver
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
 
+    def close(self):
+        _quit_driver(self.driver)
+        _terminate_process(self.process)
 
-def close_driver():
-    """Функция для закрытия WebDriver и Chromedriver процесса"""
-    global _driver, _chromedriver_process
-    # Закрываем драйвер
-    if _driver is not None:
+    def abort(self):
+        """Прерывает текущую команду WebDriver: без ChromeDriver она сразу падает"""
+        self.broken = True
         try:
-            _driver.quit()
-            logger_ui.info('WebDriver закрыт')
+            self.process.kill()
         except Exception as e:
-            logger_ui.error(f'Ошибка при закрытии WebDriver: {e}')
+            logger_ui.error(f'Ошибка при прерывании ChromeDriver: {e}')
+
+
+def _startup_timeout():
+    return get_section("webdriver").get("startup_timeout", 10)
+
+
+def _wait_for_port(port, process, timeout=None):
+    """Ждёт открытия порта: частые короткие попытки вместо фиксированных пауз"""
+    deadline = time.monotonic() + (_startup_timeout() if timeout is None else timeout)
+    delay = 0.01
+    while time.monotonic() < deadline:
+        # Процесс завершился — порт уже не откроется
+        if process.poll() is not None:
+            return False
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return True
+        except OSError:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+    return False
+
+
+def _start_chromedriver():
+    """Запускает ChromeDriver на свободном порту и возвращает (процесс, порт)"""
+    # Поиск свободного порта для ChromeDriver
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('', 0))
+        chromedriver_port = s.getsockname()[1]
+    # Запускаем ChromeDriver и сохраняем процесс
+    chromedriver_proc = subprocess.Popen(
+        [chromedriver_path, f"--port={chromedriver_port}"],
+        creationflags=CREATE_NO_WINDOW if os.name == 'nt' else 0,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    logger_ui.info(
+        f"ChromeDriver запущен на порту {chromedriver_port}, PID: {chromedriver_proc.pid}")
+    # Ждём, пока ChromeDriver откроет порт
+    if not _wait_for_port(chromedriver_port, chromedriver_proc):
+        logger_ui.error(
+            f"ChromeDriver не открыл порт {chromedriver_port} за {_startup_timeout()} сек.")
+        _terminate_process(chromedriver_proc)
+        return None, None
+    logger_ui.info(f"ChromeDriver подключен на порту {chromedriver_port}")
+    return chromedriver_proc, chromedriver_port
+
+
+def _chrome_options():
+    """Настройка опций Chrome"""
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless=new')
+    options.add_argument('--log-level=3')
+    options.add_argument('--disable-logging')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--ignore-certificate-errors')
+    options.add_argument('--allow-insecure-localhost')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-setuid-sandbox')
+    options.binary_location = chrome_path
+    return options
+
+
+def create_session():
+    """Запускает ChromeDriver и Chrome, возвращает DriverSession или None"""
+    chromedriver_proc, chromedriver_port = _start_chromedriver()
+    if chromedriver_proc is None:
+        return None
+    # Создаем драйвер
+    try:
+        driver = webdriver.Remote(
+            command_executor=f"http://127.0.0.1:{chromedriver_port}",
+            options=_chrome_options()
+        )
+        # Устанавливаем таймауты для веб-драйвера
+        driver.set_page_load_timeout(30)
+        driver.implicitly_wait(5)
+        logger_ui.info('WebDriver успешно подключен')
+        return DriverSession(driver, chromedriver_proc)
+    except Exception as e:
+        logger_ui.error(f"Ошибка подключения к WebDriver: {e}")
+        _terminate_process(chromedriver_proc)
+        return None
+
+
+def session_factory():
+    """Фабрика сессий из webdriver.session_factory; по умолчанию — настоящий Chrome"""
+    target = get_section("webdriver").get("session_factory")
+    return resolve_target(target) if target else create_session
+
+
+class DriverPool:
+    """Пул сессий Chrome, выдаваемых проверкам во временное пользование"""
+
+    def __init__(self, size=2, max_uses=20, acquire_timeout=120, session_factory=None):
+        self.size = size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self._session_factory = session_factory or create_session
+        self._idle = []
+        self._total = 0  # Сессии в пуле, включая выданные и создаваемые
+        self._warming = 0  # Сессии, создаваемые прогревом
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = {
+            "leases": 0,
+            "created": 0,
+            "recycled": 0,
+            "failed": 0,
+            "wait_total": 0.0,
+            "wait_max": 0.0
+        }
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Выдаёт WebDriver на время блока with и возвращает его в пул"""
+        session = self.acquire(timeout)
+        # Отмена проверки прерывает и ожидания Selenium внутри блока with
+        remove = current_token().on_cancel(session.abort)
+        try:
+            yield session.driver
+        except Exception:
+            # После ошибки проверяем, не упал ли сам браузер
+            if not session.broken and not session.ping():
+                session.broken = True
+            raise
         finally:
-            _driver = None
-    # Закрываем процесс ChromeDriver
-    if _chromedriver_process is not None:
+            remove()
+            self.release(session)
+
+    def acquire(self, timeout=None):
+        """Берёт свободную сессию, при необходимости создаёт новую"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        time_s = time.monotonic()
+        deadline = time_s + timeout
+        token = current_token()
+        # Отмена проверки будит ожидание свободной сессии
+        remove = token.on_cancel(self._wake_waiters)
         try:
-            # Сначала пробуем корректно завершить
-            _chromedriver_process.terminate()
-            # Ждем завершения с коротким таймаутом
-            chromedriver_process.wait(timeout=1)
-            loggerui.info('ChromeDriver процесс завершен')
-        except (subprocess.TimeoutExpired, psutil.NoSuchProcess):
-            # Принудительно завершаем, если не ответил
-            try:
-                _chromedriver_process.kill()
-                logger_ui.info('ChromeDriver процесс принудительно завершен')
-            except:
-                pass
-        except Exception as e:
-            logger_ui.error(f'Ошибка при завершении ChromeDriver: {e}')
+            session = self._acquire(token, timeout, deadline)
         finally:
-            _chromedriver_process = None
+            remove()
+        wait = time.monotonic() - time_s
+        DRIVER_ACQUIRE.observe(wait, **check_labels())
+        with self._condition:
+            self._stats["leases"] += 1
+            self._stats["wait_total"] += wait
+            self._stats["wait_max"] = max(self._stats["wait_max"], wait)
+        return session
+
+    def _wake_waiters(self):
+        with self._condition:
+            self._condition.notify_all()
+
+    def _acquire(self, token, timeout, deadline):
+        while True:
+            session = None
+            create = False
+            with self._condition:
+                while True:
+                    token.raise_if_cancelled()
+                    if self._closed:
+                        raise RuntimeError("Пул WebDriver закрыт")
+                    if self._idle:
+                        session = self._idle.pop()
+                        break
+                    # Пока идёт прогрев, ждём уже запускаемую сессию
+                    if self._total < self.size and not self._warming:
+                        self._total += 1
+                        create = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"Нет свободной сессии WebDriver за {timeout} сек.")
+                    self._condition.wait(remaining)
+            if create:
+                session = self._create()
+                if session is None:
+                    raise RuntimeError("Не удалось запустить WebDriver")
+                break
+            if session.ping():
+                break
+            logger_ui.warning('Сессия WebDriver не отвечает, пересоздаём')
+            self._discard(session)
+        return session
+
+    def release(self, session):
+        """Возвращает сессию в пул либо закрывает её после K использований или сбоя"""
+        session.uses += 1
+        with self._condition:
+            # _closed читается под блокировкой: иначе сессия может вернуться в закрытый пул
+            if not (session.broken or session.uses >= self.max_uses or self._closed):
+                self._idle.append(session)
+                self._condition.notify()
+                return
+        self._discard(session)
+
+    def prewarm(self, count=None):
+        """Заранее создаёт сессии, чтобы первая проверка не ждала запуска Chrome"""
+        count = self.size if count is None else min(count, self.size)
+        created = 0
+        while created < count:
+            with self._condition:
+                if self._closed or self._total >= count:
+                    break
+                self._total += 1
+                self._warming += 1
+            session = self._create()
+            with self._condition:
+                self._warming -= 1
+                if session is not None:
+                    self._idle.append(session)
+                self._condition.notify_all()
+            if session is None:
+                break
+            created += 1
+        return created
+
+    def stats(self):
+        """Размер пула и статистика ожидания выдачи"""
+        with self._condition:
+            leases = self._stats["leases"]
+            return {
+                "size": self.size,
+                "total": self._total,
+                "idle": len(self._idle),
+                "in_use": self._total - len(self._idle),
+                "leases": leases,
+                "created": self._stats["created"],
+                "recycled": self._stats["recycled"],
+                "failed": self._stats["failed"],
+                "wait_avg": round(self._stats["wait_total"] / leases, 3) if leases else 0.0,
+                "wait_max": round(self._stats["wait_max"], 3)
+            }
+
+    def close(self):
+        """Закрывает все свободные сессии; выданные закроются при возврате"""
+        with self._condition:
+            self._closed = True
+            sessions, self._idle = self._idle, []
+            self._total -= len(sessions)
+            self._condition.notify_all()
+        for session in sessions:
+            session.close()
+
+    def _create(self):
+        try:
+            with DRIVER_START.time(**check_labels()):
+                session = self._session_factory()
+        except Exception as e:
+            logger_ui.error(f"Ошибка запуска сессии WebDriver: {e}")
+            session = None
+        with self._condition:
+            if session is None:
+                self._total -= 1
+                self._stats["failed"] += 1
+                self._condition.notify()
+            else:
+                self._stats["created"] += 1
+        return session
+
+    def _discard(self, session):
+        session.close()
+        with self._condition:
+            self._total -= 1
+            self._stats["recycled"] += 1
+            self._condition.notify()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_prewarm_thread = None
+
+
+def get_driver_pool():
+    """Общий пул WebDriver, настраивается разделом webdriver в конфиге"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                settings = get_section("webdriver")
+                _pool = DriverPool(
+                    size=settings.get("pool_size", 2),
+                    max_uses=settings.get("max_uses", 20),
+                    acquire_timeout=settings.get("acquire_timeout", 120),
+                    session_factory=session_factory()
+                )
+    return _pool
+
+
+def start_prewarm(count=None):
+    """Запускает прогрев пула WebDriver в фоновом потоке"""
+    global _prewarm_thread
+    if _prewarm_thread is not None and _prewarm_thread.is_alive():
+        return _prewarm_thread
+    if count is None:
+        count = get_section("webdriver").get("prewarm_sessions", 1)
+
+    def prewarm():
+        time_s = time.time()
+        created = get_driver_pool().prewarm(count)
+        logger_ui.info(
+            f"Прогрев WebDriver: запущено сессий {created} за {time.time() - time_s:.2f} сек.")
+
+    _prewarm_thread = threading.Thread(
+        target=prewarm, name="webdriver-prewarm", daemon=True)
+    _prewarm_thread.start()
+    return _prewarm_thread
+
+
+def get_chromedriver():
+    """WebDriver из общего пула на время текущей проверки
+
+    Повторные вызовы в той же проверке возвращают тот же драйвер, а после её
+    завершения сессия возвращается в пул. Вне проверок сессия закрепляется
+    за потоком и возвращается в пул при close_driver().
+    """
+    token = check_token()
+    key = token if token is not None else threading.current_thread()
+    with _leases_lock:
+        leased = _leases.get(key)
+    if leased is not None:
+        return leased[1].driver
+    pool = get_driver_pool()
+    try:
+        session = pool.acquire()
+    except CheckCancelled:
+        raise
+    except Exception as e:
+        logger_ui.error(f"Не удалось получить WebDriver: {e}")
+        return None
+    with _leases_lock:
+        _leases[key] = (pool, session)
+    if token is not None:
+        # Отмена проверки прерывает и ожидания Selenium, как в DriverPool.lease()
+        remove = token.on_cancel(session.abort)
+        token.defer(lambda: _return_lease(token, remove))
+    return session.driver
+
+
+def _return_lease(key, remove=None):
+    with _leases_lock:
+        leased = _leases.pop(key, None)
+    if remove is not None:
+        remove()
+    if leased is not None:
+        pool, session = leased
+        pool.release(session)
+
+
+def _return_outside_leases():
+    """Возвращает в пул сессии, выданные вне проверок (по одной на поток)"""
+    with _leases_lock:
+        keys = [key for key in _leases if isinstance(key, threading.Thread)]
+    for key in keys:
+        _return_lease(key)
+
+
+def _quit_driver(driver):
+    try:
+        driver.quit()
+        logger_ui.info('WebDriver закрыт')
+    except Exception as e:
+        logger_ui.error(f'Ошибка при закрытии WebDriver: {e}')
+
+
+def _terminate_process(process):
+    try:
+        # Сначала пробуем корректно завершить
+        process.terminate()
+        # Ждем завершения с коротким таймаутом
+        process.wait(timeout=1)
+        logger_ui.info('ChromeDriver процесс завершен')
+    except (subprocess.TimeoutExpired, psutil.NoSuchProcess):
+        # Принудительно завершаем, если не ответил
+        try:
+            process.kill()
+            logger_ui.info('ChromeDriver процесс принудительно завершен')
+        except:
+            pass
+    except Exception as e:
+        logger_ui.error(f'Ошибка при завершении ChromeDriver: {e}')
+
+
+def close_driver():
+    """Функция для закрытия WebDriver, пула сессий и Chromedriver процесса"""
+    global _pool
+    # Сессии, выданные вне проверок, возвращаются в пул и закрываются вместе с ним
+    _return_outside_leases()
+    # Закрываем сессии пула
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close()
     # Дополнительно убиваем любые оставшиеся процессы chromedriver из папки проекта
     kill_remaining_chromedrivers()
 
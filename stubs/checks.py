@@ -0,0 +1,54 @@
+"""Проверки-пустышки для замеров и тестов исполнителя и интерфейса без внешних систем.
+
+Подключаются в реестре как обычные проверки, например:
+
+    "Пустая проверка": {"target": "stubs.checks:noop"}
+"""
+import asyncio
+import logging
+import time
+from services.cancel import current_token
+from services.logger import log
+
+
+def noop():
+    """Сразу успешна: замеряется только накладной расход запуска"""
+    return True
+
+
+def chatty(messages=20):
+    """Пишет messages сообщений в лог вкладки"""
+    for index in range(messages):
+        log(f"Сообщение {index + 1} из {messages}", "info")
+    log("Успешно выполнено", "success")
+    return True
+
+
+def logged(messages=3):
+    """Пишет messages записей в общий лог через logging, а не в лог вкладки"""
+    for index in range(messages):
+        logging.getLogger(__name__).info(f"Запись {index + 1} из {messages}")
+    return True
+
+
+def failing(message="Проверка сломалась"):
+    """Падает с исключением"""
+    raise ValueError(message)
+
+
+def stuck(seconds=60):
+    """Зависает, не реагируя на отмену (как вызов в нативном коде)"""
+    time.sleep(seconds)
+    return True
+
+
+def sleepy(seconds=0.1):
+    """Ждёт seconds секунд, реагируя на отмену"""
+    current_token().sleep(seconds)
+    return True
+
+
+async def async_noop():
+    """Async-проверка, которая сразу успешна"""
+    await asyncio.sleep(0)
+    return True
@@ -0,0 +1,237 @@
+"""Локальная замена Elastic для отладки services/elastic.py без кластера.
+
+Поддерживает то, что использует клиент: _pit, _search с search_after,
+запросы bool/range/term/match/match_phrase/match_all и сортировку по времени.
+
+    python -m stubs.elastic_server --port 9200 --docs 100000 --rate 20
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+LEVELS = ["INFO"] * 90 + ["WARN"] * 8 + ["ERROR"] * 2
+_UNITS = {"s": 1000, "m": 60000, "h": 3600000, "d": 86400000}
+
+
+class DocumentStore:
+    """Документы в памяти, упорядоченные по времени"""
+
+    def __init__(self, time_field="@timestamp"):
+        self.time_field = time_field
+        self.docs = []
+        self._keys = []
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def add(self, source, millis=None):
+        millis = int(time.time() * 1000) if millis is None else millis
+        source = dict(source)
+        source[self.time_field] = datetime.fromtimestamp(
+            millis / 1000, timezone.utc).isoformat()
+        with self._lock:
+            self._seq += 1
+            doc = {"_id": uuid.uuid4().hex[:20], "_source": source,
+                   "millis": millis, "seq": self._seq}
+            position = bisect_left(self._keys, millis + 1)
+            self._keys.insert(position, millis)
+            self.docs.insert(position, doc)
+        return doc
+
+    def search(self, query, size, search_after=None):
+        # Нижняя граница по времени — из search_after или из range на поле времени
+        since = search_after[0] if search_after else _lower_bound(query, self.time_field)
+        with self._lock:
+            start = bisect_left(self._keys, since) if since is not None else 0
+            docs = self.docs[start:]
+        hits = []
+        for doc in docs:
+            # Второе значение — неявный tiebreaker, как _shard_doc у PIT
+            sort = [doc["millis"], doc["seq"]]
+            if search_after is not None and sort <= list(search_after):
+                continue
+            if _matches(query, doc, self.time_field):
+                hits.append({"_id": doc["_id"], "_source": doc["_source"], "sort": sort})
+                if len(hits) >= size:
+                    break
+        return hits
+
+
+def _matches(query, doc, time_field):
+    if not query or "match_all" in query:
+        return True
+    if "bool" in query:
+        clauses = query["bool"]
+        required = _as_list(clauses.get("filter")) + _as_list(clauses.get("must"))
+        if not all(_matches(clause, doc, time_field) for clause in required):
+            return False
+        return not any(_matches(clause, doc, time_field)
+                       for clause in _as_list(clauses.get("must_not")))
+    if "range" in query:
+        field, bounds = next(iter(query["range"].items()))
+        value = doc["millis"] if field == time_field else doc["_source"].get(field)
+        for op, check in (("gte", lambda a, b: a >= b), ("gt", lambda a, b: a > b),
+                          ("lte", lambda a, b: a <= b), ("lt", lambda a, b: a < b)):
+            if op in bounds and not check(value, _millis(bounds[op])):
+                return False
+        return True
+    for kind in ("term", "match", "match_phrase"):
+        if kind in query:
+            field, expected = next(iter(query[kind].items()))
+            if isinstance(expected, dict):
+                expected = expected.get("value", expected.get("query"))
+            actual = str(doc["_source"].get(field, ""))
+            if kind == "term":
+                return actual == str(expected)
+            return str(expected).lower() in actual.lower()
+    raise ValueError(f"Неподдерживаемый запрос: {query}")
+
+
+def _lower_bound(query, time_field):
+    """gte/gt из range по времени на верхнем уровне bool.filter, если есть"""
+    clauses = [query or {}]
+    if query and "bool" in query:
+        clauses = _as_list(query["bool"].get("filter")) + _as_list(query["bool"].get("must"))
+    for clause in clauses:
+        bounds = clause.get("range", {}).get(time_field, {})
+        for op in ("gte", "gt"):
+            if op in bounds:
+                return _millis(bounds[op])
+    return None
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _millis(value):
+    """epoch_millis или дата-математика вида now-15m"""
+    if isinstance(value, (int, float)):
+        return value
+    match = re.fullmatch(r"now(?:-(\d+)([smhd]))?", value)
+    if match:
+        shift = int(match.group(1) or 0) * _UNITS.get(match.group(2) or "s", 0)
+        return int(time.time() * 1000) - shift
+    return int(value)
+
+
+class ElasticStub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, store):
+        super().__init__(address, _Handler)
+        self.store = store
+        self.pits = set()
+        self.requests = 0
+        self.last_authorization = None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length)) if length else {}
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        self.server.requests += 1
+        self.server.last_authorization = self.headers.get("Authorization")
+        url = urlparse(self.path)
+        body = self._body()
+        if url.path.endswith("/_pit"):
+            pit_id = uuid.uuid4().hex
+            self.server.pits.add(pit_id)
+            return self._reply(200, {"id": pit_id})
+        if url.path.endswith("/_search"):
+            pit = body.get("pit")
+            if pit is not None and pit["id"] not in self.server.pits:
+                return self._reply(404, {"error": {
+                    "type": "search_context_missing_exception",
+                    "reason": "No search context found"}})
+            try:
+                hits = self.server.store.search(
+                    body.get("query"), body.get("size", 10), body.get("search_after"))
+            except ValueError as e:
+                return self._reply(400, {"error": {"type": "parsing_exception",
+                                                   "reason": str(e)}})
+            payload = {"hits": {"hits": hits}}
+            if pit is not None:
+                payload["pit_id"] = pit["id"]
+            return self._reply(200, payload)
+        if url.path.endswith("/_doc"):
+            doc = self.server.store.add(body)
+            return self._reply(201, {"_id": doc["_id"], "result": "created"})
+        self._reply(404, {"error": {"type": "not_found", "reason": url.path}})
+
+    def do_DELETE(self):
+        self.server.requests += 1
+        if urlparse(self.path).path == "/_pit":
+            pit_id = self._body().get("id")
+            freed = pit_id in self.server.pits
+            self.server.pits.discard(pit_id)
+            return self._reply(200, {"succeeded": freed, "num_freed": int(freed)})
+        self._reply(404, {"error": {"type": "not_found", "reason": self.path}})
+
+
+def random_source():
+    level = random.choice(LEVELS)
+    return {"level": level, "message": f"{level} adapter request {random.randint(1, 10**6)}"}
+
+
+def fill(store, count, span_seconds=3600):
+    """Заполняет хранилище документами за последние span_seconds"""
+    now = int(time.time() * 1000)
+    for _ in range(count):
+        store.add(random_source(), now - random.randint(0, span_seconds * 1000))
+
+
+def start(port=0, docs=0):
+    """Запускает сервер в фоне; возвращает (сервер, хранилище)"""
+    store = DocumentStore()
+    fill(store, docs)
+    server = ElasticStub(("127.0.0.1", port), store)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная замена Elastic _search/_pit")
+    parser.add_argument("--port", type=int, default=9200)
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--rate", type=float, default=10,
+                        help="новых документов в секунду")
+    args = parser.parse_args()
+    server, store = start(args.port, args.docs)
+    print(f"Elastic-заглушка: http://127.0.0.1:{server.server_port}")
+    try:
+        while True:
+            time.sleep(1)
+            for _ in range(int(args.rate)):
+                store.add(random_source())
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Поддельный WebDriver для замеров и отладки пула без Chrome и chromedriver.
+
+Отвечает на команды, которыми пользуются пул и get_chromedriver (ping через
+execute_script, quit), и считает их. Подключается в конфиге:
+
+    "webdriver": {"session_factory": "stubs.fake_webdriver:create_session", ...}
+"""
+import time
+from services.webdriver import DriverSession
+
+
+class FakeDriver:
+    """WebDriver без браузера: каждая команда может «стоить» latency секунд"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.current_url = "about:blank"
+        self.title = ""
+        self.commands = 0
+        self.closed = False
+
+    def _command(self):
+        if self.closed:
+            raise RuntimeError("Сессия WebDriver закрыта")
+        self.commands += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get(self, url):
+        self._command()
+        self.current_url = url
+        self.title = url
+
+    def execute_script(self, script, *args):
+        self._command()
+        return 1 if script.strip() == "return 1" else None
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def quit(self):
+        self.closed = True
+
+
+class FakeProcess:
+    """Вместо процесса chromedriver: завершается сразу"""
+
+    def __init__(self):
+        self.pid = 0
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+    def terminate(self):
+        self.returncode = -15
+
+    def kill(self):
+        self.returncode = -9
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+
+def create_session(startup=0.0, latency=0.0):
+    """Сессия с поддельным драйвером; startup имитирует запуск Chrome"""
+    if startup:
+        time.sleep(startup)
+    return DriverSession(FakeDriver(latency), FakeProcess())
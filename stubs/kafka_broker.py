@@ -0,0 +1,82 @@
+"""Поддельный кластер Kafka для отладки проверок системы K без брокеров.
+
+Реализует тот же интерфейс, что и services.kafka_snapshot.KafkaPythonBackend
+(fetch/close), и считает обращения к «кластеру». Подключается в конфиге:
+
+    "kafka": {"backend": "stubs.kafka_broker:FakeKafkaBackend", ...}
+"""
+import random
+import threading
+
+
+class FakeKafkaBackend:
+    """Топики, партиции и группы в памяти; смещения можно двигать вручную"""
+
+    def __init__(self, bootstrap_servers="fake:9092", topics=20, partitions=100,
+                 groups=("orders-service", "billing-service"), replicas=3, seed=1,
+                 **client_options):
+        self.bootstrap_servers = bootstrap_servers
+        self.replicas = replicas
+        self.fetches = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.topics = {f"topic-{t:03d}": {p: {"leader": p % 3, "isr": replicas,
+                                              "end": self._random.randint(0, 10**6)}
+                                          for p in range(partitions)}
+                       for t in range(topics)}
+        self.groups = {}
+        for index, group in enumerate(groups):
+            # Каждая группа читает свою половину топиков и почти не отстаёт
+            consumed = [topic for t, topic in enumerate(sorted(self.topics))
+                        if t % len(groups) == index]
+            self.groups[group] = {
+                "state": "Stable", "members": 3,
+                "offsets": {(topic, p): max(0, data["end"] - self._random.randint(0, 5))
+                            for topic in consumed
+                            for p, data in self.topics[topic].items()}}
+
+    def fetch(self, groups=None):
+        with self._lock:
+            self.fetches += 1
+            topics = {topic: [(p, data["leader"], self.replicas, data["isr"])
+                              for p, data in partitions.items()]
+                      for topic, partitions in self.topics.items()}
+            end_offsets = {(topic, p): data["end"]
+                           for topic, partitions in self.topics.items()
+                           for p, data in partitions.items()}
+            names = list(self.groups) if groups is None else groups
+            group_data = {}
+            for name in names:
+                group = self.groups.get(name)
+                if group is None:
+                    group_data[name] = {"state": "Dead", "members": 0, "offsets": {}}
+                else:
+                    group_data[name] = {"state": group["state"], "members": group["members"],
+                                        "offsets": dict(group["offsets"])}
+            return {"topics": topics, "end_offsets": end_offsets, "groups": group_data}
+
+    def produce(self, topic, count, partition=None):
+        """Дописывает count сообщений в партицию (или во все партиции топика)"""
+        with self._lock:
+            partitions = self.topics[topic]
+            for p in ([partition] if partition is not None else partitions):
+                partitions[p]["end"] += count
+
+    def consume(self, group, topic=None):
+        """Группа дочитывает до конца (все свои топики или один)"""
+        with self._lock:
+            offsets = self.groups[group]["offsets"]
+            for topic_name, p in offsets:
+                if topic is None or topic_name == topic:
+                    offsets[(topic_name, p)] = self.topics[topic_name][p]["end"]
+
+    def stop_group(self, group):
+        with self._lock:
+            self.groups[group].update(state="Empty", members=0)
+
+    def take_offline(self, topic, partition):
+        with self._lock:
+            self.topics[topic][partition].update(leader=-1, isr=0)
+
+    def close(self):
+        pass
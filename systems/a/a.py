@@ -1,5 +1,7 @@
 import logging
+from services.cancel import CheckCancelled
 from services.logger import log, init_logging
+from services.logtail import check_log_errors
 
 
 # Упрощенный интерфейс логирования
@@ -42,12 +44,12 @@ def adapterCheck():
         return False
 
 
-def check_errors_in_log_adapter():
+def check_errors_in_log_adapter(tail="А: логи адаптера"):
     try:
-        print('test1')
-        logger_ui.info('Успешно выполнено')
-        log('Успешно выполнено', 'success')
-        return  True
+        # Читаются только строки, дописанные с прошлого запуска
+        return check_log_errors(tail)
+    except CheckCancelled:
+        raise
     except Exception as e:
         logger_ui.info(f'Ошибка - {e}')
         log('Ошибка', 'error')
@@ -1,4 +1,6 @@
 import logging
+from services.cancel import CheckCancelled
+from services.load import check_server_load
 from services.logger import log, init_logging
 # Упрощенный интерфейс логирования
 logger_ui = logging.getLogger(__name__)
@@ -14,3 +16,15 @@ def test():
         logger_ui.info(f'Ошибка - {e}')
         log('Ошибка', 'error')
         return False
+
+
+def server_load():
+    try:
+        # Пороги проверяются по p50/p95/max за окно, а не по одному замеру
+        return check_server_load()
+    except CheckCancelled:
+        raise
+    except Exception as e:
+        logger_ui.info(f'Ошибка - {e}')
+        log('Ошибка', 'error')
+        return False
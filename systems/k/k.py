@@ -1,8 +1,20 @@
 import logging
+from services.cancel import CheckCancelled
+from services.config import get_section
+from services.kafka_snapshot import get_snapshot
 from services.logger import log, init_logging
 # Упрощенный интерфейс логирования
 logger_ui = logging.getLogger(__name__)
 
+# Сколько партиций перечислять в сообщении, остальные — числом
+SHOW_PARTITIONS = 10
+
+
+def _partitions(snapshot, indexes):
+    shown = ", ".join(snapshot.describe(index) for index in indexes[:SHOW_PARTITIONS])
+    rest = len(indexes) - SHOW_PARTITIONS
+    return f"{shown} и ещё {rest}" if rest > 0 else shown
+
 
 def test():
     try:
@@ -14,3 +26,93 @@ def test():
         logger_ui.info(f'Ошибка - {e}')
         log('Ошибка', 'error')
         return False
+
+
+def topics():
+    """Заданные топики существуют, у всех партиций есть лидер"""
+    try:
+        snapshot = get_snapshot()
+        missing = [topic for topic in get_section("kafka").get("topics", [])
+                   if topic not in snapshot.topics]
+        for topic in missing:
+            log(f'Топик не найден: {topic}', 'error')
+        offline = snapshot.offline()
+        if offline:
+            log(f'Партиции без лидера ({len(offline)}): '
+                f'{_partitions(snapshot, offline)}', 'error')
+        under_replicated = snapshot.under_replicated()
+        if under_replicated:
+            log(f'Недореплицированные партиции ({len(under_replicated)}): '
+                f'{_partitions(snapshot, under_replicated)}', 'warning')
+        success = not missing and not offline
+        log(f'Топиков: {len(snapshot.topics)}, партиций: {len(snapshot)}',
+            'success' if success else 'error')
+        return success
+    except CheckCancelled:
+        raise
+    except Exception as e:
+        logger_ui.info(f'Ошибка - {e}')
+        log('Ошибка', 'error')
+        return False
+
+
+def consumers():
+    """Группы потребителей из конфига активны и читают свои топики"""
+    try:
+        snapshot = get_snapshot()
+        success = True
+        for name, limits in get_section("kafka").get("groups", {}).items():
+            group = snapshot.groups.get(name)
+            min_members = limits.get("min_members", 1)
+            if group is None or group.state == "Dead":
+                log(f'Группа {name} не найдена', 'error')
+                success = False
+            elif group.members < min_members:
+                log(f'Группа {name}: потребителей {group.members} '
+                    f'(нужно не меньше {min_members}), состояние {group.state}', 'error')
+                success = False
+            elif not group.consumed_topics:
+                log(f'Группа {name}: нет зафиксированных смещений', 'error')
+                success = False
+            else:
+                log(f'Группа {name}: потребителей {group.members}, '
+                    f'топиков {len(group.consumed_topics)}', 'info')
+        log('Потребители в порядке' if success else 'Есть проблемы с потребителями',
+            'success' if success else 'error')
+        return success
+    except CheckCancelled:
+        raise
+    except Exception as e:
+        logger_ui.info(f'Ошибка - {e}')
+        log('Ошибка', 'error')
+        return False
+
+
+def lag():
+    """Задержка групп (всего и на партицию) не выше порогов из конфига"""
+    try:
+        snapshot = get_snapshot()
+        success = True
+        for name, limits in get_section("kafka").get("groups", {}).items():
+            group = snapshot.groups.get(name)
+            if group is None or group.state == "Dead":
+                log(f'Группа {name} не найдена', 'error')
+                success = False
+                continue
+            max_lag = limits.get("max_lag")
+            max_partition_lag = limits.get("max_partition_lag")
+            too_slow = (max_lag is not None and group.total > max_lag) or \
+                (max_partition_lag is not None and group.max > max_partition_lag)
+            worst = snapshot.describe(group.max_index) if group.max else "—"
+            log(f'Группа {name}: задержка {group.total}, максимум {group.max} ({worst})',
+                'error' if too_slow else 'info')
+            success = success and not too_slow
+        log('Задержки в норме' if success else 'Задержки выше порога',
+            'success' if success else 'error')
+        return success
+    except CheckCancelled:
+        raise
+    except Exception as e:
+        logger_ui.info(f'Ошибка - {e}')
+        log('Ошибка', 'error')
+        return False
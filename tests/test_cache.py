@@ -0,0 +1,45 @@
+from services.cache import ResultCache, format_age
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_result_expires_after_ttl():
+    clock = Clock()
+    cache = ResultCache(clock=clock)
+    cache.put(("П", "Проверка"), {"success": True})
+    clock.now += 30
+    assert cache.get(("П", "Проверка"), ttl=60) == ({"success": True}, 30)
+    clock.now += 31
+    assert cache.get(("П", "Проверка"), ttl=60) is None
+    # Устаревшая запись удаляется, а не копится
+    assert len(cache) == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = ResultCache(max_entries=2, clock=Clock())
+    cache.put(("П", "a"), 1)
+    cache.put(("П", "b"), 2)
+    cache.get(("П", "a"), ttl=60)
+    cache.put(("П", "c"), 3)
+    assert cache.get(("П", "b"), ttl=60) is None
+    assert cache.get(("П", "a"), ttl=60) == (1, 0)
+
+
+def test_invalidate_system():
+    cache = ResultCache(clock=Clock())
+    cache.put(("П", "a"), 1)
+    cache.put(("А", "a"), 2)
+    cache.invalidate(system="П")
+    assert cache.get(("П", "a"), ttl=60) is None
+    assert cache.get(("А", "a"), ttl=60) == (2, 0)
+
+
+def test_format_age():
+    assert [format_age(s) for s in (45, 180, 3600, 3900)] == \
+        ["45 с", "3 мин", "1 ч", "1 ч 5 мин"]
@@ -0,0 +1,77 @@
+import threading
+import time
+from services.credentials import SecretProvider
+
+
+class FakeKeyring:
+    """Хранилище паролей в памяти; считает чтения"""
+
+    def __init__(self, passwords=None, delay=0):
+        self.passwords = dict(passwords or {})
+        self.delay = delay
+        self.reads = 0
+
+    def get_password(self, service, username):
+        self.reads += 1
+        time.sleep(self.delay)
+        return self.passwords.get((service, username))
+
+    def set_password(self, service, username, value):
+        self.passwords[(service, username)] = value
+
+
+def test_one_keyring_read_per_key():
+    keyring = FakeKeyring({("Elastic", "user"): "secret"}, delay=0.05)
+    secrets = SecretProvider(backend=keyring)
+    values = []
+    threads = [threading.Thread(target=lambda: values.append(secrets.get("Elastic", "user")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert values == ["secret"] * 8
+    assert secrets.get("Elastic", "user") == "secret"
+    assert keyring.reads == 1
+
+
+def test_value_reread_after_ttl():
+    keyring = FakeKeyring({("Jira", "user"): "old"})
+    secrets = SecretProvider(ttl=0.05, backend=keyring)
+    assert secrets.get("Jira", "user") == "old"
+    keyring.passwords[("Jira", "user")] = "new"
+    assert secrets.get("Jira", "user") == "old"
+    time.sleep(0.1)
+    assert secrets.get("Jira", "user") == "new"
+    assert keyring.reads == 2
+
+
+def test_set_updates_cache():
+    keyring = FakeKeyring({("Elastic", "user"): "old"})
+    secrets = SecretProvider(backend=keyring)
+    assert secrets.get("Elastic", "user") == "old"
+    secrets.set("Elastic", "user", "new")
+    assert secrets.get("Elastic", "user") == "new"
+    assert keyring.passwords[("Elastic", "user")] == "new"
+    assert keyring.reads == 1
+
+
+def test_missing_secret():
+    keyring = FakeKeyring()
+    secrets = SecretProvider(backend=keyring)
+    assert secrets.get("AdapterA", "admin") is None
+    assert secrets.get("AdapterA", "admin") is None
+    assert keyring.reads == 1
+    secrets.set("AdapterA", "admin", "secret")
+    assert secrets.get("AdapterA", "admin") == "secret"
+
+
+def test_invalidate_service():
+    keyring = FakeKeyring({("Jira", "user"): "a", ("Elastic", "user"): "b"})
+    secrets = SecretProvider(backend=keyring)
+    secrets.get("Jira", "user")
+    secrets.get("Elastic", "user")
+    secrets.invalidate("Jira")
+    secrets.get("Jira", "user")
+    secrets.get("Elastic", "user")
+    assert keyring.reads == 3
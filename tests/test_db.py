@@ -0,0 +1,178 @@
+import threading
+import time
+import pytest
+from services import db
+from services.cancel import CancelToken, CheckCancelled, bind_token
+from services.db import ConnectionPool
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, *params):
+        if self.conn.dead:
+            raise OSError("Соединение разорвано")
+        self.conn.executed.append(sql)
+        return self
+
+    def fetchall(self):
+        return [(1,)]
+
+    def fetchone(self):
+        return (1,)
+
+    def cancel(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Соединение pyodbc в памяти: можно «уронить» и замедлить закрытие"""
+
+    def __init__(self, close_delay=0):
+        self.dead = False
+        self.closed = False
+        self.close_delay = close_delay
+        self.executed = []
+        self.timeout = None
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        time.sleep(self.close_delay)
+        self.closed = True
+
+
+@pytest.fixture
+def connections():
+    return []
+
+
+@pytest.fixture
+def make_pool(connections):
+    pools = []
+
+    def make(**options):
+        def connect(connection_string):
+            conn = FakeConnection()
+            connections.append(conn)
+            return conn
+        pool = ConnectionPool("DSN=fake", connect=connect, **options)
+        pools.append(pool)
+        return pool
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+def test_connection_reused(make_pool, connections):
+    pool = make_pool()
+    for _ in range(3):
+        assert pool.scalar("SELECT 1") == 1
+    assert len(connections) == 1
+    assert pool.stats()["borrows"] == 3
+
+
+def test_dead_connection_replaced_on_borrow(make_pool, connections):
+    pool = make_pool(validate_after=0)
+    assert pool.scalar("SELECT 1") == 1
+    connections[0].dead = True
+    assert pool.scalar("SELECT 1") == 1
+    assert len(connections) == 2
+    assert connections[0].closed
+    stats = pool.stats()
+    assert stats["invalid"] == 1 and stats["total"] == 1
+
+
+def test_failed_query_marks_connection_for_check(make_pool, connections):
+    pool = make_pool()
+    with pool.connection() as pooled:
+        connections[0].dead = True
+        with pytest.raises(OSError):
+            pooled.query("SELECT 1")
+    # Соединение использовано только что, но после ошибки его проверяют перед выдачей
+    with pool.connection() as pooled:
+        assert pooled.conn is connections[1]
+    assert pool.stats()["invalid"] == 1
+
+
+def test_broken_connection_discarded(make_pool, connections):
+    pool = make_pool()
+    with pool.connection() as pooled:
+        pooled.broken = True
+    assert connections[0].closed
+    assert pool.stats()["total"] == 0
+    with pool.connection() as pooled:
+        assert pooled.conn is connections[1]
+
+
+def test_idle_connections_closed(make_pool, connections):
+    pool = make_pool(idle_timeout=0.05)
+    pool.scalar("SELECT 1")
+    time.sleep(0.1)
+    pool.close_idle()
+    assert connections[0].closed
+    stats = pool.stats()
+    assert stats["closed_idle"] == 1 and stats["total"] == 0
+
+
+def test_reaper_closes_idle_and_reschedules(make_pool, connections, monkeypatch):
+    pool = make_pool(idle_timeout=0.05)
+    pool.scalar("SELECT 1")
+    planned = []
+
+    class Scheduler:
+        def call_later(self, delay, callback):
+            planned.append((delay, callback))
+
+    monkeypatch.setattr(db, "_pools", {"fake": pool})
+    monkeypatch.setattr(db, "get_scheduler", Scheduler)
+    time.sleep(0.1)
+    db._reap()
+    assert connections[0].closed
+    assert planned == [(db.REAP_INTERVAL, db._reap)]
+
+
+def test_slow_close_does_not_block_pool(make_pool):
+    pool = make_pool(idle_timeout=0.05)
+    with pool.connection() as pooled:
+        pooled.conn.close_delay = 0.5
+    time.sleep(0.1)
+    closer = threading.Thread(target=pool.close_idle)
+    closer.start()
+    time.sleep(0.05)
+    # Закрытие идёт вне блокировки: пул отвечает и выдаёт соединения
+    time_s = time.monotonic()
+    pool.stats()
+    with pool.connection():
+        pass
+    assert time.monotonic() - time_s < 0.3
+    closer.join(5)
+
+
+def test_waits_for_free_connection(make_pool):
+    pool = make_pool(max_size=1)
+    first = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.1)
+    threading.Timer(0.1, pool.release, [first]).start()
+    second = pool.acquire(timeout=5)
+    assert second is first
+    pool.release(second)
+
+
+def test_cancel_interrupts_wait(make_pool):
+    pool = make_pool(max_size=1)
+    first = pool.acquire()
+    token = CancelToken()
+    threading.Timer(0.1, token.cancel).start()
+    time_s = time.monotonic()
+    with bind_token(token), pytest.raises(CheckCancelled):
+        pool.acquire(timeout=5)
+    assert time.monotonic() - time_s < 1
+    pool.release(first)
+    assert pool.stats()["in_use"] == 0
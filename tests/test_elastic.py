@@ -0,0 +1,83 @@
+import base64
+import time
+import pytest
+from services.elastic import CursorStore, ElasticClient, IncrementalScan
+from stubs import elastic_server
+
+
+@pytest.fixture
+def elastic():
+    server, store = elastic_server.start()
+    client = ElasticClient(f"http://127.0.0.1:{server.server_address[1]}")
+    yield server, store, client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def sent_credentials(server):
+    return base64.b64decode(server.last_authorization.split()[1]).decode("utf-8")
+
+
+def test_changed_password_used_without_new_client(elastic):
+    server, _, client = elastic
+    passwords = ["old-secret"]
+    client.username = "login"
+    client._password = lambda: passwords[0]
+    client.request("POST", "/logs/_search", body={"size": 1})
+    assert sent_credentials(server) == "login:old-secret"
+    passwords[0] = "new-secret"
+    client.request("POST", "/logs/_search", body={"size": 1})
+    assert sent_credentials(server) == "login:new-secret"
+
+
+def make_scan(tmp_path, client, page_size=1000):
+    store = CursorStore(str(tmp_path / "elastic_cursors.json"))
+    return IncrementalScan(client, store, "logs", {"match_all": {}}, page_size=page_size)
+
+
+def read(scan):
+    ids = []
+    scan.run(lambda hits: ids.extend(hit["_id"] for hit in hits))
+    return ids
+
+
+def served_hits(monkeypatch, store):
+    """Сколько документов отдал сервер — то, что клиент прочитал по сети"""
+    served = []
+    search = store.search
+
+    def counting(query, size, search_after=None):
+        hits = search(query, size, search_after)
+        served.extend(hits)
+        return hits
+    monkeypatch.setattr(store, "search", counting)
+    return served
+
+
+def test_resume_reads_only_new_documents(elastic, tmp_path, monkeypatch):
+    _, store, client = elastic
+    now = int(time.time() * 1000)
+    old = [store.add({"n": i}, now - 60000 + i)["_id"] for i in range(50)]
+    scan = make_scan(tmp_path, client, page_size=20)
+    assert read(scan) == old
+    served = served_hits(monkeypatch, store)
+    assert read(scan) == []
+    # С отметки сервер отдаёт лишь последний прочитанный документ (равный ей по времени)
+    assert len(served) == 1
+    new = [store.add({"n": i}, now + i)["_id"] for i in range(5)]
+    served.clear()
+    assert read(make_scan(tmp_path, client, page_size=20)) == new
+    assert len(served) == 6
+
+
+def test_ties_at_high_water_mark(elastic, tmp_path):
+    _, store, client = elastic
+    moment = int(time.time() * 1000) - 1000
+    first = [store.add({"n": i}, moment)["_id"] for i in range(3)]
+    scan = make_scan(tmp_path, client, page_size=2)
+    assert read(scan) == first
+    # Документы с той же отметкой времени, пришедшие позже, не теряются и не дублируются
+    late = [store.add({"n": i}, moment)["_id"] for i in range(2)]
+    assert read(scan) == late
+    assert read(scan) == []
@@ -0,0 +1,109 @@
+import threading
+import time
+from concurrent.futures import TimeoutError
+import pytest
+from services.executor import CheckExecutor, CheckListener
+from services.registry import CheckRegistry
+
+
+def make_executor(**options):
+    registry = CheckRegistry({"Т": {
+        "зависшая": {"target": "stubs.checks:noop", "resources": ["chrome"]},
+        "быстрая": {"target": "stubs.checks:noop", "resources": ["chrome"]},
+    }})
+    options.setdefault("cancel_grace", 0.1)
+    return CheckExecutor(max_workers=2, resource_limits={"chrome": 1},
+                         registry=registry, **options)
+
+
+def run(executor, name, func):
+    results = executor.submit("Т", [(name, func)], CheckListener()).wait(10)
+    assert results is not None
+    return results[0]
+
+
+def test_timeout_cancels_check():
+    executor = make_executor(check_timeout=0.1)
+
+    def slow(token):
+        token.sleep(5)
+        return True
+
+    result = run(executor, "быстрая", slow)
+    assert not result["success"]
+    assert result["timed_out"]
+    assert result["duration"] < 2
+
+
+def test_abandoned_check_keeps_resources_until_body_exits():
+    executor = make_executor(check_timeout=0.1)
+    release_body = threading.Event()
+    body_finished = threading.Event()
+
+    def stuck():
+        # Не реагирует на отмену: поток будет брошен исполнителем
+        release_body.wait(10)
+        body_finished.set()
+        return True
+
+    result = run(executor, "зависшая", stuck)
+    assert result["timed_out"] and not result["success"]
+
+    started = threading.Event()
+
+    def quick():
+        started.set()
+        return True
+
+    job = executor.submit("Т", [("быстрая", quick)], CheckListener())
+    # Ресурс chrome всё ещё занят брошенным потоком
+    with pytest.raises(TimeoutError):
+        job.wait(0.5)
+    assert not started.is_set()
+    release_body.set()
+    results = job.wait(10)
+    assert body_finished.is_set()
+    assert results[0]["success"]
+
+
+def test_result_ready_before_late_cancel_is_kept():
+    executor = make_executor()
+
+    def finished_then_cancelled(token):
+        token.cancel("Остановлено")
+        return True
+
+    result = run(executor, "быстрая", finished_then_cancelled)
+    assert result["success"]
+    assert "error" not in result
+
+
+def test_cancelled_check_without_result_is_reported():
+    executor = make_executor()
+
+    def gives_up(token):
+        token.cancel("Остановлено")
+        return False
+
+    result = run(executor, "быстрая", gives_up)
+    assert not result["success"]
+    assert result["error"] == "Остановлено"
+    assert result["timed_out"] is False
+
+
+def test_stop_releases_waiting_job():
+    executor = make_executor()
+    release = threading.Event()
+
+    def blocker():
+        release.wait(10)
+        return True
+
+    first = executor.submit("Т", [("зависшая", blocker)], CheckListener())
+    time.sleep(0.1)
+    second = executor.submit("Т", [("быстрая", blocker)], CheckListener())
+    second.stop()
+    results = second.wait(5)
+    release.set()
+    assert results[0]["error"] == "Остановлено"
+    assert first.wait(5)[0]["success"]
@@ -0,0 +1,72 @@
+import pytest
+from services.history import HistoryStore, outcome_of
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    yield store
+    store.close()
+
+
+def result(check, started_at, duration, system="П", **fields):
+    return dict(fields, system=system, check=check, started_at=started_at,
+                duration=duration, success=fields.get("success", True))
+
+
+@pytest.mark.parametrize("fields, outcome", [
+    ({"success": True}, "success"),
+    ({"success": False, "timed_out": True, "error": "Превышено время"}, "timeout"),
+    ({"success": False, "error": "Остановлено"}, "stopped"),
+    ({"success": False, "error": "Нет ответа"}, "error"),
+])
+def test_outcome_of(fields, outcome):
+    assert outcome_of(fields) == outcome
+
+
+def test_record_job(history):
+    assert history.record_job("run-1", []) == 0
+    # 04.05.2026 — понедельник
+    assert history.record_job("run-1", [
+        result("Проверка Elastic", "2026-05-04T09:00:00", 2.5),
+        result("Проверка адаптера", "2026-05-04T09:00:03", 1.0, success=False,
+               timed_out=True, error="Превышено время"),
+    ]) == 2
+    rows = history.query(system="П")
+    assert [(row["check_name"], row["outcome"]) for row in rows] == [
+        ("Проверка адаптера", "timeout"), ("Проверка Elastic", "success")]
+    assert rows[0]["message"] == "Превышено время"
+    assert history.query(outcome="success")[0]["duration"] == 2.5
+
+
+def test_stats_by_weekday(history):
+    history.record_job("run-1", [
+        result("Проверка Elastic", "2026-05-04T09:00:00", 2.0),
+        result("Проверка Elastic", "2026-05-11T09:00:00", 4.0, success=False, error="x"),
+        result("Проверка Elastic", "2026-05-06T09:00:00", 1.0),
+    ])
+    stats = history.stats_by_weekday(system="П", check_name="Проверка Elastic")
+    assert stats == [
+        {"weekday": 0, "runs": 2, "succeeded": 1, "avg_duration": 3.0, "max_duration": 4.0},
+        {"weekday": 2, "runs": 1, "succeeded": 1, "avg_duration": 1.0, "max_duration": 1.0},
+    ]
+    assert history.stats_by_weekday(since="2026-05-05") == [
+        {"weekday": 0, "runs": 1, "succeeded": 0, "avg_duration": 4.0, "max_duration": 4.0},
+        {"weekday": 2, "runs": 1, "succeeded": 1, "avg_duration": 1.0, "max_duration": 1.0},
+    ]
+
+
+def test_system_durations(history):
+    history.record_job("run-1", [
+        result("Проверка Elastic", "2026-05-04T09:00:05", 2.0),
+        result("Проверка адаптера", "2026-05-04T09:00:00", 3.0),
+    ])
+    history.record_job("run-2", [
+        result("Проверка Elastic", "2026-05-05T09:00:00", 1.5),
+        result("Проверка API шлюза", "2026-05-05T09:00:00", 9.0, system="М"),
+    ])
+    assert history.system_durations("П") == [
+        {"run_id": "run-2", "started_at": "2026-05-05T09:00:00", "duration": 1.5, "checks": 1},
+        {"run_id": "run-1", "started_at": "2026-05-04T09:00:00", "duration": 5.0, "checks": 2},
+    ]
+    assert [row["run_id"] for row in history.system_durations("П", weekday=0)] == ["run-1"]
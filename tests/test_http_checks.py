@@ -0,0 +1,121 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from services import http_checks
+from services.http_checks import HttpChecker, HttpEndpoint
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            if self.path == "/slow":
+                time.sleep(0.2)
+            status = 404 if self.path == "/missing" else 200
+            body = b'{"status": "UP"}'
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.active = server.max_active = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://localhost:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def make_checker():
+    checkers = []
+
+    def make(**options):
+        checker = HttpChecker(**options)
+        checkers.append(checker)
+        return checker
+    yield make
+    for checker in checkers:
+        checker.close()
+
+
+def test_keep_alive_connection_reused(server, make_checker):
+    checker = make_checker(concurrency=1, per_host=1)
+    endpoint = HttpEndpoint(server.url + "/ok")
+    results = [checker.fetch(endpoint) for _ in range(5)]
+    assert all(result["ok"] for result in results)
+    assert [result["new_connection"] for result in results] == [True] + [False] * 4
+    assert checker.stats() == {"requests": 5, "connections": 1, "errors": 0}
+
+
+def test_per_host_limit(server, make_checker):
+    checker = make_checker(concurrency=8, per_host=2)
+    results = checker.run([HttpEndpoint(server.url + "/slow") for _ in range(6)])
+    assert all(result["ok"] for result in results)
+    assert server.max_active == 2
+    assert checker.stats()["connections"] == 2
+
+
+def test_timing_fields(server, make_checker):
+    checker = make_checker()
+    # Соединения пула разрешают имя сами: при смене внутренностей urllib3 запрос упадёт здесь
+    first = checker.fetch(HttpEndpoint(server.url + "/slow"))
+    assert first["ok"] and first["new_connection"]
+    assert first["dns"] > 0 and first["connect"] > 0
+    assert first["ttfb"] >= 0.2
+    assert first["total"] >= first["dns"] + first["connect"] + first["ttfb"]
+    second = checker.fetch(HttpEndpoint(server.url + "/ok"))
+    assert second["dns"] == second["connect"] == 0.0
+    assert second["bytes"] == len(b'{"status": "UP"}')
+
+
+@pytest.mark.parametrize("entry, error", [
+    ({"url": "/missing"}, "код ответа 404, ожидался [200]"),
+    ({"url": "/missing", "expect_status": [200, 404]}, None),
+    ({"url": "/ok", "body_pattern": '"status":\\s*"DOWN"'}, "в ответе нет"),
+    ({"url": "/ok", "body_pattern": '"status":\\s*"UP"'}, None),
+    ({"url": "/slow", "max_latency": 0.05}, "ответ за"),
+])
+def test_expectations(server, make_checker, entry, error):
+    entry = dict(entry, url=server.url + entry["url"])
+    result = make_checker().fetch(HttpEndpoint(entry))
+    if error is None:
+        assert result["ok"] and result["error"] is None
+    else:
+        assert not result["ok"] and result["error"].startswith(error)
+
+
+def test_connection_refused(make_checker):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    result = make_checker().fetch(HttpEndpoint(f"http://127.0.0.1:{port}/"))
+    assert result["error"] == "не удалось подключиться"
+    assert result["status"] is None
+
+
+@pytest.mark.parametrize("suite", ["пустой", "неизвестный"])
+def test_empty_or_unknown_suite_fails(monkeypatch, suite):
+    monkeypatch.setattr(http_checks, "get_section",
+                        lambda name: {"suites": {"пустой": {"endpoints": []}}})
+    assert http_checks.run_suite(suite) is False
@@ -0,0 +1,57 @@
+import logging
+import pytest
+from services.cancel import CancelToken, CheckCancelled
+from services.isolation import ProcessPool
+
+
+@pytest.fixture
+def pool():
+    pool = ProcessPool(size=1)
+    yield pool
+    pool.close()
+
+
+def test_result_round_trip(pool):
+    assert pool.run("stubs.checks:noop", CancelToken()) is True
+    assert pool.run("stubs.checks:sleepy", CancelToken(), params={"seconds": 0.01}) is True
+    # Процесс переиспользуется между проверками
+    assert pool.stats()["started"] == 1
+    assert pool.stats()["tasks"] == 2
+
+
+def test_tab_log_forwarded(pool):
+    messages = []
+    pool.run("stubs.checks:chatty", CancelToken(), params={"messages": 2},
+             log_callback=lambda message, message_type: messages.append(
+                 (message, message_type)))
+    assert messages == [("Сообщение 1 из 2", "info"), ("Сообщение 2 из 2", "info"),
+                        ("Успешно выполнено", "success")]
+
+
+def test_logging_records_forwarded(pool, caplog):
+    with caplog.at_level(logging.INFO, logger="stubs.checks"):
+        assert pool.run("stubs.checks:logged", CancelToken(), params={"messages": 2})
+    assert [(record.name, record.getMessage()) for record in caplog.records
+            if record.name == "stubs.checks"] == [
+        ("stubs.checks", "Запись 1 из 2"), ("stubs.checks", "Запись 2 из 2")]
+
+
+def test_exception_propagated(pool):
+    with pytest.raises(RuntimeError, match="ValueError: нет связи"):
+        pool.run("stubs.checks:failing", CancelToken(), params={"message": "нет связи"})
+    # После исключения в проверке процесс жив и обслуживает следующие
+    assert pool.run("stubs.checks:noop", CancelToken()) is True
+    assert pool.stats()["started"] == 1
+
+
+def test_hung_worker_killed_and_replaced(pool):
+    assert pool.run("stubs.checks:noop", CancelToken()) is True
+    hung = pool._idle[0].process
+    token = CancelToken()
+    with pytest.raises(CheckCancelled):
+        pool.run("stubs.checks:stuck", token, timeout=0.5)
+    assert token.timed_out
+    assert not hung.is_alive()
+    assert pool.run("stubs.checks:noop", CancelToken()) is True
+    stats = pool.stats()
+    assert stats["killed"] == 1 and stats["started"] == 2 and stats["total"] == 1
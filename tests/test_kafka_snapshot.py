@@ -0,0 +1,80 @@
+import threading
+from services.kafka_snapshot import KafkaSnapshot, SnapshotCache
+from services.logger import bind_log_context
+from stubs.kafka_broker import FakeKafkaBackend
+
+
+def small_backend():
+    # Группа orders читает topic-000, billing — topic-001
+    return FakeKafkaBackend(topics=2, partitions=3, groups=("orders", "billing"))
+
+
+def test_snapshot_shared_by_checks_of_one_run():
+    backend = FakeKafkaBackend()
+    cache = SnapshotCache(backend)
+    snapshots = []
+
+    def check():
+        with bind_log_context(run_id="run-1"):
+            snapshots.append(cache.get())
+
+    threads = [threading.Thread(target=check) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert len(snapshots) == 8
+    assert all(snapshot is snapshots[0] for snapshot in snapshots)
+    assert backend.fetches == 1
+
+
+def test_new_run_reads_cluster_again():
+    backend = small_backend()
+    cache = SnapshotCache(backend, max_age=3600)
+    with bind_log_context(run_id="run-1"):
+        first = cache.get()
+    with bind_log_context(run_id="run-2"):
+        assert cache.get() is not first
+        assert cache.get() is cache.get()
+    assert backend.fetches == 2
+
+
+def test_without_run_snapshot_lives_max_age():
+    backend = small_backend()
+    cache = SnapshotCache(backend, max_age=3600)
+    assert cache.get() is cache.get()
+    expired = SnapshotCache(backend, max_age=0)
+    assert expired.get() is not expired.get()
+    assert backend.fetches == 3
+
+
+def test_group_lag():
+    backend = small_backend()
+    backend.consume("orders")
+    backend.produce("topic-000", 7, partition=1)
+    backend.produce("topic-000", 2)
+    snapshot = KafkaSnapshot(backend.fetch())
+    orders = snapshot.groups["orders"]
+    assert list(orders.lag[:3]) == [2, 9, 2]
+    # topic-001 группа не читает: смещений нет, задержка 0
+    assert list(orders.lag[3:]) == [0, 0, 0]
+    assert orders.consumed_topics == {"topic-000"}
+    assert orders.total == 13
+    assert orders.max == 9 and snapshot.describe(orders.max_index) == "topic-000[1]"
+
+
+def test_negative_lag_clamped_to_zero():
+    backend = small_backend()
+    # Топик пересоздан: закоммиченное смещение группы больше конца партиции
+    end = backend.topics["topic-001"][0]["end"]
+    backend.groups["billing"]["offsets"][("topic-001", 0)] = end + 100
+    billing = KafkaSnapshot(backend.fetch()).groups["billing"]
+    assert billing.lag[3] == 0
+    assert min(billing.lag) == 0
+
+
+def test_unknown_group_is_dead_without_lag():
+    snapshot = KafkaSnapshot(small_backend().fetch(groups=["missing"]))
+    missing = snapshot.groups["missing"]
+    assert missing.state == "Dead"
+    assert missing.total == 0 and missing.consumed_topics == set()
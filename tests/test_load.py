@@ -0,0 +1,39 @@
+import threading
+import time
+from services.load import LoadSampler
+
+
+class OverlapTransport:
+    """Запоминает, сколько замеров одного сервера шло одновременно"""
+
+    def __init__(self, host, **options):
+        self.host = host
+        self.active = 0
+        self.overlap = 0
+        self._lock = threading.Lock()
+
+    def sample(self):
+        with self._lock:
+            self.active += 1
+            self.overlap = max(self.overlap, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return {"cpu": 10.0}
+
+
+def test_concurrent_sampling_is_serialized_per_host():
+    sampler = LoadSampler([{"name": name, "transport": "tests.test_load:OverlapTransport"}
+                           for name in ("сервер-1", "сервер-2")])
+    try:
+        # Фоновый замер и проверка опрашивают те же серверы одновременно
+        threads = [threading.Thread(target=sampler.sample_all) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        assert all(transport.overlap == 1 for transport in sampler.hosts.values())
+        assert all(len(sampler.buffers[name]["cpu"].window(60, time.time())) == 3
+                   for name in sampler.hosts)
+    finally:
+        sampler.close()
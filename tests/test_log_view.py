@@ -0,0 +1,36 @@
+import os
+import pytest
+
+pytest.importorskip("PyQt5")
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import Qt  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+from interfaces.ui import LogModel  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def records(*texts):
+    return [(0.0, 0, text) for text in texts]
+
+
+def highlighted(model):
+    return [model.data(model.index(row), Qt.DisplayRole) for row in range(model.rowCount())
+            if model.data(model.index(row), Qt.BackgroundRole) is not None]
+
+
+def test_highlight_follows_evicted_rows(app):
+    model = LogModel(3)
+    model.append_records(records("a", "b", "c"))
+    model.set_highlight(2)
+    model.append_records(records("d"))
+    assert model.highlight_row == 1
+    assert highlighted(model) == ["c"]
+    # Подсвеченная запись вытеснена из буфера — подсветка снимается
+    model.append_records(records("e", "f"))
+    assert model.highlight_row is None
+    assert highlighted(model) == []
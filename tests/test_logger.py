@@ -0,0 +1,121 @@
+import gzip
+import json
+import logging
+import queue
+import threading
+import time
+from logging.handlers import QueueListener
+import pytest
+from services.logger import (
+    CompressingRotatingFileHandler, ContextFilter, JsonLinesFormatter, LogQueueHandler,
+    bind_log_context)
+
+
+class SlowHandler(logging.Handler):
+    """Как запись на медленный диск: каждая запись занимает delay секунд"""
+
+    def __init__(self, delay=0):
+        super().__init__()
+        self.delay = delay
+        self.lines = []
+        self.written = threading.Event()
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.lines.append(self.format(record))
+        self.written.set()
+
+
+@pytest.fixture
+def pipeline():
+    """Та же цепочка, что собирает setup_logging: очередь → поток записи → обработчик"""
+    created = []
+
+    def make(handler):
+        log_queue = queue.SimpleQueue()
+        queue_handler = LogQueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        logger = logging.getLogger(f"tests.logger.{len(created)}")
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(queue_handler)
+        listener = QueueListener(log_queue, handler)
+        listener.start()
+        created.append((logger, queue_handler, listener))
+        return logger, listener
+    yield make
+    for logger, queue_handler, listener in created:
+        logger.removeHandler(queue_handler)
+        if listener._thread is not None:
+            listener.stop()
+
+
+def test_json_line_with_context_and_traceback(pipeline):
+    handler = SlowHandler()
+    handler.setFormatter(JsonLinesFormatter())
+    logger, listener = pipeline(handler)
+    with bind_log_context(system="П", check="Проверка Elastic", run_id="run-1"):
+        try:
+            raise ValueError("нет ответа")
+        except ValueError:
+            logger.exception("Ошибка %s", "проверки")
+    listener.stop()
+    data = json.loads(handler.lines[0])
+    assert data["message"] == "Ошибка проверки"
+    assert data["level"] == "ERROR"
+    assert (data["system"], data["check"], data["run_id"]) == \
+        ("П", "Проверка Elastic", "run-1")
+    assert data["exc"].startswith("Traceback") and "ValueError: нет ответа" in data["exc"]
+
+
+def test_text_format_keeps_traceback(pipeline):
+    handler = SlowHandler()
+    handler.setFormatter(logging.Formatter("%(levelname)s - %(message)s"))
+    logger, listener = pipeline(handler)
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        logger.exception("Сбой")
+    listener.stop()
+    assert handler.lines[0].startswith("ERROR - Сбой\nTraceback")
+    assert handler.lines[0].count("ZeroDivisionError") == 1
+
+
+def test_enqueue_does_not_wait_for_disk(pipeline):
+    handler = SlowHandler(delay=0.2)
+    logger, listener = pipeline(handler)
+    time_s = time.perf_counter()
+    for index in range(5):
+        logger.info("запись %d", index)
+    assert time.perf_counter() - time_s < 0.1
+    listener.stop()
+    assert len(handler.lines) == 5
+
+
+def test_size_rotation_gzips_backups(tmp_path):
+    path = tmp_path / "app.log"
+    handler = CompressingRotatingFileHandler(str(path), max_bytes=100, backup_count=2,
+                                             when=None)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for index in range(12):
+        handler.emit(logging.makeLogRecord({"msg": f"строка {index:02d} " + "x" * 30}))
+    handler.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == \
+        ["app.log", "app.log.1.gz", "app.log.2.gz"]
+    with gzip.open(tmp_path / "app.log.1.gz", "rt", encoding="utf-8") as f:
+        assert f.read().startswith("строка")
+
+
+def test_time_rotation(tmp_path):
+    path = tmp_path / "app.log"
+    handler = CompressingRotatingFileHandler(str(path), max_bytes=0, backup_count=3,
+                                             when="1h")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.emit(logging.makeLogRecord({"msg": "вчера"}))
+    handler.rollover_at = time.time() - 1
+    handler.emit(logging.makeLogRecord({"msg": "сегодня"}))
+    handler.close()
+    assert path.read_text(encoding="utf-8") == "сегодня\n"
+    with gzip.open(tmp_path / "app.log.1.gz", "rt", encoding="utf-8") as f:
+        assert f.read() == "вчера\n"
+    assert handler.rollover_at > time.time() + 3000
@@ -0,0 +1,57 @@
+import os
+import pytest
+from services.logtail import LogTail, TailState
+
+
+@pytest.fixture
+def tail(tmp_path):
+    state = TailState(str(tmp_path / "logtail.json"))
+    return LogTail("адаптер", [str(tmp_path / "app.log*")], ["ERROR"], state)
+
+
+def write(path, text, mode="a"):
+    with open(path, mode, encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_reads_only_appended_lines(tmp_path, tail):
+    log = tmp_path / "app.log"
+    write(log, "INFO старт\nERROR раз\nERROR два\n")
+    assert tail.scan()["total"] == 2
+    assert tail.scan()["total"] == 0
+    write(log, "INFO ок\nERROR три\n")
+    result = tail.scan()
+    assert result["total"] == 1
+    assert result["samples"] == ["ERROR три"]
+
+
+def test_incomplete_line_waits_for_newline(tmp_path, tail):
+    log = tmp_path / "app.log"
+    write(log, "INFO старт\n")
+    tail.scan()
+    write(log, "ERROR недописан")
+    assert tail.scan()["total"] == 0
+    write(log, "ная строка\n")
+    assert tail.scan()["samples"] == ["ERROR недописанная строка"]
+
+
+def test_rename_rotation(tmp_path, tail):
+    log = tmp_path / "app.log"
+    write(log, "ERROR до ротации\n")
+    assert tail.scan()["total"] == 1
+    os.rename(log, tmp_path / "app.log.1")
+    # Старый файл ещё дописывается после переименования, новый начат с нуля
+    write(tmp_path / "app.log.1", "ERROR после переименования\n")
+    write(log, "ERROR в новом файле\n")
+    result = tail.scan()
+    assert result["total"] == 2
+    assert sorted(result["samples"]) == ["ERROR в новом файле", "ERROR после переименования"]
+
+
+def test_copytruncate_rotation(tmp_path, tail):
+    log = tmp_path / "app.log"
+    write(log, "INFO длинная первая строка до ротации\nERROR старая\n")
+    assert tail.scan()["total"] == 1
+    # Тот же файл обрезан и начат заново
+    write(log, "ERROR новая\n", mode="w")
+    assert tail.scan()["samples"] == ["ERROR новая"]
@@ -0,0 +1,41 @@
+import threading
+from services.executor import CheckExecutor
+from services.logger import bind_log_context
+from services.registry import CheckRegistry
+from services.runner import CheckRunner, ReportListener
+
+
+def test_late_message_goes_to_its_own_check():
+    listener = ReportListener()
+    listener.on_check_started("первая")
+    listener.on_check_started("вторая")
+
+    def abandoned_body():
+        # Брошенная по таймауту проверка дописывает сообщение, когда идёт уже следующая
+        with bind_log_context(system="Т", check="первая", run_id="run-1"):
+            listener.on_log("поздний ответ", "warning")
+
+    thread = threading.Thread(target=abandoned_body)
+    thread.start()
+    thread.join(5)
+    assert listener.messages == {
+        "первая": [{"message": "поздний ответ", "type": "warning"}], "вторая": []}
+
+
+def test_report_messages_per_check():
+    registry = CheckRegistry({"Т": {
+        "первая": {"target": "stubs.checks:chatty", "params": {"messages": 1}},
+        "вторая": {"target": "stubs.checks:failing"},
+    }})
+    executor = CheckExecutor(max_workers=1, registry=registry)
+    runner = CheckRunner({"Т": ["первая", "вторая"]}, executor, registry)
+    report = runner.run()
+    first, second = report["systems"]["Т"]
+    assert [m["message"] for m in first["messages"]] == [
+        "Начало проверки: первая", "Сообщение 1 из 1", "Успешно выполнено",
+        "Завершено: первая — Успешно"]
+    assert [m["message"] for m in second["messages"]] == [
+        "Начало проверки: вторая",
+        "Ошибка при выполнении вторая: Проверка сломалась",
+        "Завершено: вторая — ОШИБКА"]
+    assert not report["success"]
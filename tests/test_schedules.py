@@ -0,0 +1,211 @@
+import json
+import os
+import time
+from datetime import datetime, timedelta
+import pytest
+from services.schedules import CronRule, IntervalRule, RecurringScheduler, Schedule
+
+
+@pytest.mark.parametrize("field, expected", [
+    ("5/10 * * * *", {5, 15, 25, 35, 45, 55}),
+    ("*/15 * * * *", {0, 15, 30, 45}),
+    ("10-20/5 * * * *", {10, 15, 20}),
+    ("0,30 * * * *", {0, 30}),
+    ("7 * * * *", {7}),
+])
+def test_minute_field(field, expected):
+    assert CronRule(field).minutes == expected
+
+
+@pytest.mark.parametrize("expression", [
+    "60 * * * *", "* 24 * * *", "* * 0 * *", "5-1 * * * *", "*/0 * * * *", "* * * *",
+])
+def test_invalid_expression(expression):
+    with pytest.raises(ValueError):
+        CronRule(expression)
+
+
+def test_sunday_is_0_and_7():
+    assert CronRule("0 9 * * 7").weekdays == CronRule("0 9 * * 0").weekdays == {0}
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    # Конец месяца и года
+    ("0 9 1 * *", datetime(2026, 1, 31, 10, 0), datetime(2026, 2, 1, 9, 0)),
+    ("0 0 1 1 *", datetime(2026, 12, 31, 23, 59), datetime(2027, 1, 1, 0, 0)),
+    # 31-е бывает не в каждом месяце
+    ("0 0 31 * *", datetime(2026, 4, 1), datetime(2026, 5, 31)),
+    # 29 февраля — только в високосный год
+    ("0 0 29 2 *", datetime(2025, 3, 1), datetime(2028, 2, 29)),
+    # Заданы и день месяца, и день недели: достаточно любого (правило cron)
+    ("0 8 15 * 1", datetime(2026, 6, 9, 9, 0), datetime(2026, 6, 15, 8, 0)),
+    ("0 8 13 * 5", datetime(2026, 3, 1), datetime(2026, 3, 6, 8, 0)),
+    # Строго после: совпадающий момент не возвращается
+    ("30 9 * * *", datetime(2026, 1, 1, 9, 30), datetime(2026, 1, 2, 9, 30)),
+    ("5/10 * * * *", datetime(2026, 1, 1, 9, 56), datetime(2026, 1, 1, 10, 5)),
+])
+def test_next_after(expression, after, expected):
+    assert CronRule(expression).next_after(after) == expected
+
+
+def test_never_matching_rule():
+    with pytest.raises(ValueError):
+        CronRule("0 0 31 2 *").next_after(datetime(2026, 1, 1))
+
+
+@pytest.fixture
+def berlin_time():
+    if not hasattr(time, "tzset"):
+        pytest.skip("Смена часового пояса процесса недоступна")
+    previous = os.environ.get("TZ")
+    os.environ["TZ"] = "Europe/Berlin"
+    time.tzset()
+    yield
+    if previous is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = previous
+    time.tzset()
+
+
+def test_dst_spring_forward_still_fires(berlin_time):
+    # 29.03.2026 в Берлине часы переводятся с 02:00 на 03:00
+    rule = CronRule("30 2 * * *")
+    moment = rule.next_after(datetime(2026, 3, 28, 12, 0))
+    assert moment == datetime(2026, 3, 29, 2, 30)
+    # Несуществующее время переводится в реальный момент того же утра
+    fired_at = datetime.fromtimestamp(moment.timestamp())
+    assert datetime(2026, 3, 29, 3, 0) <= fired_at < datetime(2026, 3, 29, 4, 0)
+
+
+def test_dst_fall_back_fires_once(berlin_time):
+    # 25.10.2026 в Берлине 02:00–03:00 проходит дважды
+    rule = CronRule("30 2 * * *")
+    first = rule.next_after(datetime(2026, 10, 24, 12, 0))
+    assert first == datetime(2026, 10, 25, 2, 30)
+    assert rule.next_after(first) == datetime(2026, 10, 26, 2, 30)
+
+
+def test_interval_rule():
+    assert IntervalRule("10m").next_after(datetime(2026, 1, 31, 23, 55)) == \
+        datetime(2026, 2, 1, 0, 5)
+
+
+class FakeHandle:
+    def __init__(self, deadline, callback):
+        self.deadline_dt = deadline
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeTimers:
+    """Вместо TimerScheduler: запоминает сроки, вызывать их будет тест"""
+
+    def __init__(self):
+        self.handles = []
+
+    def call_at(self, when, callback):
+        handle = FakeHandle(when, callback)
+        self.handles.append(handle)
+        return handle
+
+
+class FakeJob:
+    def __init__(self):
+        self.finished = False
+
+    def done(self):
+        return self.finished
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_scheduler(tmp_path, clock, last_run=None, every="1h"):
+    path = str(tmp_path / "schedules.json")
+    if last_run is not None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"Каждый час": last_run.isoformat()}, f)
+    launched = []
+
+    def launch(run):
+        job = FakeJob()
+        run.attach(job)
+        run.close()
+        launched.append(job)
+
+    schedule = Schedule({"name": "Каждый час", "systems": ["П"], "every": every})
+    timers = FakeTimers()
+    scheduler = RecurringScheduler([schedule], launch, path, timers=timers, clock=clock)
+    return scheduler, timers, launched, path
+
+
+def test_missed_runs_caught_up_once(tmp_path):
+    clock = Clock(datetime(2026, 5, 4, 9, 0))
+    # Программа была закрыта двое суток: 48 пропущенных запусков
+    scheduler, timers, launched, path = make_scheduler(
+        tmp_path, clock, last_run=clock.now - timedelta(days=2))
+    scheduler.start()
+    assert len(launched) == 1
+    assert [handle.deadline_dt for handle in timers.handles] == [datetime(2026, 5, 4, 10, 0)]
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == {"Каждый час": "2026-05-04T09:00:00"}
+
+
+def test_not_due_is_only_planned(tmp_path):
+    clock = Clock(datetime(2026, 5, 4, 9, 0))
+    scheduler, timers, launched, _ = make_scheduler(
+        tmp_path, clock, last_run=clock.now - timedelta(minutes=20))
+    scheduler.start()
+    assert launched == []
+    assert timers.handles[0].deadline_dt == datetime(2026, 5, 4, 10, 0)
+
+
+def test_overlapping_run_is_skipped(tmp_path):
+    clock = Clock(datetime(2026, 5, 4, 9, 0))
+    scheduler, timers, launched, _ = make_scheduler(tmp_path, clock)
+    scheduler.start()
+    assert launched == []
+    clock.now = datetime(2026, 5, 4, 10, 0)
+    timers.handles[-1].callback()
+    assert len(launched) == 1
+    # Предыдущий запуск ещё идёт — следующий пропускается, но планируется дальше
+    clock.now = datetime(2026, 5, 4, 11, 0)
+    timers.handles[-1].callback()
+    assert len(launched) == 1
+    assert timers.handles[-1].deadline_dt == datetime(2026, 5, 4, 12, 0)
+    launched[0].finished = True
+    clock.now = datetime(2026, 5, 4, 12, 0)
+    timers.handles[-1].callback()
+    assert len(launched) == 2
+
+
+def test_stop_cancels_planned_runs(tmp_path):
+    clock = Clock(datetime(2026, 5, 4, 9, 0))
+    scheduler, timers, _, _ = make_scheduler(tmp_path, clock)
+    scheduler.start()
+    scheduler.stop()
+    assert all(handle.cancelled for handle in timers.handles)
+    assert scheduler.next_runs() == {}
+
+
+def test_fire_racing_stop_does_not_plan(tmp_path):
+    clock = Clock(datetime(2026, 5, 4, 9, 0))
+    scheduler, timers, launched, _ = make_scheduler(tmp_path, clock)
+    scheduler.start()
+    fire = timers.handles[-1].callback
+    scheduler.stop()
+    # Таймер уже сработал, когда планировщик останавливали
+    clock.now = datetime(2026, 5, 4, 10, 0)
+    fire()
+    assert launched == []
+    assert len(timers.handles) == 1
+    assert scheduler.next_runs() == {}
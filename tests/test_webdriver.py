@@ -0,0 +1,152 @@
+import threading
+import time
+import pytest
+from services import webdriver
+from services.executor import CheckExecutor, CheckListener
+from services.registry import CheckRegistry
+from stubs import fake_webdriver
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = webdriver.DriverPool(size=2, session_factory=fake_webdriver.create_session)
+    monkeypatch.setattr(webdriver, "_pool", pool)
+    monkeypatch.setattr(webdriver, "_leases", {})
+    yield pool
+    pool.close()
+
+
+def make_executor():
+    registry = CheckRegistry({"Т": {
+        name: {"target": "stubs.checks:noop", "resources": ["chrome"]}
+        for name in ("первая", "вторая")}})
+    return CheckExecutor(max_workers=2, resource_limits={"chrome": 2},
+                         registry=registry, cancel_grace=1)
+
+
+def test_concurrent_checks_get_separate_sessions(pool):
+    executor = make_executor()
+    barrier = threading.Barrier(2, timeout=5)
+    drivers = {}
+
+    def browser_check(name):
+        def check():
+            driver = webdriver.get_chromedriver()
+            # Повторный вызов в той же проверке — тот же драйвер
+            assert webdriver.get_chromedriver() is driver
+            drivers[name] = driver
+            barrier.wait()
+            return True
+        return check
+
+    jobs = [executor.submit("Т", [(name, browser_check(name))], CheckListener())
+            for name in ("первая", "вторая")]
+    for job in jobs:
+        assert job.wait(10)[0]["success"]
+    assert drivers["первая"] is not drivers["вторая"]
+    stats = pool.stats()
+    assert stats["created"] == 2
+    assert stats["in_use"] == 0 and stats["idle"] == 2
+    assert webdriver._leases == {}
+
+
+def test_session_returns_to_pool_after_check(pool):
+    executor = make_executor()
+    seen = []
+
+    def check():
+        seen.append(webdriver.get_chromedriver())
+        return True
+
+    for _ in range(3):
+        assert executor.submit("Т", [("первая", check)], CheckListener()).wait(10)[0]["success"]
+    assert seen[0] is seen[1] is seen[2]
+    assert pool.stats()["created"] == 1
+
+
+def test_outside_check_session_released_on_close(pool):
+    driver = webdriver.get_chromedriver()
+    assert webdriver.get_chromedriver() is driver
+    assert pool.stats()["in_use"] == 1
+    webdriver._return_outside_leases()
+    assert pool.stats()["in_use"] == 0
+
+
+def test_prewarmed_session_is_handed_to_first_check(pool, monkeypatch):
+    monkeypatch.setattr(webdriver, "_prewarm_thread", None)
+    webdriver.start_prewarm(1).join(5)
+    warmed = pool._idle[0].driver
+    executor = make_executor()
+    seen = []
+
+    def check():
+        seen.append(webdriver.get_chromedriver())
+        return True
+
+    assert executor.submit("Т", [("первая", check)], CheckListener()).wait(10)[0]["success"]
+    assert seen == [warmed]
+    assert pool.stats()["created"] == 1
+
+
+def test_check_waits_for_session_being_prewarmed(monkeypatch):
+    pool = webdriver.DriverPool(
+        size=2, session_factory=lambda: fake_webdriver.create_session(startup=0.3))
+    monkeypatch.setattr(webdriver, "_pool", pool)
+    monkeypatch.setattr(webdriver, "_leases", {})
+    monkeypatch.setattr(webdriver, "_prewarm_thread", None)
+    try:
+        webdriver.start_prewarm(1)
+        time.sleep(0.05)
+        assert pool.stats()["total"] == 1
+        # Прогрев ещё идёт: проверка ждёт эту сессию, а не запускает вторую
+        driver = webdriver.get_chromedriver()
+        assert pool.stats()["created"] == 1
+        webdriver._return_outside_leases()
+        assert pool._idle[0].driver is driver
+    finally:
+        pool.close()
+
+
+def test_outside_check_sessions_are_per_thread(pool):
+    barrier = threading.Barrier(2, timeout=5)
+    drivers = []
+
+    def caller():
+        driver = webdriver.get_chromedriver()
+        assert webdriver.get_chromedriver() is driver
+        drivers.append(driver)
+        barrier.wait()
+
+    threads = [threading.Thread(target=caller) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert drivers[0] is not drivers[1]
+    assert pool.stats()["in_use"] == 2
+    webdriver._return_outside_leases()
+    assert pool.stats()["in_use"] == 0
+    assert webdriver._leases == {}
+
+
+def test_session_recycled_after_max_uses():
+    pool = webdriver.DriverPool(size=1, max_uses=2,
+                                session_factory=fake_webdriver.create_session)
+    try:
+        drivers = []
+        for _ in range(3):
+            with pool.lease() as driver:
+                drivers.append(driver)
+        assert drivers[0] is drivers[1]
+        assert drivers[2] is not drivers[0]
+        stats = pool.stats()
+        assert stats["created"] == 2 and stats["recycled"] == 1
+    finally:
+        pool.close()
+
+
+def test_release_after_close_discards_session(pool):
+    session = pool.acquire()
+    pool.close()
+    pool.release(session)
+    assert pool.stats()["idle"] == 0 and pool.stats()["total"] == 0